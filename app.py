@@ -1,111 +1,551 @@
-import sys, os
-print("PYTHONPATH:", sys.path)
-print("Exists scraper/static_scraper.py?", os.path.exists("scraper/static_scraper.py"))
+import sys
+import csv
+import queue
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from scraper.router import Page, fetch_page
+from scraper.http_cache import get_http_cache, cached_record
+from scraper.urls import canonicalize
+from scraper.schema_extractor import extract_jobposting_schema, complete_record
+from gemini.parser import parse_batch, get_cache, make_batcher, llm_seconds
+from gemini.batching import INPUT_TOKEN_BUDGET, OUTPUT_TOKEN_BUDGET, MAX_ITEMS
+from utils.validators import validate_record
+from utils.dedup import DedupStage
+from utils.job_store import get_job_store, PARSED, VALIDATED
+from utils.writers import open_sink, OrderedSink, TxtSink
+from utils.metrics import metrics, profiled, serve as serve_metrics, start_profiling
 
-import requests
-from scraper.schema_extractor import extract_jobposting_schema
+MAX_WORKERS   = 10
+FETCH_WORKERS = 16
+QUEUE_SIZE    = 100                  # max items waiting between two stages
+TEMP_TXT      = 'data/temp_output.txt'
 
-resp = requests.get(url, timeout=10)
-html = resp.text
-schema_rec = extract_jobposting_schema(url, html)
+_DONE = object()                     # end-of-stream marker passed between stages
+_POLL = 0.2                          # seconds between failure checks while a queue blocks
 
-import csv
-from concurrent.futures import ThreadPoolExecutor, as_completed 
-from scraper.static_scraper import scrape
-from gemini.parser import parse_batch
-from utils.validators import validate_record
 
-BATCH_SIZE   = 10
-MAX_WORKERS  = 10                    
-TEMP_TXT     = 'data/temp_output.txt'
+class _Failure:
+    """
+    First exception raised by any stage of one run. Once it is set, queue
+    operations stop blocking (see _put/_get) so every stage winds down and
+    run_pipeline can re-raise it instead of hanging on a full queue.
+    """
+
+    def __init__(self):
+        self.error = None
+        self._event = threading.Event()
+
+    def set(self, error):
+        if self.error is None:
+            self.error = error
+        self._event.set()
+
+    def is_set(self):
+        return self._event.is_set()
+
+
+def _put(q, item, failure=None):
+    """q.put that gives up (dropping `item`) once `failure` is set."""
+    if failure is None:
+        q.put(item)
+        return
+    while not failure.is_set():
+        try:
+            q.put(item, timeout=_POLL)
+            return
+        except queue.Full:
+            pass
+
+
+def _get(q, failure=None):
+    """q.get that returns _DONE once `failure` is set."""
+    if failure is None:
+        return q.get()
+    while not failure.is_set():
+        try:
+            return q.get(timeout=_POLL)
+        except queue.Empty:
+            pass
+    return _DONE
 
 def read_urls(input_csv):
-    urls = []
+    """URLs from the 'url' column, de-duplicated by canonical form (first spelling kept)."""
+    urls, seen = [], set()
     with open(input_csv, newline='', encoding='utf-8') as f:
         reader = csv.DictReader(f)
         if 'url' not in reader.fieldnames:
             print("Error: input CSV must have a 'url' column")
             sys.exit(1)
         for row in reader:
-            urls.append(row['url'])
+            url = (row['url'] or '').strip()
+            key = canonicalize(url)
+            if url and key not in seen:
+                seen.add(key)
+                urls.append(url)
     return urls
 
 
-def append_to_txt(lines):
-    os.makedirs(os.path.dirname(TEMP_TXT), exist_ok=True)
-    mode = 'a' if os.path.exists(TEMP_TXT) else 'w'
-    with open(TEMP_TXT, mode, encoding='utf-8') as f:
-        for line in lines:
-            f.write(line.strip() + '\n')
+def _feed(urls, fetch_q, n_fetchers, write_q=None, ready=(), stop=None, failure=None):
+    """
+    Producer: pushes (index, url) pairs onto the bounded fetch queue.
+    Blocks whenever fetchers fall behind, so memory stays flat. Records
+    already parsed in an interrupted run (`ready`) go straight to the writer.
+    Stops early once the `stop` event is set or another stage has failed.
+    """
+    for i in range(0, len(ready), 50):
+        _put(write_q, ready[i:i + 50], failure)
+    for idx, url in enumerate(urls, start=1):
+        if (stop is not None and stop.is_set()) or (failure is not None and failure.is_set()):
+            break
+        _put(fetch_q, (idx, url), failure)
+    for _ in range(n_fetchers):
+        _put(fetch_q, _DONE, failure)
 
 
-def records_to_csv(records, output_csv):
-    fieldnames = [
-        'title', 'company', 'city', 'country', 'officeType', 'experienceLevel',
-        'employmentType', 'industries', 'visa', 'benefits', 'skills', 'url', 'j/i',
-        'currency', 'salaryLow', 'salaryHigh'
-    ]
-    write_header = not os.path.exists(output_csv)
-    with open(output_csv, 'a', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        if write_header:
-            writer.writeheader()
-        for rec in records:
-            writer.writerow(rec)
+@profiled('scrape_item')
+def _scrape_item(idx, url, total, incremental=False, store=None, output=None):
+    """
+    Scrapes one URL (static, browser or ATS API, as scraper.router decides)
+    and says what to do with it: ('record', rec) when no Gemini call is
+    needed, ('parse', item) for the batcher, or ('skip', None).
 
+    Pages whose structured data (schema.org JobPosting, ATS API) already
+    fills every required field skip Gemini, as do unchanged pages (a 304, or
+    ATS/browser text equal to the last crawl's) whose record is still cached.
+    In `incremental` mode unchanged pages are skipped altogether. Progress is checkpointed in `store` (utils.job_store).
+    """
+    print(f"[{idx}/{total}] Scraping {url}...")
+    try:
+        page = fetch_page(url)
+    except Exception as e:
+        print(f"  ⚠️ Warning: could not scrape {url}: {e}")
+        if store is not None:
+            store.failed(output, url, f"fetch: {e}")
+        page = Page(url, "", "")
+    else:
+        if store is not None:
+            store.fetched(output, url, page.text)
 
-def main():
-    if len(sys.argv) != 3:
-        print("Usage: python app.py input.csv output.csv")
-        sys.exit(1)
-    input_csv, output_csv = sys.argv[1], sys.argv[2]
+    if page.unchanged:
+        if incremental:
+            print(f"  ↩️ Not modified since last crawl: {url}")
+            return 'skip', None
+        rec = cached_record(url)
+        if rec:
+            return 'record', rec
 
-    urls     = read_urls(input_csv)
-    batch    = []
-    futures  = []
+    known = {**page.known, **extract_jobposting_schema(url, page.html)}
+    full  = complete_record({**known, 'url': url}) if known else None
+    if full:
+        print(f"  🧩 Structured data is complete for {url}; skipping Gemini")
+        return 'record', full
+    return 'parse', {'text': page.text, 'url': url, 'j/i': idx, 'known': known}
 
-    executor = ThreadPoolExecutor(max_workers=MAX_WORKERS) 
 
-    for idx, url in enumerate(urls, start=1):
-        print(f"[{idx}/{len(urls)}] Scraping {url}...")
+def _fetch_worker(fetch_q, batch_q, write_q, total, incremental=False, store=None, output=None,
+                  stop=None, failure=None):
+    """
+    Fetch stage: scrapes one URL at a time (see _scrape_item) and hands the
+    text to the batcher, or a finished record straight to the writer. Once
+    `stop` is set, queued URLs are dropped (they stay pending in the store).
+    """
+    while True:
+        item = _get(fetch_q, failure)
+        if item is _DONE:
+            _put(batch_q, _DONE, failure)
+            return
+        if stop is not None and stop.is_set():
+            continue
+        idx, url = item
+        action, value = _scrape_item(idx, url, total, incremental, store, output)
+        if action == 'record':
+            _put(write_q, [value], failure)
+        elif action == 'parse':
+            _put(batch_q, value, failure)
+        else:
+            _put(write_q, ('skip', [url]), failure)
+
+
+def _batcher(batch_q, write_q, n_fetchers, batcher, parse_workers, dedup=None,
+             store=None, output=None, stop=None, failure=None):
+    """
+    Batch stage: packs scraped pages into token-budgeted batches (see
+    gemini.batching.AdaptiveBatcher) and submits them to the Gemini parser
+    pool. Every finished call is fed back so the budget adapts. At most
+    2 × `parse_workers` batches are in flight; the batcher blocks (and so do
+    the fetchers behind it) until one finishes.
+
+    With a `dedup` stage (utils.dedup.DedupStage), near-duplicates of a page
+    already sent are held back and filled in from its record; those that
+    can't be are parsed after all. Once `stop` is set, pages not yet
+    submitted are dropped (resume scrapes them again). An error while
+    handing a finished batch on is recorded in `failure` (a _Failure), never
+    left to leak a slot.
+    """
+    executor = ThreadPoolExecutor(max_workers=parse_workers)
+    slots    = threading.BoundedSemaphore(parse_workers * 2)
+    retry_q  = queue.Queue()              # unbounded: fed from parser callbacks
+    idle     = threading.Condition()
+    inflight = [0]
+
+    if dedup is not None:
+        dedup.on_record   = lambda rec: _put(write_q, [rec], failure)
+        dedup.on_fallback = retry_q.put
+
+    def timed_parse(batch):
+        parsed = parse_batch(
+            [b['text'] for b in batch],
+            [b['url']  for b in batch],
+            [b['j/i']  for b in batch],
+            [b['known'] for b in batch],
+        )
+        batcher.observe(len(batch), len(parsed), llm_seconds())
+        return parsed
+
+    def on_done(fut, batch):
         try:
-            text = scrape(url)
+            try:
+                parsed = fut.result()
+            except Exception as e:
+                print(f"  ⚠️ Warning: batch failed: {e}")
+                parsed = []
+            got     = {r.get('url') for r in parsed}
+            missing = [b['url'] for b in batch if b['url'] not in got]
+            if store is not None:
+                # checkpoint before handing over, so the writer's state wins
+                store.records(output, parsed, PARSED)
+                for url in missing:
+                    store.failed(output, url, "parse: no record returned")
+            _put(write_q, parsed, failure)
+            if missing:
+                _put(write_q, ('skip', missing), failure)
+            if dedup is not None:
+                dedup.resolve(batch, parsed)
         except Exception as e:
-            print(f"  ⚠️ Warning: could not scrape {url}: {e}")
-            text = ""
-        batch.append({'text': text, 'url': url, 'j/i': idx})
-
-        if len(batch) == BATCH_SIZE:
-            texts = [b['text'] for b in batch]
-            urls_b = [b['url'] for b in batch]
-            jis   = [b['j/i'] for b in batch]
-
-            fut = executor.submit(parse_batch, texts, urls_b, jis) 
-            futures.append(fut)
-            batch = []
-
-    if batch:
-        texts = [b['text'] for b in batch]
-        urls_b = [b['url'] for b in batch]
-        jis   = [b['j/i'] for b in batch]
-        futures.append(executor.submit(parse_batch, texts, urls_b, jis))
-
-    for fut in as_completed(futures):                                
-        parsed  = fut.result()
-        cleaned = [validate_record(r) for r in parsed]
-
-        lines = [
-            ','.join(str(clean_rec[field]) for field in cleaned_rec.keys())
-            for cleaned_rec in cleaned
-        ]
-        append_to_txt(lines)
-        records_to_csv(cleaned, output_csv)
-
-    executor.shutdown(wait=True)  
-
-    print(f"\n✅ Done.")
-    print(f"  • Final CSV → {output_csv}")
+            # done-callbacks swallow exceptions; hand it to run_pipeline instead
+            if failure is None:
+                raise
+            failure.set(e)
+        finally:
+            slots.release()
+            with idle:
+                inflight[0] -= 1
+                idle.notify_all()
+
+    def submit(batch):
+        slots.acquire()
+        with idle:
+            inflight[0] += 1
+        fut = executor.submit(timed_parse, batch)
+        fut.add_done_callback(lambda f: on_done(f, batch))
+
+    def stopped():
+        return (stop is not None and stop.is_set()) or (failure is not None and failure.is_set())
+
+    def take(item):
+        if stopped():
+            return
+        if dedup is not None and dedup.offer(item):
+            return
+        ready = batcher.add(item)
+        if ready:
+            submit(ready)
+
+    def drain_retries():
+        items = []
+        while True:
+            try:
+                items.append(retry_q.get_nowait())
+            except queue.Empty:
+                return items
+
+    finished = 0
+    while finished < n_fetchers:
+        item = _get(batch_q, failure)
+        if item is _DONE:
+            finished += 1
+            continue
+        take(item)
+        for extra in drain_retries():
+            take(extra)
+
+    # fallbacks can appear until the last batch is back, so loop until quiet
+    while True:
+        rest = batcher.flush()
+        if rest and not stopped():
+            submit(rest)
+        with idle:
+            idle.wait_for(lambda: inflight[0] == 0)
+        extra = drain_retries() + (dedup.pending() if dedup is not None else [])
+        if not extra or stopped():
+            break
+        for item in extra:
+            take({**item, 'no_dedup': True})
+
+    executor.shutdown(wait=True)
+    _put(write_q, _DONE, failure)
+
+
+@profiled('writer')
+def _writer(write_q, output, store=None, fmt=None, order=None, on_progress=None, raw_path=None,
+            failure=None):
+    """
+    Write stage: the only thread touching the output files, each opened once
+    (utils.writers sinks: CSV, JSONL or Parquet by `fmt` or extension, plus
+    the raw TEMP_TXT lines). Records are written as they complete, or in
+    input order when `order` (the URLs in input order) is given; the queue
+    also carries ('skip', urls) for URLs that end without a record. Each
+    final record is remembered in the HTTP cache so a later 304 can reuse
+    it. With a job `store`, records identical to ones already in `output`
+    are skipped, so re-runs and resumes never duplicate rows.
+    `on_progress(records, skipped_urls)` is called after every write.
+    """
+    http_cache = get_http_cache()
+    sink = open_sink(output, fmt)
+    if order is not None:
+        sink = OrderedSink(sink, order)
+    with sink, TxtSink(raw_path or TEMP_TXT) as raw:
+        while True:
+            parsed = _get(write_q, failure)
+            if parsed is _DONE:
+                return
+            if isinstance(parsed, tuple):
+                sink.skip(parsed[1])
+                if on_progress is not None:
+                    on_progress([], parsed[1])
+                continue
+            with metrics.timer('validate_seconds'):
+                cleaned = [validate_record(r) for r in parsed]
+            if http_cache is not None:
+                for rec in cleaned:
+                    http_cache.store_record(rec['url'], rec)
+            done = cleaned
+            if store is not None:
+                store.records(output, cleaned, VALIDATED)
+                cleaned = store.unwritten(output, cleaned)
+                fresh = {r['url'] for r in cleaned}
+                sink.skip(r['url'] for r in done if r['url'] not in fresh)
+
+            raw.write(cleaned)
+            sink.write(cleaned)
+            if store is not None:
+                store.written(output, done)
+            if on_progress is not None:
+                on_progress(cleaned, [])
+
+
+def run_pipeline(urls, output_csv,
+                 fetch_workers=FETCH_WORKERS,
+                 parse_workers=MAX_WORKERS,
+                 batcher=None,
+                 incremental=False,
+                 dedup=True,
+                 resume=False,
+                 fmt=None,
+                 order='completion',
+                 stop=None,
+                 on_progress=None,
+                 raw_path=None):
+    """
+    Streams `urls` through fetch → batch → parse → write.
+
+    • `fetch_workers` threads scrape pages concurrently.
+    • One batcher packs pages by token budget (`batcher`, default from
+      gemini.parser.make_batcher) and feeds the Gemini pool of `parse_workers`.
+    • One writer appends validated records to `output_csv` as batches finish.
+    • With `incremental`, unchanged pages are skipped (a 304 on static
+      fetches, the same extracted text on ATS and browser pages), so only
+      new or changed postings are written.
+    • With `dedup`, near-duplicate postings (same role, other city) are
+      parsed once and the rest filled in from that record.
+    • Every URL's progress is checkpointed in the job store (JOB_STORE=0
+      turns it off); with `resume`, URLs already written to `output_csv`
+      are skipped and stored records are written without re-parsing.
+    • `fmt` picks the output format ('csv', 'jsonl', 'parquet'; default from
+      the extension) and `order` whether rows follow 'completion' or 'input'
+      order.
+    • Setting the `stop` event (threading.Event) ends the run early: no new
+      URLs are scraped, batches in flight are still parsed and written, and
+      `resume` picks up the rest. `on_progress(records, skipped_urls)` is
+      called from the writer thread as output lands; raw lines go to
+      `raw_path` (default TEMP_TXT).
+    Stages are joined by bounded queues, so all of them overlap and memory
+    does not grow with the number of URLs. If any stage raises, the others
+    wind down and the first error is re-raised here. Returns run statistics.
+    """
+    batcher = batcher or make_batcher()
+    stage   = DedupStage() if dedup else None
+    store   = get_job_store()
+    ready   = []
+    wanted  = urls
+    if store is not None:
+        if resume:
+            store.reconcile(output_csv, fmt)
+        urls, ready = store.begin(output_csv, urls, resume=resume)
+        if resume:
+            print(f"↩️ Resuming: {len(urls)} URLs to scrape, {len(ready)} parsed records to write")
+            left   = set(urls) | {r['url'] for r in ready}
+            wanted = [u for u in wanted if u in left]
+    fetch_q = queue.Queue(maxsize=QUEUE_SIZE)
+    batch_q = queue.Queue(maxsize=QUEUE_SIZE)
+    write_q = queue.Queue(maxsize=QUEUE_SIZE)
+    failure = _Failure()
+
+    def guarded(target):
+        def run(*args):
+            try:
+                target(*args, failure=failure)
+            except BaseException as e:
+                failure.set(e)
+        return run
+
+    threads = [
+        threading.Thread(target=guarded(_feed), args=(urls, fetch_q, fetch_workers, write_q, ready, stop),
+                         name="feed", daemon=True),
+        threading.Thread(target=guarded(_batcher),
+                         args=(batch_q, write_q, fetch_workers, batcher, parse_workers, stage,
+                               store, output_csv, stop),
+                         name="batcher", daemon=True),
+        threading.Thread(target=guarded(_writer),
+                         args=(write_q, output_csv, store, fmt, wanted if order == 'input' else None,
+                               on_progress, raw_path),
+                         name="writer", daemon=True),
+    ]
+    threads += [
+        threading.Thread(target=guarded(_fetch_worker),
+                         args=(fetch_q, batch_q, write_q, len(urls), incremental, store, output_csv,
+                               stop),
+                         name=f"fetch-{i}", daemon=True)
+        for i in range(fetch_workers)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if failure.error is not None:
+        raise failure.error
+
+    stats = {}
+    if store is not None:
+        stats['states'] = store.summary(output_csv)
+    if stage is not None:
+        stats.update(near_duplicates=stage.absorbed, derived=stage.derived,
+                     dedup_fallbacks=stage.fallbacks)
+    return stats
+
+
+def _report_metrics(path=None):
+    lines = metrics.summary()
+    if lines:
+        print("  • Stage metrics:")
+        for line in lines:
+            print(f"      {line}")
+    if path:
+        metrics.write(path)
+        print(f"  • Metrics → {path}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Scrape job URLs and parse them with Gemini.")
+    ap.add_argument("input_csv",  nargs="?", help="CSV with a 'url' column")
+    ap.add_argument("output_csv", nargs="?",
+                    help="where parsed records are appended (.csv, .jsonl or .parquet)")
+    ap.add_argument("--fetch-workers", type=int, default=FETCH_WORKERS,
+                    help=f"concurrent page fetchers (default {FETCH_WORKERS})")
+    ap.add_argument("--parse-workers", type=int, default=MAX_WORKERS,
+                    help=f"concurrent Gemini batches (default {MAX_WORKERS})")
+    ap.add_argument("--batch-size", type=int, default=MAX_ITEMS,
+                    help=f"max descriptions per Gemini call (default {MAX_ITEMS})")
+    ap.add_argument("--input-tokens", type=int, default=INPUT_TOKEN_BUDGET,
+                    help=f"estimated prompt tokens per Gemini call (default {INPUT_TOKEN_BUDGET})")
+    ap.add_argument("--output-tokens", type=int, default=OUTPUT_TOKEN_BUDGET,
+                    help=f"estimated response tokens per Gemini call (default {OUTPUT_TOKEN_BUDGET})")
+    ap.add_argument("--incremental", action="store_true",
+                    help="only emit postings that are new or changed since the last crawl "
+                         "(a 304 for static pages, the same text for ATS and browser pages)")
+    ap.add_argument("--resume", action="store_true",
+                    help="continue an interrupted run: skip URLs already written to output_csv")
+    ap.add_argument("--no-dedup", action="store_true",
+                    help="send near-duplicate postings to Gemini individually")
+    ap.add_argument("--format", choices=["csv", "jsonl", "parquet"], default=None,
+                    help="output format (default: from the output file's extension, else csv)")
+    ap.add_argument("--order", choices=["completion", "input"], default="completion",
+                    help="write records as they finish (default) or in input order")
+    ap.add_argument("--metrics", metavar="FILE", default=None,
+                    help="write Prometheus-format stage metrics to FILE at the end "
+                         "(METRICS_PORT=N also serves them live on /metrics)")
+    ap.add_argument("--coordinator", action="store_true",
+                    help="distributed mode: queue the URLs and write what workers return")
+    ap.add_argument("--worker", action="store_true",
+                    help="distributed mode: process tasks from --queue (no CSV arguments)")
+    ap.add_argument("--queue", default=None,
+                    help="work queue for --coordinator/--worker: sqlite:///path or redis://host:port/db "
+                         "(default $WORK_QUEUE or sqlite:///data/queue.sqlite)")
+    ap.add_argument("--lease", type=float, default=None,
+                    help="seconds a worker holds a task before it is handed to another worker")
+    args = ap.parse_args()
+    if not args.worker and not (args.input_csv and args.output_csv):
+        ap.error("input_csv and output_csv are required (except with --worker)")
+    serve_metrics()
+    start_profiling()
+
+    batcher = make_batcher(
+        input_budget=args.input_tokens,
+        output_budget=args.output_tokens,
+        max_items=args.batch_size,
+    )
+    if args.coordinator or args.worker:
+        import distributed
+        from utils.work_queue import open_queue, QUEUE_URL, LEASE_SECONDS
+        work = open_queue(args.queue or QUEUE_URL)
+        if args.worker:
+            distributed.run_worker(
+                work,
+                fetch_workers=args.fetch_workers,
+                parse_workers=args.parse_workers,
+                batcher=batcher,
+                incremental=args.incremental,
+                lease_seconds=args.lease or LEASE_SECONDS,
+            )
+            _report_metrics(args.metrics)
+            return
+        stats = distributed.run_coordinator(read_urls(args.input_csv), args.output_csv, work,
+                                            resume=args.resume, fmt=args.format, order=args.order)
+        print("\n✅ Done.")
+        print(f"  • Output → {args.output_csv}")
+        print(f"  • Records collected → {stats['collected']} ({stats['failed']} URLs failed)")
+        if stats.get('states'):
+            print("  • URL states → " + ", ".join(f"{n} {s}" for s, n in sorted(stats['states'].items())))
+        _report_metrics(args.metrics)
+        return
+
+    urls = read_urls(args.input_csv)
+    stats = run_pipeline(
+        urls, args.output_csv,
+        fetch_workers=args.fetch_workers,
+        parse_workers=args.parse_workers,
+        batcher=batcher,
+        incremental=args.incremental,
+        dedup=not args.no_dedup,
+        resume=args.resume,
+        fmt=args.format,
+        order=args.order,
+    )
+
+    print("\n✅ Done.")
+    print(f"  • Output → {args.output_csv}")
     print(f"  • Raw batches → {TEMP_TXT}")
+    cache = get_cache()
+    if cache is not None:
+        cstats = cache.stats()
+        print(f"  • Parse cache → {cstats['hits']} hits / {cstats['misses']} misses")
+    if stats.get('states'):
+        print("  • URL states → " + ", ".join(f"{n} {s}" for s, n in sorted(stats['states'].items())))
+    if stats.get('near_duplicates'):
+        print(f"  • Near-duplicates → {stats['near_duplicates']} held back, "
+              f"{stats['derived']} filled from a sibling, {stats['dedup_fallbacks']} parsed after all")
+    _report_metrics(args.metrics)
 
 
 if __name__ == '__main__':
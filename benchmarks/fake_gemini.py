@@ -0,0 +1,114 @@
+"""
+A stand-in for `genai.Client` that answers gemini.parser's prompts offline.
+
+It reads the numbered jobs out of each prompt and returns one record per
+job (JSON or CSV, whichever the call asked for), with title, company, city
+and country taken from the job text so near-duplicate derivation can be
+checked. Latency, a server-side requests-per-minute limit, API errors and
+malformed items are all configurable, and every call is recorded.
+
+    from benchmarks.fake_gemini import FakeClient, install
+    fake = install(FakeClient(latency=0.8, malformed_rate=0.05))
+"""
+import re
+import csv
+import io
+import json
+import time
+import random
+import threading
+from collections import deque
+from types import SimpleNamespace
+from typing import Dict, List
+
+JOB_RE = re.compile(r'^Job (\d+):\n(.*)', re.S)
+
+
+class FakeQuotaError(Exception):
+    code = 429
+
+
+class FakeClient:
+    def __init__(self, latency: float = 0.5, per_item: float = 0.02, jitter: float = 0.2,
+                 rpm: int = 0, error_rate: float = 0.0, malformed_rate: float = 0.0, seed: int = 1):
+        self.latency        = latency           # seconds per call...
+        self.per_item       = per_item          # ...plus this per job in the batch
+        self.jitter         = jitter            # ± share of the latency
+        self.rpm            = rpm               # server-side limit; 0 = unlimited
+        self.error_rate     = error_rate        # share of calls failing with a 500
+        self.malformed_rate = malformed_rate    # share of items returned broken
+        self._rng   = random.Random(seed)
+        self._lock  = threading.Lock()
+        self._recent: deque = deque()
+        self.calls = self.quota_errors = self.errors = self.items = 0
+        self.latencies: List[float] = []
+        self.models = SimpleNamespace(generate_content=self.generate_content)
+
+    def _admit(self) -> None:
+        with self._lock:
+            self.calls += 1
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] > 60:
+                self._recent.popleft()
+            if self.rpm and len(self._recent) >= self.rpm:
+                self.quota_errors += 1
+                wait = 60 - (now - self._recent[0])
+                raise FakeQuotaError(f"429 RESOURCE_EXHAUSTED: quota exceeded, please retry in {wait:.1f}s")
+            self._recent.append(now)
+            if self._rng.random() < self.error_rate:
+                self.errors += 1
+                raise RuntimeError("500 INTERNAL: fake server error")
+
+    @staticmethod
+    def _record(job_id: str, text: str) -> Dict[str, str]:
+        def grab(pattern: str) -> str:
+            m = re.search(pattern, text, re.M)
+            return m.group(1).strip() if m else ''
+        return {
+            'id': job_id,
+            'title': grab(r'^Position:\s*(.+)$'),
+            'company': grab(r'^Company:\s*(.+)$'),
+            'city': grab(r'^Location\s*:\s*([^,\n]+)'),
+            'country': grab(r'^Location\s*:\s*[^,\n]+,\s*(.+)$'),
+            'officeType': 'Hybrid', 'experienceLevel': 'Associate/Mid-Level', 'employmentType': 'Full-Time',
+            'industries': 'Tech', 'visa': 'No', 'benefits': 'Health Insurance, Paid Leave',
+            'skills': 'Python, SQL, Communication, Compliance, Excel', 'currency': '$',
+            'salaryLow': '', 'salaryHigh': '', 'ji': 'j',
+        }
+
+    def generate_content(self, model: str, contents: str, config=None):
+        start = time.monotonic()
+        self._admit()
+        jobs = [JOB_RE.match(block.strip()) for block in contents.split('\n---\n')]
+        recs = [self._record(m.group(1), m.group(2)) for m in jobs if m]
+        with self._lock:
+            self.items += len(recs)
+            broken = {i for i in range(len(recs)) if self._rng.random() < self.malformed_rate}
+        scale = 1 + self._rng.uniform(-self.jitter, self.jitter)
+        time.sleep(max(0.0, (self.latency + self.per_item * len(recs)) * scale))
+
+        if getattr(config, 'response_mime_type', None) == 'application/json':
+            for i in broken:
+                recs[i].pop('city')                    # fails the parser's required-key check
+            text = json.dumps(recs)
+        else:
+            buf = io.StringIO()
+            w = csv.writer(buf)
+            for i, r in enumerate(recs):
+                row = [v for k, v in r.items() if k != 'id']
+                w.writerow(row[:-3] if i in broken else row)
+            text = buf.getvalue()
+
+        tokens = (len(contents) + len(text)) // 4
+        with self._lock:
+            self.latencies.append(time.monotonic() - start)
+        return SimpleNamespace(text=text, usage_metadata=SimpleNamespace(total_token_count=tokens))
+
+
+def install(fake: FakeClient) -> FakeClient:
+    """Routes every gemini.parser key slot, present or future, to `fake`."""
+    from gemini import parser
+    parser._new_client = lambda api_key: fake
+    for slot in parser.get_keys().slots:
+        slot.client = fake
+    return fake
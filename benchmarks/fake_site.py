@@ -0,0 +1,159 @@
+"""
+A generated careers site served from a local HTTP server, for benchmarks.
+
+    /careers?page=N     listing pages, `per_page` job links each, with
+                        numbered and "Next" pagination links
+    /jobs/<id>-<slug>   job pages shaped like sample_job.txt
+    /robots.txt         allows everything, lists no sitemap
+
+Job texts are sample_job.txt with a share of its words swapped per job, so
+postings are distinct to the near-duplicate detector; `dup_share` of them
+are instead copies of an earlier posting with only the city changed (the
+same role advertised in several offices). The server runs in a child
+process so it does not compete with the code under test for the GIL.
+"""
+import random
+import multiprocessing
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+TITLES = ['Data Protection Specialist', 'Backend Engineer', 'Financial Analyst', 'Product Designer',
+          'Site Reliability Engineer', 'Marketing Manager', 'Tax Consultant', 'Data Scientist',
+          'Account Executive', 'Legal Counsel', 'HR Business Partner', 'Software Engineering Intern']
+CITIES = [('Bangalore', 'India'), ('London', 'United Kingdom'), ('Berlin', 'Germany'), ('Austin', 'United States'),
+          ('Warsaw', 'Poland'), ('Manila', 'Philippines'), ('Madrid', 'Spain'), ('Toronto', 'Canada')]
+COMPANIES = ['Acme Corp', 'Globex', 'Initech', 'Umbrella Group', 'Hooli']
+VOCAB = ('delivery platform regional stakeholder governance analytics workflow compliance budget '
+         'vendor roadmap customer quality onboarding pipeline reporting strategy audit service '
+         'automation planning security design research partner growth operations').split()
+
+SWAP_SHARE = 0.2                 # share of words replaced per job (keeps jobs apart for MinHash)
+
+
+class Jobs:
+    """Deterministic job postings, generated on demand from a seed."""
+
+    def __init__(self, sample: str, n_jobs: int, dup_share: float = 0.0, seed: int = 7):
+        self.sample    = sample
+        self.n_jobs    = n_jobs
+        self.dup_share = dup_share
+        self.seed      = seed
+
+    def _base(self, job_id: int) -> int:
+        """The job whose text `job_id` copies (itself unless it is a city variant)."""
+        rng = random.Random(self.seed * 1_000_003 + job_id)
+        if job_id > 1 and rng.random() < self.dup_share:
+            return rng.randrange(1, job_id)
+        return job_id
+
+    def title(self, job_id: int) -> str:
+        return TITLES[self._base(job_id) % len(TITLES)]
+
+    def text(self, job_id: int) -> str:
+        base = self._base(job_id)
+        rng  = random.Random(self.seed * 7919 + base)
+        words = [rng.choice(VOCAB) if rng.random() < SWAP_SHARE else w for w in self.sample.split(' ')]
+        city, country = CITIES[job_id % len(CITIES)]
+        return (f"Position: {self.title(job_id)}\n"
+                f"Company: {COMPANIES[base % len(COMPANIES)]}\n"
+                f"Location : {city}, {country}\n"
+                f"Requisition ID: {100000 + job_id}\n\n"
+                + ' '.join(words))
+
+    def path(self, job_id: int) -> str:
+        return f"/jobs/{job_id}-{self.title(job_id).lower().replace(' ', '-')}"
+
+
+def _handler(jobs: Jobs, per_page: int):
+    pages = max(1, -(-jobs.n_jobs // per_page))
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send(self, status: int, body: str, ctype: str = 'text/html; charset=utf-8') -> None:
+            data = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', ctype)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            if parts.path == '/robots.txt':
+                return self._send(200, "User-agent: *\nAllow: /\n", 'text/plain')
+            if parts.path == '/careers':
+                page = int((parse_qs(parts.query).get('page') or ['1'])[0])
+                if not 1 <= page <= pages:
+                    return self._send(404, 'not found')
+                first = (page - 1) * per_page + 1
+                items = ''.join(
+                    f'<li><a href="{jobs.path(j)}">{escape(jobs.title(j))}</a></li>'
+                    for j in range(first, min(first + per_page, jobs.n_jobs + 1))
+                )
+                nav = ''.join(f'<a href="/careers?page={p}">{p}</a> ' for p in range(1, pages + 1))
+                if page < pages:
+                    nav += f'<a href="/careers?page={page + 1}">Next</a>'
+                return self._send(200, f"<html><body><nav><a href='/'>Home</a> <a href='/about'>About us</a></nav>"
+                                       f"<h1>Open positions</h1><ul>{items}</ul><div>{nav}</div></body></html>")
+            if parts.path.startswith('/jobs/'):
+                try:
+                    job_id = int(parts.path[len('/jobs/'):].split('-', 1)[0])
+                except ValueError:
+                    return self._send(404, 'not found')
+                if not 1 <= job_id <= jobs.n_jobs:
+                    return self._send(404, 'not found')
+                body = ''.join(f'<p>{escape(line)}</p>' for line in jobs.text(job_id).split('\n') if line)
+                return self._send(200, f"<html><head><title>{escape(jobs.title(job_id))}</title></head>"
+                                       f"<body><header>Careers</header><main>{body}</main>"
+                                       f"<footer>© Example</footer></body></html>")
+            return self._send(404, 'not found')
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def _serve(jobs: Jobs, per_page: int, port_q) -> None:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _handler(jobs, per_page))
+    server.daemon_threads = True
+    port_q.put(server.server_address[1])
+    server.serve_forever()
+
+
+class FakeSite:
+    """The generated site in a child process; use as a context manager."""
+
+    def __init__(self, sample: str, n_jobs: int = 200, per_page: int = 20, dup_share: float = 0.0):
+        self.jobs     = Jobs(sample, n_jobs, dup_share)
+        self.per_page = per_page
+        self.base_url = ''
+        self._proc: Optional[multiprocessing.Process] = None
+
+    def start(self) -> 'FakeSite':
+        port_q = multiprocessing.Queue()
+        self._proc = multiprocessing.Process(target=_serve, args=(self.jobs, self.per_page, port_q), daemon=True)
+        self._proc.start()
+        self.base_url = f"http://127.0.0.1:{port_q.get(timeout=10)}"
+        return self
+
+    def stop(self) -> None:
+        if self._proc is not None:
+            self._proc.terminate()
+            self._proc.join()
+
+    @property
+    def listing_url(self) -> str:
+        return f"{self.base_url}/careers"
+
+    def job_urls(self) -> List[str]:
+        return [self.base_url + self.jobs.path(j) for j in range(1, self.jobs.n_jobs + 1)]
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
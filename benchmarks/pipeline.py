@@ -0,0 +1,216 @@
+"""
+End-to-end throughput of extract_links and app.run_pipeline, fully offline.
+
+A generated careers site (benchmarks.fake_site) is served locally and
+Gemini is replaced by benchmarks.fake_gemini, so runs are free, repeatable
+and need no network or API key.
+
+Usage:
+    python -m benchmarks.pipeline [--jobs 500] [--latency 0.5] [--error-rate 0.02]
+                                  [--malformed-rate 0.05] [--server-rpm 0] [--dup-share 0.2]
+                                  [--json results.json] [--baseline old.json]
+
+Reports URLs/sec, LLM calls per job, p50/p99 latencies per stage (listing
+fetch, page fetch, parse batch, LLM call), time spent waiting on the
+client-side rate budget (--cpm sets the calls budget, GEMINI_TPM still
+applies) and peak RSS. With --baseline, exits non-zero when URLs/sec or
+calls per job regress by more than --tolerance against an earlier --json
+result.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import threading
+from typing import Callable, Dict, List
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    s = sorted(values)
+    return s[min(len(s) - 1, int(round(q / 100 * (len(s) - 1))))]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+class Timed:
+    """Wraps a function and records each call's wall time."""
+
+    def __init__(self, fn: Callable):
+        self.fn    = fn
+        self.times: List[float] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self.fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.times.append(time.perf_counter() - start)
+
+    def summary(self) -> Dict[str, float]:
+        return {'n': len(self.times),
+                'p50_ms': round(1000 * percentile(self.times, 50), 1),
+                'p99_ms': round(1000 * percentile(self.times, 99), 1)}
+
+
+def _offline_env(workdir: str, cpm: int) -> None:
+    """Settings that keep the run local, uncached and unthrottled; set before importing the app."""
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark-offline-key")
+    os.environ["GEMINI_CPM"]       = str(cpm)
+    os.environ["PARSE_CACHE"]      = "0"
+    os.environ["HTTP_CACHE"]       = "0"
+    os.environ["DYNAMIC_SCRAPE"]   = "0"
+    os.environ["JOB_STORE_PATH"]   = os.path.join(workdir, "jobs.sqlite")
+    os.environ["ROUTES_PATH"]      = os.path.join(workdir, "routes.json")
+    os.environ.setdefault("FETCH_HOST_DELAY", "0")     # the local server is the only host
+    os.environ.setdefault("FETCH_PER_HOST", "64")
+
+
+def bench_links(site, max_pages: int) -> Dict:
+    from scraper import link_extractor
+    waves = Timed(link_extractor.fetch_many)
+    link_extractor.fetch_many = waves
+    try:
+        start = time.perf_counter()
+        links = link_extractor.extract_links(site.listing_url, delay=0, max_pages=max_pages, use_sitemap=False)
+        elapsed = time.perf_counter() - start
+    finally:
+        link_extractor.fetch_many = waves.fn
+    pages = -(-site.jobs.n_jobs // site.per_page)
+    return {
+        'listing_pages': min(pages, max_pages),
+        'links_found': len(links),
+        'links_expected': min(site.jobs.n_jobs, max_pages * site.per_page),
+        'seconds': round(elapsed, 3),
+        'pages_per_sec': round(min(pages, max_pages) / elapsed, 1),
+        'stages': {'listing_wave': waves.summary()},
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+
+
+def bench_pipeline(site, fake, workdir: str, args) -> Dict:
+    import app
+    from gemini import parser
+    fetch = Timed(app.fetch_page)
+    parse = Timed(app.parse_batch)
+    app.fetch_page, app.parse_batch = fetch, parse
+    app.TEMP_TXT = os.path.join(workdir, "temp_output.txt")
+    urls   = site.job_urls()
+    output = os.path.join(workdir, "output.csv")
+    try:
+        start = time.perf_counter()
+        stats = app.run_pipeline(urls, output, fetch_workers=args.fetch_workers,
+                                 parse_workers=args.parse_workers, dedup=not args.no_dedup)
+        elapsed = time.perf_counter() - start
+    finally:
+        app.fetch_page, app.parse_batch = fetch.fn, parse.fn
+    with open(output, encoding='utf-8') as f:
+        rows = sum(1 for _ in f) - 1
+    return {
+        'urls': len(urls),
+        'records': rows,
+        'seconds': round(elapsed, 3),
+        'urls_per_sec': round(len(urls) / elapsed, 1),
+        'llm_calls': fake.calls,
+        'llm_calls_per_job': round(fake.calls / len(urls), 3),
+        'llm_quota_errors': fake.quota_errors,
+        'llm_errors': fake.errors,
+        'llm_throttle_wait_s': round(parser.get_keys().throttle_wait, 1),
+        'near_duplicates': stats.get('near_duplicates', 0),
+        'stages': {
+            'page_fetch':  fetch.summary(),
+            'parse_batch': parse.summary(),
+            'llm_call':    {'n': len(fake.latencies),
+                            'p50_ms': round(1000 * percentile(fake.latencies, 50), 1),
+                            'p99_ms': round(1000 * percentile(fake.latencies, 99), 1)},
+        },
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+
+
+def _print(name: str, res: Dict) -> None:
+    print(f"\n{name}")
+    for k, v in res.items():
+        if k != 'stages':
+            print(f"  {k:<20} {v}")
+    for stage, s in res['stages'].items():
+        print(f"  {stage:<20} n={s['n']:<6} p50={s['p50_ms']:>8} ms   p99={s['p99_ms']:>8} ms")
+
+
+def _regressions(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    checks = [('pipeline', 'urls_per_sec', True), ('links', 'pages_per_sec', True),
+              ('pipeline', 'llm_calls_per_job', False)]
+    out = []
+    for section, key, higher_is_better in checks:
+        old, new = baseline.get(section, {}).get(key), results[section][key]
+        if not old:
+            continue
+        change = (new - old) / old
+        if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+            out.append(f"{section}.{key}: {old} → {new} ({change:+.0%})")
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--jobs", type=int, default=500, help="job pages on the generated site")
+    ap.add_argument("--per-page", type=int, default=25, help="job links per listing page")
+    ap.add_argument("--dup-share", type=float, default=0.2, help="share of jobs that are city variants")
+    ap.add_argument("--max-pages", type=int, default=50, help="listing pages extract_links may crawl")
+    ap.add_argument("--latency", type=float, default=0.5, help="fake Gemini seconds per call")
+    ap.add_argument("--per-item", type=float, default=0.02, help="fake Gemini extra seconds per job in a call")
+    ap.add_argument("--server-rpm", type=int, default=0, help="fake Gemini requests/minute before 429s (0 = none)")
+    ap.add_argument("--cpm", type=int, default=6000, help="client-side Gemini calls/minute budget per key")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="share of Gemini calls failing")
+    ap.add_argument("--malformed-rate", type=float, default=0.0, help="share of returned items that are broken")
+    ap.add_argument("--fetch-workers", type=int, default=16)
+    ap.add_argument("--parse-workers", type=int, default=10)
+    ap.add_argument("--no-dedup", action="store_true")
+    ap.add_argument("--json", help="also write the results to this file")
+    ap.add_argument("--baseline", help="earlier --json results to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="allowed regression vs the baseline")
+    args = ap.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="jobscraper-bench-")
+    _offline_env(workdir, args.cpm)
+
+    from benchmarks.fake_site import FakeSite
+    from benchmarks.fake_gemini import FakeClient, install
+
+    with open(os.path.join(os.path.dirname(__file__), '..', 'sample_job.txt'), encoding='utf-8') as f:
+        sample = f.read().strip()
+    fake = install(FakeClient(latency=args.latency, per_item=args.per_item, rpm=args.server_rpm,
+                              error_rate=args.error_rate, malformed_rate=args.malformed_rate))
+
+    with FakeSite(sample, n_jobs=args.jobs, per_page=args.per_page, dup_share=args.dup_share) as site:
+        results = {'links': bench_links(site, args.max_pages),
+                   'pipeline': bench_pipeline(site, fake, workdir, args)}
+
+    _print("extract_links", results['links'])
+    _print("run_pipeline", results['pipeline'])
+    print(f"\n  scratch files in {workdir}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            problems = _regressions(results, json.load(f), args.tolerance)
+        for p in problems:
+            print(f"❌ Regression: {p}")
+        if problems:
+            sys.exit(1)
+        print("✅ No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
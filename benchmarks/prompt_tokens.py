@@ -0,0 +1,57 @@
+"""
+Prompt size per Gemini batch: instructions repeated for every job (the old
+format) versus stated once per batch (the current format).
+
+Usage:
+    python -m benchmarks.prompt_tokens [--sizes 1 5 10 20] [--live]
+
+Token counts are estimated with gemini.batching.estimate_tokens; --live asks
+the API's count_tokens endpoint instead (needs GOOGLE_API_KEY, costs nothing).
+"""
+import argparse
+
+from gemini import parser
+from gemini.batching import estimate_tokens
+
+
+def legacy_prompt(texts):
+    """The pre-dedup layout: full instructions in front of every job."""
+    return "\n---\n".join(
+        parser.INSTRUCTIONS + parser.JOB_TEMPLATE.format(id=i, description=t)
+        for i, t in enumerate(texts, start=1)
+    )
+
+
+def batched_prompt(texts):
+    """The current layout: instructions once, then the numbered jobs."""
+    ids = list(range(1, len(texts) + 1))
+    return parser.INSTRUCTIONS + parser.build_prompt(ids, texts, [{} for _ in texts])
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sample", default="sample_job.txt", help="job description used for every slot")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1, 5, 10, 20])
+    ap.add_argument("--live", action="store_true", help="count tokens with the Gemini API")
+    args = ap.parse_args()
+
+    with open(args.sample, encoding="utf-8") as f:
+        text = f.read().strip()
+
+    if args.live:
+        def count(prompt):
+            return parser.get_client().models.count_tokens(model=parser.MODEL, contents=prompt).total_tokens
+    else:
+        count = estimate_tokens
+
+    print(f"Output mode: {parser.OUTPUT_MODE}   instructions ≈ {count(parser.INSTRUCTIONS)} tokens")
+    print(f"{'jobs':>5} {'legacy':>10} {'batched':>10} {'saved':>10} {'saved %':>8}")
+    for n in args.sizes:
+        texts  = [text] * n
+        old    = count(legacy_prompt(texts))
+        new    = count(batched_prompt(texts))
+        print(f"{n:>5} {old:>10} {new:>10} {old - new:>10} {100 * (old - new) / old:>7.1f}%")
+
+
+if __name__ == "__main__":
+    main()
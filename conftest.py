@@ -0,0 +1,2 @@
+# test_parse.py scripts call the live Gemini API at import time; run them by hand.
+collect_ignore = ["test_parse.py", "gemini/test_parse.py"]
@@ -14,3 +14,9 @@ try:
     print("✅ Imported parse_batch from gemini.parser")
 except Exception as e:
     print("❌ Importing parse_batch failed:", e)
+
+try:
+    from scraper.schema_extractor import extract_jobposting_schema
+    print("✅ Imported extract_jobposting_schema from scraper.schema_extractor")
+except Exception as e:
+    print("❌ Importing extract_jobposting_schema failed:", e)
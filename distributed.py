@@ -0,0 +1,251 @@
+import os
+import time
+import queue
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app import _DONE, _scrape_item, _writer, FETCH_WORKERS, MAX_WORKERS
+from gemini.parser import parse_batch, make_batcher, share_budget, llm_seconds
+from utils.job_store import get_job_store, PARSED
+from utils.work_queue import URL, PARSE, LEASE_SECONDS, WorkQueue
+
+POLL_SECONDS = 1.0                   # idle wait between queue polls
+COLLECT_SIZE = 200                   # results the coordinator takes per poll
+
+
+def run_coordinator(urls, output_csv, work: WorkQueue, resume=False, fmt=None, order='completion'):
+    """
+    Coordinator side of a distributed crawl: queues one task per URL,
+    collects the records workers finish and is the only writer of
+    `output_csv` (through the job store, so resumes and re-runs never
+    duplicate rows). Returns when every task is done or failed for good.
+
+    Tasks are keyed by URL, so re-running the coordinator on the same queue
+    only adds URLs it has not seen; use a fresh queue for a fresh crawl.
+    `fmt` and `order` choose the output format and row order as in
+    app.run_pipeline.
+    """
+    store  = get_job_store()
+    ready  = []
+    wanted = urls
+    if store is not None:
+        if resume:
+            store.reconcile(output_csv, fmt)
+        urls, ready = store.begin(output_csv, urls, resume=resume)
+        left   = set(urls) | {r['url'] for r in ready}
+        wanted = [u for u in wanted if u in left]
+    added = work.put(URL, [(url, {'url': url, 'j/i': idx, 'total': len(urls)})
+                           for idx, url in enumerate(urls, start=1)])
+    work.close_input()
+    print(f"📬 Queued {added} URLs for workers")
+    if added < len(urls):
+        print(f"  • {len(urls) - added} were already queued by an earlier run")
+
+    write_q = queue.Queue(maxsize=100)
+    writer  = threading.Thread(target=_writer,
+                               args=(write_q, output_csv, store, fmt, wanted if order == 'input' else None),
+                               name="writer", daemon=True)
+    writer.start()
+    for i in range(0, len(ready), 50):
+        write_q.put(ready[i:i + 50])
+
+    written = failed = 0
+    last_report = time.monotonic()
+    while True:
+        records, dead, empty = work.collect(COLLECT_SIZE)
+        if records:
+            if store is not None:
+                # collected tasks are gone from the queue; the store is now their only copy
+                store.records(output_csv, records, PARSED)
+            write_q.put(records)
+            written += len(records)
+        for payload, error in dead:
+            failed += 1
+            print(f"  ⚠️ Giving up on {payload.get('url')}: {error}")
+            if store is not None and payload.get('url'):
+                store.failed(output_csv, payload['url'], error)
+        if dead:
+            write_q.put(('skip', [p.get('url') for p, _ in dead]))
+        if empty:
+            # finished without a record (skipped, unchanged): don't hold up --order input
+            write_q.put(('skip', [p.get('url') for p in empty]))
+        if records or dead or empty:
+            continue
+        if work.drained():
+            break
+        if time.monotonic() - last_report > 30:
+            c = work.counts()
+            print(f"  … {written} records collected, open tasks: "
+                  + ", ".join(f"{n} {k}" for k, n in sorted(c.items()) if n))
+            last_report = time.monotonic()
+        time.sleep(POLL_SECONDS)
+
+    write_q.put(_DONE)
+    writer.join()
+    stats = {'collected': written, 'failed': failed}
+    if store is not None:
+        stats['states'] = store.summary(output_csv)
+    return stats
+
+
+class _Leases:
+    """The tasks this worker holds; a heartbeat thread keeps their leases alive."""
+
+    def __init__(self, work: WorkQueue, seconds: float):
+        self.work, self.seconds = work, seconds
+        self._held = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        threading.Thread(target=self._beat, name="lease-heartbeat", daemon=True).start()
+
+    def hold(self, tasks):
+        with self._lock:
+            self._held.update((t.id, t) for t in tasks)
+
+    def release(self, tasks):
+        with self._lock:
+            for t in tasks:
+                self._held.pop(t.id, None)
+
+    def _beat(self):
+        while not self._stop.wait(self.seconds / 3):
+            with self._lock:
+                tasks = list(self._held.values())
+            if tasks:
+                try:
+                    self.work.extend(tasks, self.seconds)
+                except Exception as e:
+                    print(f"  ⚠️ Warning: could not extend leases: {e}")
+
+    def stop(self):
+        self._stop.set()
+
+
+def _url_worker(work, leases, worker_id, incremental, lease_seconds):
+    """Leases URL tasks one at a time; queues a parse task or completes with a record."""
+    while True:
+        tasks = work.lease(URL, 1, worker_id, lease_seconds)
+        if not tasks:
+            if work.input_closed() and not work.open_tasks(URL):
+                return
+            time.sleep(POLL_SECONDS)
+            continue
+        task = tasks[0]
+        leases.hold(tasks)
+        try:
+            action, value = _scrape_item(task.payload['j/i'], task.payload['url'],
+                                         task.payload.get('total', '?'), incremental)
+            if action == 'parse':
+                # queue first: if we die before completing, the retry's put is a no-op
+                work.put(PARSE, [(task.payload['url'], value)])
+                work.complete(task)
+            else:
+                work.complete(task, [value] if value else [])     # [] = no record
+        except Exception as e:
+            print(f"  ⚠️ Warning: {task.payload['url']} failed: {e}")
+            work.fail(task, f"fetch: {e}")
+        finally:
+            leases.release(tasks)
+
+
+def run_worker(work: WorkQueue,
+               fetch_workers=FETCH_WORKERS,
+               parse_workers=MAX_WORKERS,
+               batcher=None,
+               incremental=False,
+               lease_seconds=LEASE_SECONDS):
+    """
+    Worker side of a distributed crawl; start as many as you like, on any
+    machine that can reach the queue.
+
+    • `fetch_workers` threads lease URL tasks and scrape them.
+    • Parse tasks are leased in batches sized by `batcher` and sent to a
+      Gemini pool of `parse_workers`; every call is also debited from the
+      queue's shared budget, so all workers together respect one quota.
+    • Held leases are extended while work is in progress. A worker that
+      dies stops extending them; its tasks are then handed to another
+      worker (up to WORK_MAX_ATTEMPTS times).
+    Returns once the coordinator has queued everything and no URL or parse
+    task is left. Returns counts of the tasks this worker finished.
+    """
+    batcher   = batcher or make_batcher()
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    share_budget(work)
+    leases = _Leases(work, lease_seconds)
+    print(f"🛠️ Worker {worker_id} started")
+
+    fetchers = [
+        threading.Thread(target=_url_worker, args=(work, leases, worker_id, incremental, lease_seconds),
+                         name=f"fetch-{i}", daemon=True)
+        for i in range(fetch_workers)
+    ]
+    for t in fetchers:
+        t.start()
+
+    executor = ThreadPoolExecutor(max_workers=parse_workers)
+    slots    = threading.BoundedSemaphore(parse_workers * 2)
+    stats    = {'parsed': 0, 'parse_failed': 0}
+    lock     = threading.Lock()
+
+    def run(tasks):
+        items = [t.payload for t in tasks]
+        try:
+            parsed = parse_batch(
+                [b['text'] for b in items],
+                [b['url']  for b in items],
+                [b['j/i']  for b in items],
+                [b['known'] for b in items],
+            )
+            batcher.observe(len(items), len(parsed), llm_seconds())
+            by_url = {r.get('url'): r for r in parsed}
+            for t in tasks:
+                rec = by_url.get(t.payload['url'])
+                if rec is not None:
+                    work.complete(t, [rec])
+                else:
+                    work.fail(t, "parse: no record returned")
+                with lock:
+                    stats['parsed' if rec is not None else 'parse_failed'] += 1
+        except Exception as e:
+            print(f"  ⚠️ Warning: batch failed: {e}")
+            for t in tasks:
+                work.fail(t, f"parse: {e}")
+            with lock:
+                stats['parse_failed'] += len(tasks)
+        finally:
+            leases.release(tasks)
+            slots.release()
+
+    def submit(tasks, have_slot=False):
+        if not have_slot:
+            slots.acquire()
+        executor.submit(run, tasks)
+
+    while True:
+        # lease only when a call can start, so idle tasks stay with other workers
+        slots.acquire()
+        tasks = work.lease(PARSE, batcher.max_items, worker_id, lease_seconds)
+        if not tasks:
+            slots.release()
+            if not any(t.is_alive() for t in fetchers) and not work.open_tasks(PARSE):
+                break
+            time.sleep(POLL_SECONDS)
+            continue
+        leases.hold(tasks)
+        by_item = {id(t.payload): t for t in tasks}
+        batches = []
+        for t in tasks:
+            ready = batcher.add(t.payload)
+            if ready:
+                batches.append(ready)
+        rest = batcher.flush()                  # leased tasks don't wait for a fuller batch
+        if rest:
+            batches.append(rest)
+        for n, batch in enumerate(batches):
+            submit([by_item[id(p)] for p in batch], have_slot=n == 0)
+
+    executor.shutdown(wait=True)
+    leases.stop()
+    print(f"✅ Worker {worker_id} finished: {stats['parsed']} parsed, {stats['parse_failed']} failed")
+    return stats
@@ -0,0 +1,96 @@
+import os
+import threading
+from typing import Dict, List, Optional
+
+CHARS_PER_TOKEN      = 4            # rough average for English prose
+INPUT_TOKEN_BUDGET   = int(os.getenv("GEMINI_INPUT_TOKENS", "60000"))
+OUTPUT_TOKEN_BUDGET  = int(os.getenv("GEMINI_OUTPUT_TOKENS", "6000"))
+OUTPUT_TOKENS_PER_JOB = 150         # one 15-field CSV line, generously
+MAX_ITEMS            = int(os.getenv("GEMINI_MAX_BATCH", "40"))
+
+MALFORMED_LIMIT = 0.10              # shrink when more than 10% of rows come back bad
+TARGET_LATENCY  = float(os.getenv("GEMINI_TARGET_LATENCY", "45"))
+MIN_SCALE       = 0.1
+SHRINK          = 0.7
+SLOW_SHRINK     = 0.85
+GROW            = 0.05
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate; good enough for packing, no tokenizer needed."""
+    return len(text or '') // CHARS_PER_TOKEN + 1
+
+
+class AdaptiveBatcher:
+    """
+    Packs job descriptions into Gemini calls by estimated token count.
+
+    A batch is closed when adding the next description would push it past the
+    input budget, past the output budget (`OUTPUT_TOKENS_PER_JOB` per job), or
+    past `max_items`. Both budgets are multiplied by a `scale` that adapts
+    to what the API actually does:
+
+    • malformed/missing rows above `MALFORMED_LIMIT` → scale × `SHRINK`
+    • calls slower than `target_latency` → scale × `SLOW_SHRINK`
+    • otherwise → scale + `GROW`, up to 1.0
+
+    `add` is called from one producer thread; `observe` may be called from
+    any number of parser threads.
+    """
+
+    def __init__(self,
+                 input_budget: int = INPUT_TOKEN_BUDGET,
+                 output_budget: int = OUTPUT_TOKEN_BUDGET,
+                 max_items: int = MAX_ITEMS,
+                 base_tokens: int = 0,
+                 item_overhead: int = 0,
+                 target_latency: float = TARGET_LATENCY):
+        self.input_budget   = input_budget
+        self.output_budget  = output_budget
+        self.max_items      = max_items
+        self.base_tokens    = base_tokens       # prompt tokens paid once per call
+        self.item_overhead  = item_overhead     # prompt tokens paid per job
+        self.target_latency = target_latency
+        self.scale          = 1.0
+        self._batch: List[Dict] = []
+        self._tokens        = base_tokens
+        self._lock          = threading.Lock()
+
+    def _limits(self):
+        with self._lock:
+            scale = self.scale
+        max_in    = max(1, int(self.input_budget * scale))
+        max_items = min(self.max_items, int(self.output_budget * scale) // OUTPUT_TOKENS_PER_JOB)
+        return max_in, max(1, max_items)
+
+    def add(self, item: Dict) -> Optional[List[Dict]]:
+        """
+        Queue `item` (a dict with a 'text' key). Returns the finished batch when
+        `item` does not fit in it — `item` then starts the next one.
+        """
+        cost = estimate_tokens(item.get('text', '')) + self.item_overhead
+        max_in, max_items = self._limits()
+        done = None
+        if self._batch and (self._tokens + cost > max_in or len(self._batch) >= max_items):
+            done = self.flush()
+        self._batch.append(item)
+        self._tokens += cost
+        return done
+
+    def flush(self) -> List[Dict]:
+        """Return the current (possibly empty) batch and start a new one."""
+        batch, self._batch, self._tokens = self._batch, [], self.base_tokens
+        return batch
+
+    def observe(self, sent: int, valid: int, latency: float) -> None:
+        """Feed back the outcome of one call of `sent` jobs."""
+        if sent <= 0:
+            return
+        malformed = 1 - valid / sent
+        with self._lock:
+            if malformed > MALFORMED_LIMIT:
+                self.scale = max(MIN_SCALE, self.scale * SHRINK)
+            elif latency > self.target_latency:
+                self.scale = max(MIN_SCALE, self.scale * SLOW_SHRINK)
+            else:
+                self.scale = min(1.0, self.scale + GROW)
@@ -0,0 +1,107 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH   = os.getenv("PARSE_CACHE_PATH", "data/parse_cache.sqlite")
+CACHE_MAX_MB = float(os.getenv("PARSE_CACHE_MAX_MB", "200"))
+EVICT_TO     = 0.9            # after eviction the cache is at most 90% of its cap
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so re-crawls with different spacing hit the same key."""
+    return re.sub(r'\s+', ' ', text or '').strip()
+
+
+def cache_key(text: str, version: str, extra: Iterable[str] = ()) -> str:
+    """
+    Content address of one parse: the normalized description, the
+    prompt/model `version`, and any `extra` inputs that change the prompt.
+    """
+    h = hashlib.sha256()
+    h.update(version.encode('utf-8'))
+    for part in extra:
+        h.update(b'\0' + part.encode('utf-8'))
+    h.update(b'\0' + normalize_text(text).encode('utf-8'))
+    return h.hexdigest()
+
+
+class ParseCache:
+    """
+    On-disk cache of parsed records, keyed by `cache_key`.
+
+    Backed by a single SQLite file. Every hit refreshes the entry's access
+    time; when the stored payload exceeds `max_mb`, the least recently used
+    entries are deleted. Thread-safe.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_mb: float = CACHE_MAX_MB):
+        self.path      = path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits      = 0
+        self.misses    = 0
+        self._lock     = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS parses (
+                key      TEXT PRIMARY KEY,
+                record   TEXT NOT NULL,
+                size     INTEGER NOT NULL,
+                accessed REAL NOT NULL
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS parses_accessed ON parses(accessed)")
+        self._db.commit()
+        self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM parses").fetchone()[0]
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._db.execute("SELECT record FROM parses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._db.execute("UPDATE parses SET accessed = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+        return json.loads(row[0])
+
+    def put(self, key: str, record: Dict) -> None:
+        payload = json.dumps(record, ensure_ascii=False)
+        size    = len(payload.encode('utf-8'))
+        with self._lock:
+            old = self._db.execute("SELECT size FROM parses WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO parses (key, record, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, payload, size, time.time()),
+            )
+            self._size += size - (old[0] if old else 0)
+            if self._size > self.max_bytes:
+                self._evict()
+            self._db.commit()
+
+    def _evict(self) -> None:
+        target  = int(self.max_bytes * EVICT_TO)
+        evicted = 0
+        for key, size in self._db.execute(
+                "SELECT key, size FROM parses ORDER BY accessed").fetchall():
+            if self._size <= target:
+                break
+            self._db.execute("DELETE FROM parses WHERE key = ?", (key,))
+            self._size -= size
+            evicted    += 1
+        logger.info(f"Parse cache: evicted {evicted} LRU entries")
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'bytes': self._size}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
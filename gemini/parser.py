@@ -3,11 +3,18 @@ import time
 import logging
 import io
 import csv
+import hashlib
 import threading
-from typing import List, Dict
-from google import genai
+import json
+from typing import List, Dict, Optional
 from dotenv import load_dotenv
 from pathlib import Path
+from gemini.cache import ParseCache, cache_key
+from gemini.batching import AdaptiveBatcher, estimate_tokens
+from gemini.rate_limiter import (
+    KeyPool, KeySlot, TokenBucket, backoff, is_quota_error, retry_after,
+)
+from utils.metrics import metrics, profiled
 
 env_path = Path(__file__).parent.parent / ".env"
 load_dotenv(dotenv_path=env_path)
@@ -15,19 +22,27 @@ load_dotenv(dotenv_path=env_path)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-API_KEY = os.getenv("GOOGLE_API_KEY")
-if not API_KEY:
-    raise RuntimeError("Missing GOOGLE_API_KEY")
-client = genai.Client(api_key=API_KEY)
+API_KEY  = os.getenv("GOOGLE_API_KEY")
+# Several keys/projects may be given as GOOGLE_API_KEYS=key1,key2,… ;
+# each gets its own rate budget and calls go to whichever can send soonest.
+API_KEYS = [k.strip() for k in os.getenv("GOOGLE_API_KEYS", "").split(",") if k.strip()]
+if not API_KEYS and API_KEY:
+    API_KEYS = [API_KEY]
 
 MODEL        = "gemini-2.5-flash"
-MAX_RETRIES  = 1          
-RETRY_DELAY  = 2          
+MAX_RETRIES  = 3
+RETRY_DELAY  = 2          # base of the jittered exponential backoff
 
-CPM           = int(os.getenv("GEMINI_CPM", "30"))
-MIN_INTERVAL  = 60.0 / CPM
-_last_call    = 0.0
-_rate_lock    = threading.Lock()
+CPM           = int(os.getenv("GEMINI_CPM", "30"))          # per key
+TPM           = int(os.getenv("GEMINI_TPM", "1000000"))     # per key
+
+_keys: Optional[KeyPool] = None
+_keys_lock = threading.Lock()
+
+OUTPUT_MODE   = os.getenv("GEMINI_OUTPUT", "json")     # "json" (structured) or "csv"
+
+# Slowest generate_content call of the current thread's last parse_batch.
+_llm_time = threading.local()
 
 FIELDS = [
     'title','company','city','country',
@@ -38,7 +53,8 @@ FIELDS = [
 
 PROMPT_TEMPLATE = """
 IMPORTANT:
-- Provide exactly one line of valid CSV per job. Do not output any additional lines or separators.
+- Below are several job descriptions, numbered "Job 1", "Job 2", … and separated by ---.
+- Provide exactly one line of valid CSV per job, in the same order as the jobs. Do not output any additional lines or separators.
 - Include all 15 fields in this exact order on a single line:
   1. title (this is the title of the job and this is a required, if the title contains a comma then you have to enclose the whole title in " " for example "Manager, Direct Tax (Indian Tax))
   2. company (this is the company which posted the job listing, this is required)
@@ -60,53 +76,268 @@ IMPORTANT:
 
 Example of a single valid CSV line:
 AI Intern,Cognizant,Kolkata,India,Hybrid,Intern,Full-Time,"Tech,Consulting",,"Health Insurance,Paid Leave","Python,Rust,Neural Networks",₹,,,i
+"""
 
+JSON_PROMPT_TEMPLATE = """
+Below are several job descriptions, each introduced by "Job <number>" and separated by ---.
+Extract every job into one JSON object with exactly these keys (all values are strings):
+  id: the job's number, copied unchanged
+  title: the job title (required)
+  company: the company which posted the job listing (required)
+  city: the city in which the job is located (required)
+  country: the country of that city; if not given, deduce it from the city (e.g. Bangalore → India)
+  officeType: one of Remote, Hybrid, In-Office, Remote-Anywhere; default Hybrid
+  experienceLevel: one of Intern, Entry-Level, Associate/Mid-Level, Senior-Level, Managerial, Executive; if not stated, deduce it from the years of experience asked for (0-2 years → Entry-Level)
+  employmentType: one of Full-Time, Part-Time, Contract, Freelance, Temporary; default Full-Time
+  industries: 1 to 3 comma-separated industries, deduced from the description if not stated (e.g. "Tech, Finance")
+  visa: Yes or No; default No
+  benefits: 3-4 comma-separated benefits of 1-2 words each (e.g. "Health Insurance, Paid Leave"), or "" if none are mentioned
+  skills: 5-6 comma-separated skills (e.g. "Python, Rust, Docker"); required
+  currency: currency symbol only (e.g. $, ₹, €), deduced from the job's country if not stated
+  salaryLow: lower salary bound as a number, or "" if not mentioned
+  salaryHigh: upper salary bound as a number, or "" if not mentioned
+  ji: "i" for internships, "j" for all other roles
+Return a JSON array with one such object per job.
+"""
 
-Job Description:
+# One numbered job inside a batch; the instructions above are sent once per call.
+JOB_TEMPLATE = """Job {id}:
 {description}
 """
+
+JSON_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "id": {"type": "INTEGER"},
+            **{f: {"type": "STRING"} for f in FIELDS},
+            "ji": {"type": "STRING"},
+        },
+        "required": ["id", *FIELDS, "ji"],
+    },
+}
+
+INSTRUCTIONS = JSON_PROMPT_TEMPLATE if OUTPUT_MODE == "json" else PROMPT_TEMPLATE
+
+# Changes whenever the prompt or model does, which invalidates cached parses.
+PROMPT_VERSION = hashlib.sha256((MODEL + INSTRUCTIONS + JOB_TEMPLATE).encode("utf-8")).hexdigest()[:16]
+
+def build_prompt(ids: List[int], texts: List[str], known: List[Dict]) -> str:
+    """Numbered job blocks for one call; the instructions travel separately."""
+    return "\n---\n".join(
+        JOB_TEMPLATE.format(id=i, description=_describe(t, k))
+        for i, t, k in zip(ids, texts, known)
+    )
+
+def _new_client(api_key: str):
+    from google import genai        # ~0.2 s to import; only once Gemini is actually called
+    return genai.Client(api_key=api_key)
+
+def get_keys() -> KeyPool:
+    """
+    The KeyPool over API_KEYS, built on first use so that importing this
+    module needs neither google-genai nor an API key (link discovery,
+    validation and --help work without them).
+    """
+    global _keys
+    if _keys is None:
+        with _keys_lock:
+            if _keys is None:
+                if not API_KEYS:
+                    raise RuntimeError("Missing GOOGLE_API_KEY")
+                _keys = KeyPool([
+                    KeySlot(f"key{n}", _new_client(k), TokenBucket(CPM, TPM, name=f"key{n}"),
+                            budget_id="gemini:" + hashlib.blake2b(k.encode(), digest_size=6).hexdigest())
+                    for n, k in enumerate(API_KEYS, start=1)
+                ])
+    return _keys
+
+def get_client():
+    """The first key's client, for one-off calls such as count_tokens."""
+    return get_keys().slots[0].client
+
+def share_budget(budget) -> None:
+    """Debit every call from a budget shared with other worker processes."""
+    get_keys().shared = budget
+
+def make_batcher(**kwargs) -> AdaptiveBatcher:
+    """AdaptiveBatcher sized for this module's prompt format."""
+    kwargs.setdefault("base_tokens", estimate_tokens(INSTRUCTIONS))
+    kwargs.setdefault("item_overhead", estimate_tokens(JOB_TEMPLATE))
+    return AdaptiveBatcher(**kwargs)
+
+USE_CACHE   = os.getenv("PARSE_CACHE", "1") != "0"
+_cache      = None
+_cache_lock = threading.Lock()
+
+def get_cache() -> Optional[ParseCache]:
+    """Shared parse cache, opened on first use (None when PARSE_CACHE=0)."""
+    global _cache
+    if not USE_CACHE:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ParseCache()
+        return _cache
+
 def _stub_parse_batch() -> List[Dict]:
     """Return empty list instead of dummy placeholders."""
     return []
 
-def parse_batch(texts: List[str], urls: List[str], jis: List[int]) -> List[Dict]:
+KNOWN_TEMPLATE = """
+Already known for this job (leave these fields empty, they are filled in separately): {fields}
+"""
+
+def _describe(text: str, known: Optional[Dict]) -> str:
+    """Job description plus a note listing the fields we already have."""
+    filled = [f for f in FIELDS if known and known.get(f)]
+    if not filled:
+        return text
+    return text + KNOWN_TEMPLATE.format(fields=", ".join(filled))
+
+def _known_fields(kn: Dict) -> List[str]:
+    return [f for f in FIELDS if kn.get(f)]
+
+def llm_seconds() -> float:
     """
-    • Sends a batch to Gemini.
-    • Parses each CSV line individually.
-    • Keeps well-formed rows; skips malformed ones.
-    • Retries once on API error or if zero rows were valid.
+    Latency of the slowest Gemini call made by this thread's last
+    parse_batch: generate_content only, without rate-limit waits or retry
+    backoff. 0.0 when no call succeeded (all cache hits or all errors).
+    This is the signal AdaptiveBatcher.observe wants.
+    """
+    return getattr(_llm_time, "seconds", 0.0)
+
+@profiled('parse_batch')
+def parse_batch(texts: List[str], urls: List[str], jis: List[int],
+                known: Optional[List[Dict]] = None) -> List[Dict]:
+    """
+    • Looks every description up in the parse cache first.
+    • Sends only the misses to Gemini (see `_parse_uncached`).
+    • Stores freshly parsed records back into the cache.
     """
     if not (len(texts) == len(urls) == len(jis)):
         raise ValueError("texts, urls and jis must be same length")
+    known = known or [{} for _ in texts]
+    if len(known) != len(texts):
+        raise ValueError("known must be same length as texts")
 
-    global _last_call       
+    _llm_time.seconds = 0.0
+    with metrics.timer('parse_batch_seconds'):
+        return _parse_cached(texts, urls, jis, known)
 
-    combined_prompt = "\n---\n".join(
-        PROMPT_TEMPLATE.format(description=d) for d in texts
-    )
+def _parse_cached(texts: List[str], urls: List[str], jis: List[int], known: List[Dict]) -> List[Dict]:
+    cache = get_cache()
+    if cache is None:
+        return _parse_uncached(texts, urls, jis, known)
+
+    records: List[Dict] = []
+    miss_idx: List[int] = []
+    keys = [cache_key(t, PROMPT_VERSION, _known_fields(k)) for t, k in zip(texts, known)]
+    for i, key in enumerate(keys):
+        hit = cache.get(key)
+        if hit is None:
+            miss_idx.append(i)
+            continue
+        hit.update({f: known[i][f] for f in _known_fields(known[i])})
+        hit['url'] = urls[i]
+        records.append(hit)
+    metrics.inc('parse_cache_total', len(records), result='hit')
+    metrics.inc('parse_cache_total', len(miss_idx), result='miss')
+
+    if miss_idx:
+        parsed = _parse_uncached(
+            [texts[i] for i in miss_idx],
+            [urls[i]  for i in miss_idx],
+            [jis[i]   for i in miss_idx],
+            [known[i] for i in miss_idx],
+        )
+        key_by_url = {urls[i]: keys[i] for i in miss_idx}
+        for rec in parsed:
+            key = key_by_url.get(rec['url'])
+            if key:
+                cache.put(key, {k: v for k, v in rec.items() if k != 'url'})
+        records.extend(parsed)
+    return records
+
+def _generate(prompt: str, json_mode: bool = False) -> str:
+    """
+    One Gemini call: INSTRUCTIONS as the system instruction, then `prompt`.
+
+    Capacity is reserved on the least-loaded API key first; quota errors halve
+    that key's rate (honouring any retry delay the server sends) and are
+    re-raised for the caller's backoff.
+    """
+    from google.genai import types
+    config = types.GenerateContentConfig()
+    if json_mode:
+        config.response_mime_type = "application/json"
+        config.response_schema    = JSON_SCHEMA
+
+    est  = estimate_tokens(INSTRUCTIONS) + estimate_tokens(prompt)
+    slot = get_keys().acquire(est)
+    config.system_instruction = INSTRUCTIONS
+    mode = "json" if json_mode else "csv"
+    start = time.perf_counter()
+    try:
+        with metrics.timer('llm_call_seconds', mode=mode):
+            resp = slot.client.models.generate_content(
+                model=MODEL,
+                contents=prompt,
+                config=config,
+            )
+    except Exception as e:
+        quota = is_quota_error(e)
+        metrics.inc('llm_errors_total', kind='quota' if quota else 'error')
+        if quota:
+            slot.bucket.penalize(retry_after(e))
+        raise
+    _llm_time.seconds = max(getattr(_llm_time, "seconds", 0.0), time.perf_counter() - start)
+    slot.bucket.reward()
+
+    usage = getattr(resp, "usage_metadata", None)
+    used  = getattr(usage, "total_token_count", None)
+    if used:
+        slot.bucket.adjust(used - est)
+    text = (resp.text or "").strip()
+    metrics.inc('llm_calls_total', mode=mode)
+    metrics.inc('llm_tokens_total', getattr(usage, "prompt_token_count", None) or est, direction='in')
+    metrics.inc('llm_tokens_total', getattr(usage, "candidates_token_count", None) or estimate_tokens(text),
+                direction='out')
+    return text
+
+def _parse_uncached(texts: List[str], urls: List[str], jis: List[int],
+                    known: Optional[List[Dict]] = None) -> List[Dict]:
+    """Parses a batch with whichever OUTPUT_MODE is configured."""
+    known = known or [{} for _ in texts]
+    if OUTPUT_MODE == "json":
+        return _parse_json(texts, urls, jis, known)
+    return _parse_csv(texts, urls, jis, known)
+
+def _parse_csv(texts: List[str], urls: List[str], jis: List[int],
+               known: List[Dict]) -> List[Dict]:
+    """
+    • Sends a batch to Gemini.
+    • Parses each CSV line individually.
+    • Keeps well-formed rows; skips malformed ones.
+    • Retries (jittered exponential backoff, up to MAX_RETRIES times) on API
+      error or if zero rows were valid.
+    • `known` (one dict per text) holds fields already extracted elsewhere,
+      e.g. schema.org data; Gemini is told to skip them and the known values
+      overwrite its output.
+    """
+    combined_prompt = build_prompt(list(range(1, len(texts) + 1)), texts, known)
     expected_fields = len(FIELDS) + 1  
 
     for attempt in range(MAX_RETRIES + 1):
-        with _rate_lock:
-            now   = time.time()
-            delta = now - _last_call
-            if delta < MIN_INTERVAL:
-                wait = MIN_INTERVAL - delta
-                logger.info(f"Throttling Gemini for {wait:.2f}s to respect {CPM} CPM")
-                time.sleep(wait)
-            _last_call = time.time()
-
         try:
             logger.info(f"Gemini call attempt {attempt+1}")
-            resp    = client.models.generate_content(
-                model=MODEL,
-                contents=combined_prompt
-            )
-            content = resp.text.strip()
+            content = _generate(combined_prompt)
         except Exception as e:
             logger.warning(f"Gemini API error: {e}")
             if attempt < MAX_RETRIES:
-                time.sleep(RETRY_DELAY)
+                metrics.inc('llm_retries_total', reason='api_error')
+                time.sleep(backoff(attempt, RETRY_DELAY))
                 continue
             return _stub_parse_batch()
 
@@ -116,23 +347,90 @@ def parse_batch(texts: List[str], urls: List[str], jis: List[int]) -> List[Dict]
         if len(lines) == 0:
             logger.warning("Gemini returned 0 lines")
 
-        for idx, (line, url, ji) in enumerate(zip(lines, urls, jis)):
+        for idx, (line, url, ji, kn) in enumerate(zip(lines, urls, jis, known)):
             try:
                 parts = next(csv.reader(io.StringIO(line)))
                 if len(parts) != expected_fields:
                     raise ValueError(f"{len(parts)} fields (need {expected_fields})")
                 rec = {field: parts[i] for i, field in enumerate(FIELDS)}
+                rec.update({f: kn[f] for f in FIELDS if kn.get(f)})
                 rec['url'] = url
-                rec['j/i'] = parts[-1]
+                rec['j/i'] = parts[-1] or kn.get('j/i', '')
                 valid_records.append(rec)
             except Exception as e:
                 logger.warning(f"Line {idx+1} malformed → skipped ({e})")
+                metrics.inc('llm_malformed_total', mode='csv')
 
         if valid_records:          
             return valid_records
 
         logger.warning("All rows malformed; retrying…")
         if attempt < MAX_RETRIES:
-            time.sleep(RETRY_DELAY)
+            metrics.inc('llm_retries_total', reason='malformed')
+            time.sleep(backoff(attempt, RETRY_DELAY))
 
     return _stub_parse_batch()
+
+def _json_items(content: str) -> List[Dict]:
+    data = json.loads(content)
+    if isinstance(data, dict):
+        data = data.get("jobs", [data])
+    return [d for d in data if isinstance(d, dict)]
+
+def _parse_json(texts: List[str], urls: List[str], jis: List[int],
+                known: List[Dict]) -> List[Dict]:
+    """
+    • Sends a batch to Gemini with a JSON response schema; every job carries
+      an id that Gemini echoes back, so records are matched by id, never by
+      position.
+    • Items that come back missing, duplicated or invalid are re-sent on their
+      own in the next attempt; items that parsed are kept.
+    • Returns records in input order; items still missing after
+      MAX_RETRIES extra attempts are dropped.
+    """
+    results: Dict[int, Dict] = {}
+    pending = list(range(len(texts)))
+
+    for attempt in range(MAX_RETRIES + 1):
+        prompt = build_prompt(
+            [i + 1 for i in pending],
+            [texts[i] for i in pending],
+            [known[i] for i in pending],
+        )
+        try:
+            logger.info(f"Gemini JSON call attempt {attempt+1} ({len(pending)} jobs)")
+            items = _json_items(_generate(prompt, json_mode=True))
+        except Exception as e:
+            logger.warning(f"Gemini API/JSON error: {e}")
+            if isinstance(e, ValueError):           # API errors are counted in _generate
+                metrics.inc('llm_malformed_total', mode='json')
+            items = []
+
+        wanted = set(pending)
+        for item in items:
+            try:
+                i = int(item.get("id")) - 1
+                if i not in wanted or i in results:
+                    raise ValueError(f"unexpected id {item.get('id')!r}")
+                missing = [f for f in FIELDS + ["ji"] if f not in item]
+                if missing:
+                    raise ValueError(f"missing {', '.join(missing)}")
+            except (TypeError, ValueError) as e:
+                logger.warning(f"JSON item malformed → skipped ({e})")
+                metrics.inc('llm_malformed_total', mode='json')
+                continue
+            rec = {f: "" if item[f] is None else str(item[f]).strip() for f in FIELDS}
+            rec.update({f: known[i][f] for f in FIELDS if known[i].get(f)})
+            rec['url'] = urls[i]
+            rec['j/i'] = str(item["ji"] or known[i].get('j/i', '')).strip()
+            results[i] = rec
+
+        pending = [i for i in pending if i not in results]
+        if not pending:
+            break
+        logger.warning(f"{len(pending)} of {len(texts)} jobs missing or invalid; re-batching them")
+        if attempt < MAX_RETRIES:
+            metrics.inc('llm_retries_total', reason='missing_items')
+            time.sleep(backoff(attempt, RETRY_DELAY))
+
+    return [results[i] for i in sorted(results)]
@@ -0,0 +1,185 @@
+import os
+import re
+import time
+import random
+import logging
+import threading
+from typing import Any, List, Optional, Tuple
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+MIN_SCALE   = 0.05           # never throttle a key below 5% of its quota
+DECREASE    = 0.5            # multiplicative decrease on a quota error
+INCREASE    = 0.05           # additive increase (fraction of quota) per success
+BACKOFF_CAP = 60.0
+# Seconds of quota a bucket can bank: by default the whole per-minute quota
+# may be spent in one burst, so a call only waits once that is used up.
+BURST_SECONDS = float(os.getenv("GEMINI_BURST_SECONDS", "60"))
+
+
+def is_quota_error(exc: Exception) -> bool:
+    """True for 429 / RESOURCE_EXHAUSTED style errors from the Gemini SDK."""
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    if code == 429:
+        return True
+    msg = str(exc)
+    return "429" in msg or "RESOURCE_EXHAUSTED" in msg or "quota" in msg.lower()
+
+
+def retry_after(exc: Exception) -> Optional[float]:
+    """Server-suggested delay in seconds, if the error carries one."""
+    m = re.search(r"retry(?:Delay)?['\"]?\s*[:=]?\s*['\"]?(?:in\s+)?(\d+(?:\.\d+)?)\s*s", str(exc), re.I)
+    return float(m.group(1)) if m else None
+
+
+def capacity(rpm: float, tpm: float, burst: float = BURST_SECONDS) -> Tuple[float, float]:
+    """(requests, tokens) a bucket holds when full: `burst` seconds of quota, at least one call."""
+    return max(1.0, rpm / 60 * burst), tpm / 60 * burst
+
+
+def debit(reqs: float, toks: float, elapsed: float,
+          rpm: float, tpm: float, tokens: int,
+          burst: float = BURST_SECONDS) -> Tuple[float, float, float]:
+    """
+    One token-bucket step for stores that keep the bucket elsewhere (a
+    shared SQLite/Redis budget): refill for `elapsed` seconds, debit one
+    request and `tokens`, return (reqs, toks, wait).
+    """
+    req_rate, tok_rate = rpm / 60, tpm / 60
+    max_reqs, max_toks = capacity(rpm, tpm, burst)
+    reqs = min(max_reqs, reqs + elapsed * req_rate)
+    toks = min(max_toks, toks + elapsed * tok_rate)
+    wait = 0.0
+    if reqs < 1:
+        wait = (1 - reqs) / req_rate
+    if toks - tokens < 0:
+        wait = max(wait, (tokens - toks) / tok_rate)
+    return reqs - 1, toks - tokens, wait
+
+
+def backoff(attempt: int, base: float = 2.0) -> float:
+    """Exponential backoff with ±50% jitter, capped at BACKOFF_CAP."""
+    return min(BACKOFF_CAP, base * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+
+class TokenBucket:
+    """
+    Requests-per-minute and tokens-per-minute buckets for one API key.
+
+    `reserve` debits the request immediately (the balance may go negative) and
+    returns how long the caller must wait before sending; the caller sleeps
+    outside the lock, so other threads are never blocked by someone else's
+    wait. The buckets hold `burst` seconds of quota (the full per-minute
+    quota by default), so calls only wait once that is spent. Both rates are
+    multiplied by an AIMD `scale`: halved on a quota error, nudged back up
+    after each success.
+    """
+
+    def __init__(self, rpm: float, tpm: float, name: str = "key", burst: float = BURST_SECONDS):
+        self.name   = name
+        self.rpm    = rpm
+        self.tpm    = tpm
+        self.burst  = burst
+        self.scale  = 1.0
+        self._reqs, self._toks = capacity(rpm, tpm, burst)     # start full
+        self._stamp = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock  = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed     = now - self._stamp
+        self._stamp = now
+        rpm, tpm    = self.rpm * self.scale, self.tpm * self.scale
+        max_reqs, max_toks = capacity(rpm, tpm, self.burst)
+        # idle time banks at most `burst` seconds of quota
+        self._reqs  = min(max_reqs, self._reqs + elapsed * rpm / 60)
+        self._toks  = min(max_toks, self._toks + elapsed * tpm / 60)
+
+    def _wait_for(self, reqs: float, toks: float, now: float) -> float:
+        req_rate = self.rpm * self.scale / 60
+        tok_rate = self.tpm * self.scale / 60
+        wait = max(0.0, self._blocked_until - now)
+        if reqs < 1:
+            wait = max(wait, (1 - reqs) / req_rate)
+        if toks < 0:
+            wait = max(wait, -toks / tok_rate)
+        return wait
+
+    def estimate_wait(self, tokens: int) -> float:
+        """Wait `reserve(tokens)` would impose right now, without reserving."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            return self._wait_for(self._reqs, self._toks - tokens, now)
+
+    def reserve(self, tokens: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = self._wait_for(self._reqs, self._toks - tokens, now)
+            self._reqs -= 1
+            self._toks -= tokens
+            return wait
+
+    def adjust(self, tokens: int) -> None:
+        """Correct the token debit once the real usage is known (+ = used more)."""
+        with self._lock:
+            self._toks -= tokens
+
+    def penalize(self, delay: Optional[float] = None) -> None:
+        with self._lock:
+            self.scale = max(MIN_SCALE, self.scale * DECREASE)
+            if delay:
+                self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+        logger.warning(f"Quota error on {self.name}: throttling to {self.scale:.0%} of limit")
+
+    def reward(self) -> None:
+        with self._lock:
+            self.scale = min(1.0, self.scale + INCREASE)
+
+
+class KeySlot:
+    """One API key: its client, its bucket and the id of its shared budget."""
+
+    def __init__(self, name: str, client: Any, bucket: TokenBucket, budget_id: Optional[str] = None):
+        self.name      = name
+        self.client    = client
+        self.bucket    = bucket
+        self.budget_id = budget_id or name
+
+
+class KeyPool:
+    """
+    Spreads calls over several API keys/projects. `acquire` picks the key that
+    can send soonest, reserves capacity on it, sleeps (lock-free) until the
+    reservation is due and returns the slot to use.
+
+    With a `shared` budget (anything with `reserve(budget_id, rpm, tpm,
+    tokens) -> wait`, e.g. utils.work_queue's), each call is also debited
+    from a bucket shared by every worker process using the same key, so
+    N workers together stay within one key's quota.
+    """
+
+    def __init__(self, slots: List[KeySlot], shared: Optional[Any] = None):
+        if not slots:
+            raise ValueError("KeyPool needs at least one key")
+        self.slots  = slots
+        self.shared = shared
+        self._lock  = threading.Lock()
+        self.throttle_wait = 0.0                # total seconds callers spent waiting
+
+    def acquire(self, tokens: int) -> KeySlot:
+        with self._lock:
+            slot = min(self.slots, key=lambda s: s.bucket.estimate_wait(tokens))
+            wait = slot.bucket.reserve(tokens)
+            if self.shared is not None:
+                b = slot.bucket
+                wait = max(wait, self.shared.reserve(slot.budget_id, b.rpm, b.tpm, tokens))
+            self.throttle_wait += wait
+        metrics.observe('throttle_wait_seconds', wait, key=slot.name)
+        if wait > 0:
+            logger.info(f"Throttling Gemini for {wait:.2f}s on {slot.name}")
+            time.sleep(wait)
+        return slot
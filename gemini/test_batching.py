@@ -0,0 +1,50 @@
+from gemini.batching import (
+    GROW, MIN_SCALE, OUTPUT_TOKENS_PER_JOB, SHRINK, SLOW_SHRINK, AdaptiveBatcher,
+)
+
+
+def _item(chars):
+    return {'text': 'x' * chars}
+
+
+def test_batch_closes_at_the_input_budget():
+    batcher = AdaptiveBatcher(input_budget=1000, output_budget=10**6, max_items=100)
+    batches = [b for b in (batcher.add(_item(1200)) for _ in range(7)) if b]
+    # ~301 tokens each: three fit under 1000
+    assert [len(b) for b in batches] == [3, 3]
+    assert len(batcher.flush()) == 1
+
+
+def test_batch_closes_at_the_output_budget_and_max_items():
+    batcher = AdaptiveBatcher(input_budget=10**6, output_budget=OUTPUT_TOKENS_PER_JOB * 4, max_items=100)
+    assert [len(b) for b in (batcher.add(_item(10)) for _ in range(9)) if b] == [4, 4]
+    batcher = AdaptiveBatcher(input_budget=10**6, output_budget=10**6, max_items=2)
+    assert [len(b) for b in (batcher.add(_item(10)) for _ in range(5)) if b] == [2, 2]
+
+
+def test_malformed_rows_shrink_then_good_calls_grow_back():
+    batcher = AdaptiveBatcher()
+    batcher.observe(10, 5, latency=1)
+    assert batcher.scale == SHRINK
+    batcher.observe(10, 10, latency=1)
+    assert batcher.scale == SHRINK + GROW
+    for _ in range(100):
+        batcher.observe(10, 10, latency=1)
+    assert batcher.scale == 1.0
+
+
+def test_slow_calls_shrink_gently_and_never_below_min_scale():
+    batcher = AdaptiveBatcher(target_latency=5)
+    batcher.observe(10, 10, latency=6)
+    assert batcher.scale == SLOW_SHRINK
+    for _ in range(100):
+        batcher.observe(10, 0, latency=1)
+    assert batcher.scale == MIN_SCALE
+
+
+def test_shrunk_scale_makes_smaller_batches():
+    batcher = AdaptiveBatcher(input_budget=1000, output_budget=10**6, max_items=100)
+    for _ in range(100):
+        batcher.observe(10, 0, latency=1)      # scale 0.1 → 100 token budget
+    sizes = [len(b) for b in (batcher.add(_item(200)) for _ in range(5)) if b]
+    assert sizes == [1, 1, 1, 1]
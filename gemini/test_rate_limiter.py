@@ -0,0 +1,58 @@
+from gemini.rate_limiter import (
+    DECREASE, INCREASE, MIN_SCALE, TokenBucket, capacity, debit, is_quota_error, retry_after,
+)
+
+
+def test_full_bucket_allows_a_burst_of_the_per_minute_quota():
+    bucket = TokenBucket(rpm=30, tpm=60000, burst=60)
+    assert all(bucket.reserve(1000) == 0 for _ in range(30))
+    assert bucket.reserve(1000) > 0           # 31st call in the same minute waits
+
+
+def test_large_request_only_waits_for_its_shortfall():
+    bucket = TokenBucket(rpm=600, tpm=60000, burst=60)
+    assert bucket.reserve(50000) == 0          # bigger than one second of quota, within the burst
+    wait = bucket.reserve(20000)               # 10000 in the bucket, 10000 short at 1000/s
+    assert 9 < wait <= 10
+
+
+def test_burst_is_configurable():
+    bucket = TokenBucket(rpm=60, tpm=60000, burst=1)
+    assert bucket.reserve(1000) == 0
+    assert bucket.reserve(1000) > 0
+
+
+def test_aimd_halves_on_quota_error_and_creeps_back():
+    bucket = TokenBucket(rpm=60, tpm=60000)
+    bucket.penalize()
+    assert bucket.scale == DECREASE
+    bucket.reward()
+    assert bucket.scale == DECREASE + INCREASE
+    for _ in range(100):
+        bucket.penalize()
+    assert bucket.scale == MIN_SCALE
+    for _ in range(100):
+        bucket.reward()
+    assert bucket.scale == 1.0
+
+
+def test_retry_delay_from_the_server_blocks_the_key():
+    bucket = TokenBucket(rpm=60, tpm=60000)
+    bucket.penalize(delay=5)
+    assert 4 < bucket.estimate_wait(10) <= 5
+
+
+def test_shared_debit_matches_the_local_bucket():
+    reqs, toks = capacity(60, 60000)
+    assert (reqs, toks) == (60, 60000)
+    reqs, toks, wait = debit(reqs, toks, 0, 60, 60000, 60000)
+    assert wait == 0
+    _, _, wait = debit(reqs, toks, 0, 60, 60000, 1000)
+    assert wait == 1
+
+
+def test_quota_errors_and_retry_hints_are_recognised():
+    assert is_quota_error(Exception("429 RESOURCE_EXHAUSTED"))
+    assert not is_quota_error(Exception("500 internal"))
+    assert retry_after(Exception("Please retry in 7.5s")) == 7.5
+    assert retry_after(Exception("no hint")) is None
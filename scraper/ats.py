@@ -0,0 +1,171 @@
+import re
+import json
+import html
+import time
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from scraper.fetcher import fetch
+from scraper.html_backend import make_soup
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+BOARD_TTL = 600                  # seconds an Ashby job board listing is reused
+
+UUID = r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}'
+
+_boards: Dict[str, Tuple[float, List[Dict]]] = {}
+_boards_lock = threading.Lock()
+
+
+def _fragment_text(fragment: str) -> str:
+    """Plain text of an HTML snippet (descriptions inside ATS JSON)."""
+    if not fragment:
+        return ''
+    return make_soup(fragment).get_text(separator='\n', strip=True)
+
+
+def _compose(title: str, company: str = '', location: str = '', extra: Optional[Dict[str, str]] = None,
+             body: str = '') -> str:
+    """The posting as labelled lines plus description, the shape Gemini sees for HTML pages."""
+    lines = [title]
+    for label, value in [('Company', company), ('Location', location), *(extra or {}).items()]:
+        if value:
+            lines.append(f"{label}: {value}")
+    return '\n'.join(lines) + '\n\n' + body.strip()
+
+
+def _known(title: str, company: str = '', city: str = '') -> Dict[str, str]:
+    return {k: v.strip() for k, v in (('title', title), ('company', company), ('city', city)) if v and v.strip()}
+
+
+# ------------------------------------------------------------------ per ATS
+
+def _greenhouse(url: str, timeout: float) -> Optional[Tuple[str, Dict[str, str]]]:
+    parts = urlsplit(url)
+    m = re.match(r'^/([^/]+)/jobs/(\d+)', parts.path)
+    if m:
+        board, job = m.groups()
+    else:
+        q = parse_qs(parts.query)
+        if 'embed' not in parts.path or not (q.get('for') and q.get('token')):
+            return None
+        board, job = q['for'][0], q['token'][0]
+    data = _get_json(f"https://boards-api.greenhouse.io/v1/boards/{board}/jobs/{job}", timeout)
+    title    = data.get('title', '')
+    location = (data.get('location') or {}).get('name', '')
+    company  = data.get('company_name', '')
+    depts    = ', '.join(d.get('name', '') for d in data.get('departments') or [])
+    body     = _fragment_text(html.unescape(data.get('content', '')))
+    text = _compose(title, company, location, {'Department': depts}, body)
+    return text, _known(title, company, location.split(',')[0])
+
+
+def _lever(url: str, timeout: float) -> Optional[Tuple[str, Dict[str, str]]]:
+    parts = urlsplit(url)
+    m = re.match(rf'^/([^/]+)/({UUID})', parts.path)
+    if not m:
+        return None
+    api  = 'api.eu.lever.co' if parts.netloc.startswith('jobs.eu.') else 'api.lever.co'
+    data = _get_json(f"https://{api}/v0/postings/{m.group(1)}/{m.group(2)}", timeout)
+    cats = data.get('categories') or {}
+    title, location = data.get('text', ''), cats.get('location', '')
+    body = [data.get('descriptionPlain', '')]
+    for section in data.get('lists') or []:
+        body.append(section.get('text', ''))
+        body.append(_fragment_text(section.get('content', '')))
+    body.append(data.get('additionalPlain', ''))
+    text = _compose(title, '', location, {
+        'Commitment': cats.get('commitment', ''),
+        'Team':       cats.get('team', ''),
+        'Workplace':  data.get('workplaceType', ''),
+    }, '\n'.join(b for b in body if b))
+    return text, _known(title, '', location.split(',')[0])
+
+
+def _smartrecruiters(url: str, timeout: float) -> Optional[Tuple[str, Dict[str, str]]]:
+    m = re.match(r'^/([^/]+)/(\d{6,})', urlsplit(url).path)
+    if not m:
+        return None
+    data = _get_json(f"https://api.smartrecruiters.com/v1/companies/{m.group(1)}/postings/{m.group(2)}", timeout)
+    loc      = data.get('location') or {}
+    title    = data.get('name', '')
+    company  = (data.get('company') or {}).get('name', '')
+    location = ', '.join(x for x in (loc.get('city'), loc.get('region'), (loc.get('country') or '').upper()) if x)
+    sections = ((data.get('jobAd') or {}).get('sections') or {}).values()
+    body = '\n'.join(f"{s.get('title', '')}\n{_fragment_text(s.get('text', ''))}" for s in sections)
+    text = _compose(title, company, location, {
+        'Employment type':  (data.get('typeOfEmployment') or {}).get('label', ''),
+        'Experience level': (data.get('experienceLevel') or {}).get('label', ''),
+        'Remote':           'Yes' if loc.get('remote') else '',
+    }, body)
+    return text, _known(title, company, loc.get('city', ''))
+
+
+def _ashby(url: str, timeout: float) -> Optional[Tuple[str, Dict[str, str]]]:
+    m = re.match(rf'^/([^/]+)/({UUID})', urlsplit(url).path)
+    if not m:
+        return None
+    board, job_id = m.groups()
+    with _boards_lock:
+        cached = _boards.get(board)
+    if cached is None or time.monotonic() - cached[0] > BOARD_TTL:
+        # Ashby only exposes whole boards; one fetch serves every posting on it
+        data   = _get_json(f"https://api.ashbyhq.com/posting-api/job-board/{board}", timeout)
+        cached = (time.monotonic(), data.get('jobs') or [])
+        with _boards_lock:
+            _boards[board] = cached
+    job = next((j for j in cached[1] if j.get('id') == job_id), None)
+    if job is None:
+        return None
+    title, location = job.get('title', ''), job.get('location', '')
+    text = _compose(title, '', location, {
+        'Employment type': job.get('employmentType', ''),
+        'Remote':          'Yes' if job.get('isRemote') else '',
+    }, job.get('descriptionPlain') or _fragment_text(job.get('descriptionHtml', '')))
+    return text, _known(title, '', location.split(',')[0])
+
+
+ATS_HANDLERS = [
+    (re.compile(r'(^|\.)greenhouse\.io$'),               _greenhouse),
+    (re.compile(r'^jobs\.(eu\.)?lever\.co$'),            _lever),
+    (re.compile(r'^(jobs|careers)\.smartrecruiters\.com$'), _smartrecruiters),
+    (re.compile(r'^jobs\.ashbyhq\.com$'),                _ashby),
+]
+
+
+def _get_json(api_url: str, timeout: float) -> Dict:
+    resp = fetch(api_url, timeout=timeout, headers={'Accept': 'application/json'})
+    resp.raise_for_status()
+    return json.loads(resp.text)
+
+
+def is_ats_url(url: str) -> bool:
+    host = (urlsplit(url).hostname or '').lower()
+    return any(h.search(host) for h, _ in ATS_HANDLERS)
+
+
+def fetch_ats(url: str, timeout: float = 10) -> Optional[Tuple[str, Dict[str, str]]]:
+    """
+    For postings hosted on Greenhouse, Lever, SmartRecruiters or Ashby, reads
+    the ATS's public JSON API instead of the page. Returns (text, known
+    fields) or None when `url` is not a recognised posting URL or the API
+    call fails (callers then scrape the page as usual).
+    """
+    host = (urlsplit(url).hostname or '').lower()
+    for host_re, handler in ATS_HANDLERS:
+        if host_re.search(host):
+            try:
+                with metrics.timer('fetch_seconds', route='ats', domain=metrics.domain(url)):
+                    result = handler(url, timeout)
+            except Exception as e:
+                logger.warning(f"ATS API failed for {url}: {e}")
+                metrics.inc('pages_total', route='ats', outcome='error', domain=metrics.domain(url))
+                return None
+            metrics.inc('pages_total', route='ats', outcome='ok' if result else 'unknown_url',
+                        domain=metrics.domain(url))
+            return result
+    return None
@@ -0,0 +1,162 @@
+import os
+import atexit
+import asyncio
+import logging
+import threading
+from typing import List, Optional
+from urllib.parse import urlsplit
+
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+
+from utils.aio import BackgroundLoop
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGES           = int(os.getenv("BROWSER_MAX_PAGES", "4"))
+CONTENT_READY_CHARS = 200            # same threshold the static → dynamic fallback uses
+CONTENT_QUIET_MS    = 1000           # ...or the text stopped changing for this long
+READY_SECONDS       = float(os.getenv("BROWSER_READY_SECONDS", "8"))   # cap on the content wait
+
+BLOCKED_RESOURCES = {"image", "media", "font", "imageset"}
+BLOCKED_HOSTS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net",
+    "googlesyndication.com", "facebook.net", "connect.facebook.com",
+    "hotjar.com", "segment.io", "segment.com", "mixpanel.com",
+    "newrelic.com", "nr-data.net", "optimizely.com", "clarity.ms",
+    "bat.bing.com", "snap.licdn.com", "ads.linkedin.com", "quantserve.com",
+    "scorecardresearch.com", "fullstory.com", "intercom.io",
+)
+
+# Resolves once the main content area holds at least `n` characters of text,
+# or its text has not changed for `quiet` ms (short postings, error pages).
+_READY_JS = """
+([n, quiet]) => {
+    const el = document.querySelector('main, article') || document.body;
+    if (!el) return false;
+    const len = el.innerText.trim().length;
+    if (len >= n) return true;
+    const now = performance.now();
+    const s = window.__contentReady || (window.__contentReady = {len: -1, since: now});
+    if (len !== s.len) { s.len = len; s.since = now; return false; }
+    return len > 0 && now - s.since >= quiet;
+}
+"""
+
+
+def _is_blocked(resource_type: str, url: str) -> bool:
+    if resource_type in BLOCKED_RESOURCES:
+        return True
+    host = urlsplit(url).netloc.lower()
+    return any(host == h or host.endswith("." + h) for h in BLOCKED_HOSTS)
+
+
+class BrowserPool:
+    """
+    One long-lived headless Chromium shared by every dynamic scrape.
+
+    • A single browser context is reused; pages are recycled between URLs.
+    • At most `max_pages` pages render concurrently.
+    • Images, fonts, media and known analytics hosts are aborted at the
+      network layer.
+    • `render` returns as soon as the DOM is parsed and the main content area
+      has text, instead of waiting for the full `load` event.
+    """
+
+    def __init__(self, max_pages: int = MAX_PAGES, headless: bool = True):
+        self.max_pages = max_pages
+        self.headless  = headless
+        self._pw       = None
+        self._browser  = None
+        self._context  = None
+        self._idle: List = []
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+
+    async def _route(self, route) -> None:
+        req = route.request
+        if _is_blocked(req.resource_type, req.url):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _ensure_started(self) -> None:
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return
+            if self._pw is None:
+                self._pw = await async_playwright().start()
+            logger.info("Launching pooled Chromium (max %d pages)", self.max_pages)
+            self._browser = await self._pw.chromium.launch(headless=self.headless)
+            self._context = await self._browser.new_context()
+            await self._context.route("**/*", self._route)
+            self._idle = []
+            self._sem  = asyncio.Semaphore(self.max_pages)
+
+    async def _acquire_page(self):
+        while self._idle:
+            page = self._idle.pop()
+            if not page.is_closed():
+                return page
+        return await self._context.new_page()
+
+    async def render(self, url: str, timeout: float = 30) -> str:
+        """Navigate a pooled page to `url` and return its rendered HTML."""
+        await self._ensure_started()
+        ms = timeout * 1000
+        async with self._sem:
+            page = await self._acquire_page()
+            healthy = False
+            try:
+                await page.goto(url, timeout=ms, wait_until="domcontentloaded")
+                try:
+                    await page.wait_for_function(_READY_JS, arg=[CONTENT_READY_CHARS, CONTENT_QUIET_MS],
+                                                 timeout=min(ms, READY_SECONDS * 1000), polling=200)
+                except PlaywrightTimeoutError:
+                    logger.info("Content-ready wait timed out for %s; using current DOM", url)
+                html = await page.content()
+                healthy = True
+                return html
+            finally:
+                if healthy:
+                    self._idle.append(page)
+                else:
+                    await page.close()
+
+    async def close(self) -> None:
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._pw is not None:
+            await self._pw.stop()
+            self._pw = None
+
+
+_loop = BackgroundLoop(name="browser")
+_pool: Optional[BrowserPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> BrowserPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool()
+        return _pool
+
+
+def render(url: str, timeout: float = 30) -> str:
+    """Blocking render through the shared pool. Safe to call from any thread."""
+    return _loop.run(get_pool().render(url, timeout=timeout))
+
+
+@atexit.register
+def close_pool() -> None:
+    global _pool
+    if _pool is not None:
+        try:
+            _loop.run(_pool.close(), timeout=10)
+        except Exception as e:
+            logger.warning(f"Browser pool shutdown failed: {e}")
+        _pool = None
@@ -0,0 +1,263 @@
+import os
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+from scraper.html_backend import make_soup, PARSER, HAS_LXML
+
+from gemini.batching import estimate_tokens
+
+MAX_TEXT_TOKENS = int(os.getenv("MAX_TEXT_TOKENS", "2000"))
+
+# Elements that never hold the posting itself.
+STRIP_TAGS = ['script', 'style', 'noscript', 'template', 'svg', 'iframe',
+              'nav', 'footer', 'aside', 'form', 'button']
+
+# id/class fragments of cookie banners, share bars, "similar jobs" widgets, …
+BOILERPLATE_ATTR = re.compile(
+    r'cookie|consent|gdpr|newsletter|subscribe|share|social|breadcrumb|'
+    r'similar|related|recommend|suggested|more-jobs|other-jobs|job-alert|'
+    r'modal|popup|skip-link|signin|login',
+    re.I,
+)
+
+# Sections worth keeping when a description has to be shortened.
+KEY_SECTION = re.compile(
+    r'requirement|qualification|skill|experience|what you|who you|you will|'
+    r'responsibilit|location|based in|office|remote|hybrid|on-?site|salary|'
+    r'compensation|pay|benefit|perks|employment type|contract|full[- ]time|part[- ]time',
+    re.I,
+)
+
+# Headings that start a new section of a posting.
+HEADING = re.compile(
+    KEY_SECTION.pattern + r'|about|opportunit|the role|your role|offer|who we|we are|'
+    r'apply|overview|description|summary|mission|team|culture|diversity|equal',
+    re.I,
+)
+
+# Site chrome: lines found in these regions are template text, and the same
+# line turning up again in the main block is dropped.
+TEMPLATE_TAGS = ('nav', 'footer', 'header')
+
+# "Label : value" lines (Location : Bangalore, Job Rank : Senior) are facts
+# about the posting, however often they repeat.
+KEY_VALUE = re.compile(r'^[^:]{1,40}\s:|^[^:]{1,40}:\s*\S')
+
+BLOCK_TAGS = ['div', 'section', 'article', 'main', 'td']
+TEXT_TAGS  = ['p', 'li', 'pre', 'td', 'dd', 'h2', 'h3', 'h4']
+
+
+def _strip_boilerplate(soup: BeautifulSoup) -> List[str]:
+    """Remove boilerplate elements; returns the text lines of the site chrome."""
+    template: List[str] = []
+    for tag in soup.find_all(STRIP_TAGS):
+        if tag.decomposed:
+            continue
+        if tag.name in TEMPLATE_TAGS:
+            template.extend(tag.get_text('\n', strip=True).splitlines())
+        tag.decompose()
+    for tag in soup.find_all('header'):
+        # site headers go; a posting's own <header> (title, location) stays
+        if tag.find_parent(['main', 'article']) is None:
+            template.extend(tag.get_text('\n', strip=True).splitlines())
+            tag.decompose()
+    for tag in soup.find_all(attrs={'class': BOILERPLATE_ATTR}) + soup.find_all(id=BOILERPLATE_ATTR):
+        if tag.name not in ('body', 'html', 'main', 'article') and not tag.decomposed:
+            tag.decompose()
+    return template
+
+
+def _link_density(tag) -> float:
+    text = len(tag.get_text(strip=True)) or 1
+    links = sum(len(a.get_text(strip=True)) for a in tag.find_all('a'))
+    return min(1.0, links / text)
+
+
+def _best_block(soup: BeautifulSoup):
+    """
+    Readability-style pick of the element holding the main text: every text
+    element scores its parent (and half that to its grandparent) by length
+    and commas; totals are discounted by link density.
+    """
+    scores: Dict[int, float] = defaultdict(float)
+    nodes:  Dict[int, object] = {}
+    for el in soup.find_all(TEXT_TAGS):
+        text = el.get_text(' ', strip=True)
+        if len(text) < 25:
+            continue
+        score = 1 + text.count(',') + min(len(text) / 100, 3)
+        parent = el.find_parent(BLOCK_TAGS)
+        if parent is None:
+            continue
+        scores[id(parent)] += score
+        nodes[id(parent)]   = parent
+        grand = parent.find_parent(BLOCK_TAGS)
+        if grand is not None:
+            scores[id(grand)] += score / 2
+            nodes[id(grand)]   = grand
+    if not scores:
+        return None
+    top  = sorted(scores, key=scores.get, reverse=True)[:5]
+    best = max(top, key=lambda k: scores[k] * (1 - _link_density(nodes[k])))
+    return nodes[best]
+
+
+# ------------------------------------------------------------- lxml fast path
+
+def _lxml_text(el) -> str:
+    return '\n'.join(t.strip() for t in el.itertext() if t.strip())
+
+
+def _lxml_best_block(doc):
+    """Same scoring as `_best_block`, on an lxml tree."""
+    scores: Dict[object, float] = defaultdict(float)
+    for el in doc.iter(*TEXT_TAGS):
+        text = ' '.join(el.text_content().split())
+        if len(text) < 25:
+            continue
+        score  = 1 + text.count(',') + min(len(text) / 100, 3)
+        parent = next(el.iterancestors(*BLOCK_TAGS), None)
+        if parent is None:
+            continue
+        scores[parent] += score
+        grand = next(parent.iterancestors(*BLOCK_TAGS), None)
+        if grand is not None:
+            scores[grand] += score / 2
+    if not scores:
+        return None
+
+    def density(el):
+        text  = len(el.text_content().strip()) or 1
+        links = sum(len(a.text_content().strip()) for a in el.iter('a'))
+        return min(1.0, links / text)
+
+    top = sorted(scores, key=scores.get, reverse=True)[:5]
+    return max(top, key=lambda el: scores[el] * (1 - density(el)))
+
+
+def _extract_lxml(html: str) -> Tuple[str, List[str]]:
+    """`extract_content` on a bare lxml tree: same rules, no soup objects."""
+    import lxml.html
+    try:
+        try:
+            doc = lxml.html.fromstring(html)
+        except ValueError:                  # str with an XML encoding declaration
+            doc = lxml.html.fromstring(html.encode('utf-8'))
+    except Exception:                       # empty or non-HTML body
+        return '', []
+
+    template: List[str] = []
+    for el in list(doc.iter(*STRIP_TAGS)):
+        if el.tag in TEMPLATE_TAGS:
+            template.extend(_lxml_text(el).splitlines())
+        el.drop_tree()
+    for el in doc.xpath('//header[not(ancestor::main or ancestor::article)]'):
+        template.extend(_lxml_text(el).splitlines())
+        el.drop_tree()
+    for el in doc.xpath('//*[@class or @id]'):
+        if el.tag in ('body', 'html', 'main', 'article') or el.getparent() is None:
+            continue
+        if BOILERPLATE_ATTR.search(el.get('class', '')) or BOILERPLATE_ATTR.search(el.get('id', '')):
+            el.drop_tree()
+
+    container = next(doc.iter('main', 'article'), None)
+    if container is None or len(container.text_content().strip()) < 200:
+        best = _lxml_best_block(doc)
+        container = best if best is not None else container if container is not None else doc
+    return _lxml_text(container), template
+
+
+def extract_content(html: str) -> Tuple[str, List[str]]:
+    """
+    (main_text, template_lines) of a page. Boilerplate elements are removed,
+    then the main text is the <main>/<article> element if it has real
+    content, else the best-scoring text block, else the whole body.
+    `template_lines` is the text of the page's own nav/header/footer, for
+    `clean_text`. Runs on lxml directly when that is the configured parser,
+    skipping the BeautifulSoup tree entirely.
+    """
+    if HAS_LXML and PARSER == 'lxml':
+        return _extract_lxml(html)
+    soup = make_soup(html)
+    template = _strip_boilerplate(soup)
+
+    container = soup.find(['main', 'article'])
+    if container is None or len(container.get_text(strip=True)) < 200:
+        container = _best_block(soup) or container or soup
+    return container.get_text(separator='\n', strip=True), template
+
+
+def extract_main_text(html: str) -> str:
+    """Main-content text of a page; see `extract_content`."""
+    return extract_content(html)[0]
+
+
+def _norm(line: str) -> str:
+    return ' '.join(line.split()).lower()
+
+
+def _is_heading(line: str) -> bool:
+    s = line.strip()
+    return 0 < len(s) <= 60 and not s.endswith('.') and bool(s.endswith(':') or HEADING.search(s))
+
+
+def drop_template_lines(text: str, template: Iterable[str]) -> str:
+    """
+    Drop lines of `text` that repeat the page's site chrome (`template`, from
+    `extract_content`): a mobile menu or footer copy rendered inside the main
+    block. Only ever looks at this one page, so the same page always gives
+    the same text. The first line (the title), headings, "Label: value"
+    lines and key sections are never dropped.
+    """
+    chrome = {_norm(l) for l in template if l.strip()}
+    lines  = [l for l in text.splitlines() if l.strip()]
+    if not chrome:
+        return '\n'.join(lines)
+    return '\n'.join(
+        l for i, l in enumerate(lines)
+        if i == 0 or _norm(l) not in chrome
+        or _is_heading(l) or KEY_VALUE.search(l.strip()) or KEY_SECTION.search(l)
+    )
+
+
+def _sections(text: str) -> List[List[str]]:
+    """Split text into sections at heading-like lines (short, no full stop)."""
+    sections: List[List[str]] = [[]]
+    for line in text.splitlines():
+        if _is_heading(line) and sections[-1] and len(sections[-1]) > 1:
+            sections.append([])
+        sections[-1].append(line)
+    return [s for s in sections if s]
+
+
+def truncate_to_budget(text: str, max_tokens: int = MAX_TEXT_TOKENS) -> str:
+    """
+    Shorten `text` to about `max_tokens`. The opening section (title, intro)
+    is kept first, then sections matching KEY_SECTION, then the rest in page
+    order; the result keeps the original section order.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    sections = _sections(text)
+    order = [0] + [i for i in range(1, len(sections)) if KEY_SECTION.search('\n'.join(sections[i][:2]))]
+    order += [i for i in range(1, len(sections)) if i not in order]
+
+    keep, used = set(), 0
+    for i in order:
+        cost = estimate_tokens('\n'.join(sections[i]))
+        if used + cost > max_tokens:
+            continue
+        keep.add(i)
+        used += cost
+    if not keep:                                   # one giant section: hard cut
+        return text[:max_tokens * 4]
+    return '\n'.join('\n'.join(sections[i]) for i in sorted(keep))
+
+
+def clean_text(text: str, max_tokens: Optional[int] = None,
+               template: Iterable[str] = ()) -> str:
+    """Template-line removal plus token-budget truncation."""
+    text = drop_template_lines(text, template)
+    return truncate_to_budget(text, MAX_TEXT_TOKENS if max_tokens is None else max_tokens)
@@ -1,23 +1,29 @@
-from playwright.sync_api import sync_playwright
-from bs4 import BeautifulSoup
+from scraper.browser_pool import render
+from scraper.content import extract_content, clean_text
+from scraper.html_backend import run_parse
+from utils.metrics import metrics
 
-def scrape(url: str, timeout: int = 30) -> str:
+def scrape_page(url: str, timeout: int = 30):
     """
-    Uses Playwright to render JS-heavy pages, then extracts main text like static_scraper.
+    Renders a JS-heavy page on the shared Playwright browser pool and returns
+    (rendered_html, main_text), extracted like static_scraper.
     """
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        page.goto(url, timeout=timeout * 1000)
-        html = page.content()
-        browser.close()
-
-    soup = BeautifulSoup(html, 'html.parser')
-
-    for tag in soup.find_all(['nav', 'footer']):
-        tag.decompose()
+    domain = metrics.domain(url)
+    with metrics.timer('fetch_seconds', route='dynamic', domain=domain):
+        try:
+            html = render(url, timeout=timeout)
+        except Exception:
+            metrics.inc('pages_total', route='dynamic', outcome='error', domain=domain)
+            raise
+    with metrics.timer('extract_seconds', route='dynamic'):
+        main, template = run_parse(extract_content, html)
+        text = clean_text(main, template=template)
+    metrics.inc('pages_total', route='dynamic', outcome='ok', domain=domain)
+    return html, text
 
-    container = soup.find(['main', 'article'])
-    if container:
-        return container.get_text(separator='\n', strip=True)
-    return soup.get_text(separator='\n', strip=True)
+def scrape(url: str, timeout: int = 30) -> str:
+    """
+    Renders JS-heavy pages on the shared Playwright browser pool, then extracts
+    main text like static_scraper.
+    """
+    return scrape_page(url, timeout=timeout)[1]
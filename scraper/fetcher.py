@@ -0,0 +1,154 @@
+import os
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Union
+from urllib.parse import urlsplit
+
+import httpx
+
+from utils.aio import BackgroundLoop
+from scraper.http_cache import get_http_cache
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+logger = logging.getLogger(__name__)
+
+MAX_CONNECTIONS = int(os.getenv("FETCH_MAX_CONNECTIONS", "256"))
+PER_HOST_LIMIT  = int(os.getenv("FETCH_PER_HOST", "6"))
+HOST_DELAY      = float(os.getenv("FETCH_HOST_DELAY", "0.2"))
+DEFAULT_TIMEOUT = 10
+USER_AGENT      = "Mozilla/5.0 (compatible; job_scraper/1.0)"
+
+
+class FetchError(Exception):
+    """Raised by `FetchResult.raise_for_status` for 4xx/5xx responses."""
+
+
+@dataclass
+class FetchResult:
+    url: str                                  # final URL after redirects
+    status: int
+    text: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    from_cache: bool = False                  # server answered 304; body is the cached copy
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise FetchError(f"HTTP {self.status} for {self.url}")
+
+
+class AsyncFetcher:
+    """
+    Shared asyncio HTTP client.
+
+    • One keep-alive connection pool (HTTP/2 when `h2` is installed), so
+      repeated requests to the same host reuse TCP/TLS connections.
+    • At most `per_host` requests in flight per host.
+    • Request starts to the same host are spaced at least `delay` seconds apart.
+    • With `use_cache`, requests carry If-None-Match / If-Modified-Since from
+      the HTTP cache and a 304 is answered with the cached body.
+    The global limit is `max_connections`; any number of fetches may be queued.
+    """
+
+    def __init__(self,
+                 per_host: int = PER_HOST_LIMIT,
+                 delay: float = HOST_DELAY,
+                 max_connections: int = MAX_CONNECTIONS,
+                 use_cache: bool = True):
+        self.per_host        = per_host
+        self.delay           = delay
+        self.max_connections = max_connections
+        self.use_cache       = use_cache
+        self._client: Optional[httpx.AsyncClient] = None
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+        self._next_start: Dict[str, float] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2,
+                follow_redirects=True,
+                headers={"User-Agent": USER_AGENT},
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    async def _polite_wait(self, host: str) -> None:
+        loop  = asyncio.get_running_loop()
+        now   = loop.time()
+        start = max(now, self._next_start.get(host, 0.0))
+        self._next_start[host] = start + self.delay
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def fetch(self, url: str, timeout: float = DEFAULT_TIMEOUT,
+                    headers: Optional[Dict[str, str]] = None) -> FetchResult:
+        host  = urlsplit(url).netloc.lower()
+        sem   = self._hosts.setdefault(host, asyncio.Semaphore(self.per_host))
+        cache = get_http_cache() if self.use_cache else None
+        if cache is not None:
+            headers = {**cache.validators(url), **(headers or {})}
+        async with sem:
+            await self._polite_wait(host)
+            resp = await self._get_client().get(url, timeout=timeout, headers=headers)
+
+        if resp.status_code == 304 and cache is not None:
+            entry = cache.get(url)
+            if entry is not None:
+                return FetchResult(url=str(resp.url), status=200, text=entry['body'],
+                                   headers=dict(resp.headers), from_cache=True)
+
+        result = FetchResult(
+            url=str(resp.url),
+            status=resp.status_code,
+            text=resp.text,
+            headers=dict(resp.headers),
+        )
+        etag, last_modified = resp.headers.get('etag'), resp.headers.get('last-modified')
+        if cache is not None and result.ok and (etag or last_modified):
+            cache.store_response(url, result.text, etag, last_modified)
+        return result
+
+    async def fetch_all(self, urls: List[str], timeout: float = DEFAULT_TIMEOUT
+                        ) -> List[Union[FetchResult, Exception]]:
+        """Fetch every URL concurrently; failures are returned, not raised."""
+        return await asyncio.gather(
+            *(self.fetch(u, timeout=timeout) for u in urls),
+            return_exceptions=True,
+        )
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_loop    = BackgroundLoop(name="fetcher")
+_fetcher = AsyncFetcher()
+
+
+def fetch(url: str, timeout: float = DEFAULT_TIMEOUT,
+          headers: Optional[Dict[str, str]] = None) -> FetchResult:
+    """
+    Blocking fetch through the shared pooled client. Safe to call from any
+    number of threads; all requests are multiplexed on one event loop.
+    """
+    return _loop.run(_fetcher.fetch(url, timeout=timeout, headers=headers))
+
+
+def fetch_many(urls: List[str], timeout: float = DEFAULT_TIMEOUT
+               ) -> List[Union[FetchResult, Exception]]:
+    """Blocking concurrent fetch of `urls`, results in input order."""
+    return _loop.run(_fetcher.fetch_all(urls, timeout=timeout))
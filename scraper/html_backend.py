@@ -0,0 +1,95 @@
+import os
+import atexit
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml.html
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+logger = logging.getLogger(__name__)
+
+# Tree builder used for every BeautifulSoup in the scrapers. lxml's C parser
+# is several times faster than the pure-Python 'html.parser'.
+PARSER = os.getenv("HTML_PARSER") or ("lxml" if HAS_LXML else "html.parser")
+
+# Worker processes for CPU-bound HTML work; 0 keeps it in the calling thread.
+PROCESSES = int(os.getenv("HTML_PROCESSES", "0"))
+
+
+def make_soup(html: str, only=None) -> BeautifulSoup:
+    """
+    BeautifulSoup on the fastest available parser. `only` (a tag name, list
+    of names or SoupStrainer) builds just those elements instead of the full
+    tree.
+    """
+    if only is not None and not isinstance(only, SoupStrainer):
+        only = SoupStrainer(only)
+    return BeautifulSoup(html, PARSER, parse_only=only)
+
+
+def extract_anchors(html: str, base_url: str) -> List[Tuple[str, str]]:
+    """
+    Every <a href> on the page as (absolute_url, link_text), in page order,
+    in a single pass. Uses lxml directly when available; otherwise a
+    BeautifulSoup restricted to <a> elements.
+    """
+    out: List[Tuple[str, str]] = []
+    if HAS_LXML:
+        try:
+            try:
+                doc = lxml.html.fromstring(html)
+            except ValueError:              # str with an XML encoding declaration
+                doc = lxml.html.fromstring(html.encode('utf-8'))
+        except Exception:                   # empty or non-HTML body
+            return out
+        for a in doc.iter('a'):
+            href = a.get('href')
+            if href:
+                out.append((urljoin(base_url, href.strip()), a.text_content().strip()))
+        return out
+    for a in make_soup(html, only='a').find_all('a', href=True):
+        out.append((urljoin(base_url, a['href'].strip()), a.get_text(strip=True)))
+    return out
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if PROCESSES <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            logger.info(f"Starting HTML parse pool with {PROCESSES} processes")
+            _pool = ProcessPoolExecutor(max_workers=PROCESSES)
+        return _pool
+
+
+def run_parse(fn: Callable, *args):
+    """
+    Run a pure, picklable HTML function `fn(*args)` on the parse pool when
+    HTML_PROCESSES > 0, else inline. Blocking either way, so callers keep
+    their threaded structure while the GIL-bound work spreads across cores.
+    """
+    pool = _get_pool()
+    if pool is None:
+        return fn(*args)
+    return pool.submit(fn, *args).result()
+
+
+@atexit.register
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,133 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Dict, Optional
+
+CACHE_PATH = os.getenv("HTTP_CACHE_PATH", "data/http_cache.sqlite")
+USE_CACHE  = os.getenv("HTTP_CACHE", "1") != "0"
+
+
+class HttpCache:
+    """
+    On-disk store of fetched pages for conditional re-crawls.
+
+    Per requested URL it keeps the response validators (ETag, Last-Modified),
+    the body, and — once later stages have produced them — the extracted text
+    and the final parsed record. A new body clears the derived columns, so they
+    are only ever returned for the exact body they came from. Thread-safe.
+    """
+
+    def __init__(self, path: str = CACHE_PATH):
+        self.path  = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url           TEXT PRIMARY KEY,
+                etag          TEXT,
+                last_modified TEXT,
+                body          TEXT NOT NULL,
+                text          TEXT,
+                record        TEXT,
+                fetched       REAL NOT NULL
+            )""")
+        self._db.commit()
+
+    def get(self, url: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, last_modified, body, text, record FROM pages WHERE url = ?",
+                (url,),
+            ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, body, text, record = row
+        return {
+            'etag': etag,
+            'last_modified': last_modified,
+            'body': body,
+            'text': text,
+            'record': json.loads(record) if record else None,
+        }
+
+    def validators(self, url: str) -> Dict[str, str]:
+        """Conditional request headers for `url` ({} if nothing is cached)."""
+        entry = self.get(url)
+        headers: Dict[str, str] = {}
+        if entry and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store_response(self, url: str, body: str,
+                       etag: Optional[str], last_modified: Optional[str]) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, body, text, record, fetched) "
+                "VALUES (?, ?, ?, ?, NULL, NULL, ?)",
+                (url, etag, last_modified, body, time.time()),
+            )
+            self._db.commit()
+
+    def store_text(self, url: str, text: str) -> None:
+        with self._lock:
+            self._db.execute("UPDATE pages SET text = ? WHERE url = ?", (text, url))
+            self._db.commit()
+
+    def store_extracted(self, url: str, text: str) -> bool:
+        """
+        Keeps text that came without HTTP validators (ATS API, browser) and
+        says whether it is unchanged: True when it equals the text already
+        cached for `url`, whose record then stays valid. Otherwise the row
+        is replaced and its record cleared.
+        """
+        with self._lock:
+            row = self._db.execute("SELECT text FROM pages WHERE url = ?", (url,)).fetchone()
+            if row is not None and row[0] == text:
+                return True
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, body, text, record, fetched) "
+                "VALUES (?, NULL, NULL, '', ?, NULL, ?)",
+                (url, text, time.time()),
+            )
+            self._db.commit()
+        return False
+
+    def store_record(self, url: str, record: Dict) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE pages SET record = ? WHERE url = ?",
+                (json.dumps(record, ensure_ascii=False), url),
+            )
+            self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_cache: Optional[HttpCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> Optional[HttpCache]:
+    """Shared HTTP cache, opened on first use (None when HTTP_CACHE=0)."""
+    global _cache
+    if not USE_CACHE:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = HttpCache()
+        return _cache
+
+
+def cached_record(url: str) -> Optional[Dict]:
+    """Final record stored for `url`'s current cached body, if any."""
+    cache = get_http_cache()
+    entry = cache.get(url) if cache else None
+    return entry['record'] if entry else None
@@ -0,0 +1,191 @@
+import re
+import logging
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from scraper.urls import same_site
+
+logger = logging.getLogger(__name__)
+
+JOB_THRESHOLD = 0.6             # minimum score to treat a link as a posting
+LEARN_SCORE   = 0.4             # links at least this good teach their path shape
+MIN_REPEAT    = 3               # a shape must repeat this often on a page to be learned
+PATTERN_BOOST = 0.25
+
+# Known applicant-tracking systems: (host, posting path). On these hosts the
+# rule alone decides.
+ATS_RULES: List[Tuple[re.Pattern, re.Pattern]] = [
+    (re.compile(r'(^|\.)greenhouse\.io$'),        re.compile(r'^/[^/]+/jobs/\d+')),
+    (re.compile(r'^jobs\.lever\.co$'),            re.compile(r'^/[^/]+/[0-9a-f-]{36}/?$')),
+    (re.compile(r'^jobs\.ashbyhq\.com$'),         re.compile(r'^/[^/]+/[0-9a-f-]{36}/?$')),
+    (re.compile(r'^(jobs|careers)\.smartrecruiters\.com$'), re.compile(r'^/[^/]+/\d{6,}')),
+    (re.compile(r'^apply\.workable\.com$'),       re.compile(r'^/[^/]+/j/[0-9A-F]{6,}', re.I)),
+    (re.compile(r'\.myworkdayjobs\.com$'),        re.compile(r'/job/.+_[A-Z]*-?\d+', re.I)),
+    (re.compile(r'\.recruitee\.com$'),            re.compile(r'^/o/[^/]+')),
+    (re.compile(r'\.bamboohr\.com$'),             re.compile(r'^/careers/\d+')),
+    (re.compile(r'\.jobs\.personio\.(de|com)$'),  re.compile(r'^/job/\d+')),
+    (re.compile(r'\.icims\.com$'),                re.compile(r'^/jobs/\d+/')),
+]
+
+JOB_SEGMENT = re.compile(r'^(jobs?|careers?|positions?|openings?|vacanc(y|ies)|roles?|postings?|'
+                         r'opportunit(y|ies)|stellen(angebote)?|empleos?|emplois?)$', re.I)
+ID_PARAMS   = {'gh_jid', 'jobid', 'job_id', 'jid', 'id', 'req', 'reqid', 'requisitionid', 'postingid'}
+NEGATIVE    = re.compile(r'\b(alerts?|log-?in|sign-?in|sign-?up|register|blogs?|news|press|search|'
+                         r'filters?|saved|faqs?|privacy|terms|cookies?|benefits|culture|life-at|teams|'
+                         r'locations|departments|categor(y|ies)|tags?|rss|feed|talent-?(community|network)|'
+                         r'how-we-hire|students|graduates|events)\b', re.I)
+NAV_TEXT    = re.compile(r'^(jobs?|careers?|see all|view all|all jobs|open (positions|roles)|'
+                         r'search|apply|learn more|read more|home|next|previous|back)\b', re.I)
+ROLE_WORDS  = re.compile(r'\b(engineer|developer|manager|director|analyst|designer|scientist|'
+                         r'specialist|consultant|architect|intern(ship)?|associate|lead|head of|'
+                         r'coordinator|administrator|technician|representative|officer|assistant|'
+                         r'accountant|recruiter|writer|editor|nurse|sales|marketing|support)\b', re.I)
+FILE_EXT    = re.compile(r'\.(pdf|jpe?g|png|gif|svg|zip|docx?|xml|rss|css|js)$', re.I)
+UUID        = re.compile(r'^[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}$', re.I)
+
+
+@dataclass
+class LinkScore:
+    url: str
+    text: str
+    score: float
+    reasons: List[str] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        return f"{self.score:.2f} {self.url} ({', '.join(self.reasons) or 'no signal'})"
+
+
+def path_shape(url: str) -> str:
+    """
+    Host plus path with variable parts abstracted, e.g.
+    'acme.com/job/<slug>/<id>' for '/job/data-engineer/48213/'.
+    """
+    parts = urlsplit(url)
+    shape = []
+    for seg in (s for s in parts.path.lower().split('/') if s):
+        if UUID.match(seg) or re.search(r'\d{3,}', seg):
+            shape.append('<id>')
+        elif '-' in seg or '_' in seg:
+            shape.append('<slug>')
+        else:
+            shape.append(seg)
+    return f"{(parts.hostname or '').lower()}/{'/'.join(shape)}"
+
+
+def _ats_rule(host: str, path: str) -> Optional[bool]:
+    for host_re, path_re in ATS_RULES:
+        if host_re.search(host):
+            return bool(path_re.search(path))
+    return None
+
+
+class JobLinkClassifier:
+    """
+    Scores (url, anchor text) pairs by how likely they point at a single job
+    posting, from 0 to 1:
+
+    • ATS hosts (Greenhouse, Lever, Workday, …) are decided by their URL rule
+    • path: a jobs/careers segment with something after it, an id or a
+      multi-word slug count for; alerts, login, blog, search, index and
+      pagination pages count against
+    • anchor text: a short title, especially with a role word, counts for
+    • per domain, path shapes that repeat on a page among decent candidates
+      (`/job/<slug>/<id>`) are learned and boost every link of that shape
+
+    Learned shapes live on the instance, so reuse one classifier across the
+    pages of a site. Thread-safe.
+    """
+
+    def __init__(self, threshold: float = JOB_THRESHOLD, min_repeat: int = MIN_REPEAT):
+        self.threshold  = threshold
+        self.min_repeat = min_repeat
+        self._patterns: Dict[str, Set[str]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def score(self, url: str, text: str = '', base_url: Optional[str] = None) -> LinkScore:
+        parts = urlsplit(url)
+        host  = (parts.hostname or '').lower()
+        path  = parts.path or '/'
+        text  = ' '.join((text or '').split())
+        res   = LinkScore(url, text, 0.0)
+
+        def add(delta: float, reason: str) -> None:
+            res.score += delta
+            res.reasons.append(f"{'+' if delta >= 0 else ''}{delta:g} {reason}")
+
+        if parts.scheme not in ('http', 'https') or FILE_EXT.search(path):
+            add(-1, 'not a page')
+            return self._clamp(res)
+
+        ats = _ats_rule(host, path)
+        if ats is not None:
+            add(1 if ats else -1, 'ATS posting' if ats else 'ATS non-posting')
+            return self._clamp(res)
+
+        segs  = [s for s in path.split('/') if s]
+        query = {k.lower(): v for k, v in parse_qsl(parts.query)}
+        job_at = next((i for i, s in enumerate(segs) if JOB_SEGMENT.match(s)), None)
+
+        if job_at is not None and job_at < len(segs) - 1:
+            add(0.3, 'under jobs path')
+        elif job_at is not None or not segs:
+            add(-0.4, 'listing index')
+        if segs and (UUID.match(segs[-1]) or re.search(r'\d{3,}', segs[-1])):
+            add(0.3, 'posting id')
+        elif ID_PARAMS & query.keys():
+            add(0.3, 'id parameter')
+        if segs and len(re.findall(r'[a-z]{2,}', segs[-1].lower())) >= 2 and ('-' in segs[-1] or '_' in segs[-1]):
+            add(0.15, 'title slug')
+        if any(NEGATIVE.search(s) for s in segs) or (NEGATIVE.search(text) and not ROLE_WORDS.search(text)):
+            add(-0.6, 'non-posting page')
+        if 'page' in query or re.search(r'/page/\d+', path):
+            add(-0.4, 'pagination')
+        if base_url and not same_site(url, base_url):
+            add(-0.2, 'off-site')
+
+        if text and not NAV_TEXT.match(text) and 2 <= len(text.split()) <= 12:
+            add(0.15, 'title-like anchor')
+            if ROLE_WORDS.search(text):
+                add(0.2, 'role in anchor')
+
+        with self._lock:
+            if path_shape(url) in self._patterns[host]:
+                add(PATTERN_BOOST, 'learned pattern')
+        return self._clamp(res)
+
+    @staticmethod
+    def _clamp(res: LinkScore) -> LinkScore:
+        res.score = round(min(1.0, max(0.0, res.score)), 2)
+        return res
+
+    def learn(self, scored: Iterable[LinkScore]) -> None:
+        """Remember path shapes that repeat among reasonably scored links."""
+        shapes = Counter(path_shape(s.url) for s in scored if s.score >= LEARN_SCORE)
+        with self._lock:
+            for shape, n in shapes.items():
+                if n >= self.min_repeat:
+                    host = shape.split('/', 1)[0]
+                    if shape not in self._patterns[host]:
+                        logger.debug(f"Learned job URL pattern {shape}")
+                    self._patterns[host].add(shape)
+
+    def classify(self, links: Iterable[Tuple[str, str]], base_url: Optional[str] = None
+                 ) -> Tuple[List[LinkScore], List[LinkScore]]:
+        """
+        Score one page's links, learn its repeated shapes, re-score, and split
+        into (accepted, rejected) at `threshold`. Duplicate URLs keep their
+        best anchor text.
+        """
+        best: Dict[str, str] = {}
+        for url, text in links:
+            if len(text or '') > len(best.get(url, '')) or url not in best:
+                best[url] = text or ''
+        first = [self.score(u, t, base_url) for u, t in best.items()]
+        self.learn(first)
+        scored = [self.score(u, t, base_url) for u, t in best.items()]
+        accepted = [s for s in scored if s.score >= self.threshold]
+        rejected = [s for s in scored if s.score < self.threshold]
+        return accepted, rejected
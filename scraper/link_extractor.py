@@ -1,68 +1,226 @@
-import time
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
-from typing import List, Set
 import re
+import time
+import logging
+import threading
+import xml.etree.ElementTree as ET
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlsplit
+from urllib.robotparser import RobotFileParser
+
+from scraper.fetcher import USER_AGENT, fetch, fetch_many
+from scraper.html_backend import extract_anchors, run_parse
+from scraper.job_classifier import JobLinkClassifier, LinkScore
+from scraper.urls import canonicalize, same_site
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+PAGINATION_TEXT = re.compile(r'^(?:next|>\>|\>|\»|\›)$', re.IGNORECASE)
+PAGINATION_HREF = re.compile(r'page[=/\-]?\d+', re.IGNORECASE)
+JOB_SITEMAP     = re.compile(r'job|career|position|vacanc|opening', re.IGNORECASE)
+# Listing query parameters that page or sort rather than filter the results.
+PAGING_PARAMS   = re.compile(r'^(?:page|p|pg|offset|start|from|sort|order)$', re.IGNORECASE)
+
+CRAWL_CONCURRENCY = 8           # listing pages fetched at once (per-host limits still apply)
+MAX_SITEMAPS      = 20          # sitemap files read per site, index children included
+
+_robots: Dict[str, Optional[RobotFileParser]] = {}
+_robots_lock = threading.Lock()
+_classifier  = JobLinkClassifier()      # learned URL shapes are shared across crawls
+
+
+def _robots_for(url: str, timeout: float) -> Optional[RobotFileParser]:
+    """Parsed robots.txt for the URL's site (cached per process); None if unavailable."""
+    parts = urlsplit(url)
+    root  = f"{parts.scheme}://{parts.netloc}"
+    with _robots_lock:
+        if root in _robots:
+            return _robots[root]
+    rp: Optional[RobotFileParser] = None
+    try:
+        resp = fetch(root + '/robots.txt', timeout=timeout)
+        if resp.ok:
+            rp = RobotFileParser(root + '/robots.txt')
+            rp.parse(resp.text.splitlines())
+    except Exception as e:
+        logger.debug(f"No robots.txt for {root}: {e}")
+    with _robots_lock:
+        _robots[root] = rp
+    return rp
+
+
+def _sitemap_locs(xml: str) -> Tuple[List[str], List[str]]:
+    """(page URLs, child sitemap URLs) listed in one sitemap document."""
+    try:
+        root = ET.fromstring(xml.encode('utf-8'))
+    except ET.ParseError:
+        return [], []
+    locs = [el.text.strip() for el in root.iter()
+            if el.tag.rsplit('}', 1)[-1] == 'loc' and (el.text or '').strip()]
+    if root.tag.endswith('sitemapindex'):
+        return [], locs
+    return locs, []
+
+
+def _is_filtered(url: str) -> bool:
+    """True when a listing URL narrows the results (team, location, keyword, …)."""
+    query = parse_qsl(urlsplit(canonicalize(url)).query, keep_blank_values=True)
+    return any(not PAGING_PARAMS.match(k) for k, _ in query)
+
+
+def _in_listing(url: str, listing: str) -> bool:
+    """True when `url` lives under the listing's path (all of the site for a root listing)."""
+    prefix = urlsplit(canonicalize(listing)).path.rstrip('/')
+    return not prefix or urlsplit(canonicalize(url)).path.startswith(prefix + '/')
+
+
+def sitemap_job_urls(start_url: str, timeout: float = 10,
+                     robots: Optional[RobotFileParser] = None,
+                     report: Optional[List[LinkScore]] = None) -> List[str]:
+    """
+    Job URLs listed in the site's sitemaps (those named in robots.txt, else
+    /sitemap.xml). Sitemap indexes are followed, job-looking children first,
+    up to MAX_SITEMAPS files. URLs go through the job-link classifier;
+    rejected ones are appended to `report`. Only URLs under the start page's
+    path count (all of the host for a root listing), so a sitemap covering
+    the whole company never stands in for one team's listing. URLs are
+    returned as the sitemap spells them, de-duplicated by canonical form.
+    """
+    parts = urlsplit(start_url)
+    root  = f"{parts.scheme}://{parts.netloc}"
+    queue: Deque[str] = deque((robots.site_maps() if robots else None) or [root + '/sitemap.xml'])
+    seen:  Set[str] = set()
+    found: Dict[str, str] = {}          # canonical → URL as listed
+
+    while queue and len(seen) < MAX_SITEMAPS:
+        sm = queue.popleft()
+        if sm in seen or sm.endswith('.gz'):
+            continue
+        seen.add(sm)
+        try:
+            resp = fetch(sm, timeout=timeout)
+            resp.raise_for_status()
+        except Exception as e:
+            logger.debug(f"Skipping sitemap {sm}: {e}")
+            continue
+        pages, children = _sitemap_locs(resp.text)
+        for child in children:
+            (queue.appendleft if JOB_SITEMAP.search(child) else queue.append)(child)
+        spelled = {}
+        for p in pages:
+            if same_site(p, start_url) and _in_listing(p, start_url):
+                spelled.setdefault(canonicalize(p), p)
+        accepted, rejected = _classifier.classify([(c, '') for c in spelled], base_url=start_url)
+        for s in accepted:
+            found.setdefault(s.url, spelled[s.url])
+        if report is not None:
+            report.extend(rejected)
+    return sorted(found.values())
+
 
 def extract_links(
     start_url: str,
     timeout: int = 10,
     delay: float = 0.5,
-    max_pages: int = 50
+    max_pages: int = 50,
+    use_sitemap: bool = True,
+    concurrency: int = CRAWL_CONCURRENCY,
+    report: Optional[List[LinkScore]] = None,
 ) -> List[str]:
     """
-    Crawl a careers listing starting at `start_url`, following static pagination links
-    to collect all job URLs. Heuristics for pagination anchors include:
-      - link text that’s a number (page indexes)
-      - link text ‘next’, ‘>’, ‘>>’, ‘›’, ‘»’
-      - href containing ‘page’ followed by digits
+    Collect all job URLs reachable from a careers listing at `start_url`.
 
-    Sleeps `delay` seconds between requests, and stops after `max_pages` pages.
-    """
-    visited_pages: Set[str] = set()
-    pages_to_visit: List[str] = [start_url]
-    job_urls: Set[str] = set()
-    page_count = 0
+    • With `use_sitemap`, the site's sitemaps are read first; if they list
+      job URLs under the listing's path those are returned and no
+      pagination walk is needed. Listings narrowed by a query (team,
+      location, keyword) are always crawled, since a sitemap can't apply
+      the filter.
+    • Otherwise the listing is crawled breadth-first, following pagination
+      anchors (numeric link text; 'next', '>', '>>', '›', '»'; or an href
+      containing 'page' + digits), `concurrency` pages at a time.
 
-    PAGINATION_TEXT = re.compile(r'^(?:next|>\>|\>|\»|\›)$', re.IGNORECASE)
-    PAGINATION_HREF = re.compile(r'page[=/\-]?\d+', re.IGNORECASE)
+    Only links the job-link classifier scores as postings are returned;
+    pass a list as `report` to receive the rejected ones (with scores and
+    reasons). URLs are de-duplicated by canonical form (tracking params,
+    fragments, trailing slashes) but fetched and returned as the page links
+    them, since some ATS/CMS pages need the exact spelling. robots.txt is
+    honoured, per-host politeness comes
+    from the shared fetcher, and `delay` (or the site's Crawl-delay, if
+    larger) is waited between rounds. Stops after `max_pages` listing pages.
+    """
+    robots = _robots_for(start_url, timeout)
+    if use_sitemap and not _is_filtered(start_url):
+        sitemap_rejected: List[LinkScore] = []
+        with metrics.timer('sitemap_seconds', domain=metrics.domain(start_url)):
+            jobs = sitemap_job_urls(start_url, timeout, robots, sitemap_rejected)
+        if jobs:
+            metrics.inc('job_links_total', len(jobs), source='sitemap', verdict='accepted',
+                        domain=metrics.domain(start_url))
+            logger.info(f"Found {len(jobs)} job URLs in sitemaps for {start_url}")
+            if report is not None:
+                report.extend(sitemap_rejected)
+            return jobs
 
-    while pages_to_visit and page_count < max_pages:
-        url = pages_to_visit.pop(0)
-        if url in visited_pages:
-            continue
-        visited_pages.add(url)
-        page_count += 1
+    def allowed(url: str) -> bool:
+        return robots is None or robots.can_fetch(USER_AGENT, url)
 
-        try:
-            resp = requests.get(url, timeout=timeout)
-            resp.raise_for_status()
-        except Exception as e:
-            print(f"⚠️ Warning: could not fetch {url}: {e}")
-            continue
+    crawl_delay = max(delay, (robots.crawl_delay(USER_AGENT) or 0) if robots else 0)
+    frontier: Deque[str] = deque([start_url])
+    queued:   Set[str] = {canonicalize(start_url)}
+    job_urls: Dict[str, str] = {}       # canonical → href as first linked
+    rejected: Dict[str, LinkScore] = {}
+    page_count = 0
 
-        soup = BeautifulSoup(resp.text, 'html.parser')
+    while frontier and page_count < max_pages:
+        wave = []
+        while frontier and len(wave) < min(concurrency, max_pages - page_count):
+            url = frontier.popleft()
+            if allowed(url):
+                wave.append(url)
+        if not wave:
+            break
+        page_count += len(wave)
 
-        for a in soup.find_all('a', href=True):
-            href = a['href']
-            if 'job' in href.lower():
-                full = href if href.startswith(('http://', 'https://')) else urljoin(url, href)
-                job_urls.add(full)
+        domain = metrics.domain(start_url)
+        with metrics.timer('listing_wave_seconds', domain=domain):
+            responses = fetch_many(wave, timeout=timeout)
+        for url, resp in zip(wave, responses):
+            if isinstance(resp, Exception) or not resp.ok:
+                reason = resp if isinstance(resp, Exception) else f"HTTP {resp.status}"
+                print(f"⚠️ Warning: could not fetch {url}: {reason}")
+                metrics.inc('listing_pages_total', outcome='error', domain=domain)
+                continue
+            metrics.inc('listing_pages_total', outcome='ok', domain=domain)
 
-        for a in soup.find_all('a', href=True):
-            href = a['href']
-            text = a.get_text(strip=True)
+            anchors = run_parse(extract_anchors, resp.text, resp.url)
+            spelled: Dict[str, str] = {}
+            for full, _ in anchors:
+                spelled.setdefault(canonicalize(full), full)
+            accepted, dropped = _classifier.classify(
+                [(canonicalize(full), text) for full, text in anchors], base_url=start_url)
+            metrics.inc('job_links_total', len(accepted), source='listing', verdict='accepted', domain=domain)
+            metrics.inc('job_links_total', len(dropped), source='listing', verdict='rejected', domain=domain)
+            for s in accepted:
+                job_urls.setdefault(s.url, spelled[s.url])
+            for s in dropped:
+                rejected.setdefault(s.url, s)
 
-            is_number = text.isdigit()
-            is_nav = bool(PAGINATION_TEXT.match(text))
-            is_href_page = bool(PAGINATION_HREF.search(href))
+            for full, text in anchors:
+                key          = canonicalize(full)
+                is_number    = text.isdigit()
+                is_nav       = bool(PAGINATION_TEXT.match(text))
+                is_href_page = bool(PAGINATION_HREF.search(full))
 
-            if is_number or is_nav or is_href_page:
-                full = href if href.startswith(('http://', 'https://')) else urljoin(url, href)
-                if full not in visited_pages and full not in pages_to_visit:
-                    pages_to_visit.append(full)
+                if (is_number or is_nav or is_href_page) and key not in queued:
+                    queued.add(key)
+                    frontier.append(full)
 
-        time.sleep(delay)
+        if frontier and crawl_delay:
+            time.sleep(crawl_delay)
 
-    return sorted(job_urls)
+    dropped = [s for u, s in rejected.items() if u not in job_urls]
+    logger.info(f"{start_url}: {len(job_urls)} job links kept, {len(dropped)} rejected")
+    if report is not None:
+        report.extend(dropped)
+    return sorted(job_urls.values())
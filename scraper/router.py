@@ -0,0 +1,181 @@
+import os
+import json
+import atexit
+import logging
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from scraper.ats import fetch_ats
+from scraper.content import clean_text
+from scraper.http_cache import get_http_cache
+from scraper import static_scraper
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+ROUTES_PATH     = os.getenv("ROUTES_PATH", "data/routes.json")
+MIN_TEXT_CHARS  = 200            # static text shorter than this means "needs a browser"
+MIN_SAMPLES     = 3              # static attempts before a domain can be routed to the browser
+DYNAMIC_SHARE   = 0.6            # ...and the share of them that must have come back thin
+MAX_SAMPLES     = 20             # older observations are halved away past this
+PROBE_EVERY     = 25             # retry static on a browser domain every N of its URLs
+USE_DYNAMIC     = os.getenv("DYNAMIC_SCRAPE", "1") != "0"
+
+
+@dataclass
+class Page:
+    url: str
+    html: str
+    text: str
+    unchanged: bool = False                     # 304, or same text as last crawl (see _unchanged)
+    route: str = 'static'                       # 'static', 'dynamic' or 'ats'
+    known: Dict[str, str] = field(default_factory=dict)
+
+
+class RouteTable:
+    """
+    Per-domain memory of whether plain HTTP fetching yields enough text.
+
+    Every static attempt is recorded as ok or thin; once a domain has
+    `min_samples` attempts and at least `dynamic_share` of them were thin,
+    its URLs go straight to the browser. Counts are capped at MAX_SAMPLES so
+    the table follows sites that change, and browser domains are re-probed
+    with a static fetch every PROBE_EVERY URLs. The table is a small JSON
+    file, saved at exit.
+    """
+
+    def __init__(self, path: str = ROUTES_PATH,
+                 min_samples: int = MIN_SAMPLES, dynamic_share: float = DYNAMIC_SHARE):
+        self.path          = path
+        self.min_samples   = min_samples
+        self.dynamic_share = dynamic_share
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._routed: Counter = Counter()
+        self._dirty = False
+        self._lock  = threading.Lock()
+        try:
+            with open(path, encoding='utf-8') as f:
+                self._stats = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable route table {path}: {e}")
+
+    @staticmethod
+    def _domain(url: str) -> str:
+        return (urlsplit(url).hostname or '').lower()
+
+    def choose(self, url: str) -> str:
+        """'static' or 'dynamic' for this URL."""
+        domain = self._domain(url)
+        with self._lock:
+            s = self._stats.get(domain)
+            if not s:
+                return 'static'
+            tries = s['ok'] + s['thin']
+            if tries < self.min_samples or s['thin'] < tries * self.dynamic_share:
+                return 'static'
+            self._routed[domain] += 1
+            return 'static' if self._routed[domain] % PROBE_EVERY == 0 else 'dynamic'
+
+    def record(self, url: str, static_ok: bool) -> None:
+        domain = self._domain(url)
+        with self._lock:
+            s = self._stats.setdefault(domain, {'ok': 0, 'thin': 0})
+            s['ok' if static_ok else 'thin'] += 1
+            if s['ok'] + s['thin'] > MAX_SAMPLES:
+                s['ok'], s['thin'] = s['ok'] // 2, s['thin'] // 2
+            self._dirty = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            data, self._dirty = json.dumps(self._stats, indent=1, sort_keys=True), False
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp, self.path)
+
+
+_routes: Optional[RouteTable] = None
+_routes_lock = threading.Lock()
+_no_browser  = False                    # Playwright failed to import; stop trying
+
+
+def get_routes() -> RouteTable:
+    global _routes
+    with _routes_lock:
+        if _routes is None:
+            _routes = RouteTable()
+            atexit.register(_routes.save)
+        return _routes
+
+
+def _render(url: str, timeout: float):
+    """(html, text) from the browser pool; None if Playwright is missing or rendering fails."""
+    global _no_browser
+    if _no_browser:
+        return None
+    try:
+        from scraper import dynamic_scraper     # imports Playwright; only when needed
+    except ImportError as e:
+        logger.warning(f"Dynamic scraping unavailable ({e}); using static text only")
+        _no_browser = True
+        return None
+    try:
+        return dynamic_scraper.scrape_page(url, timeout=timeout)
+    except Exception as e:
+        logger.warning(f"Rendering failed for {url}: {e}")
+        return None
+
+
+def _unchanged(url: str, text: str) -> bool:
+    """Whether ATS/browser text matches the last crawl's; these routes have no 304 to go by."""
+    cache = get_http_cache()
+    return bool(text) and cache is not None and cache.store_extracted(url, text)
+
+
+def fetch_page(url: str, timeout: float = 10, render_timeout: float = 30) -> Page:
+    """
+    Scrapes `url` the cheapest way that works:
+
+    • ATS postings (Greenhouse, Lever, SmartRecruiters, Ashby) via their JSON API
+    • domains the route table knows need JavaScript straight in the browser
+    • everything else with a static fetch, falling back to the browser when
+      the text comes back thin, which also teaches the route table
+
+    `unchanged` is set from the server's 304 on static fetches and by
+    comparing the extracted text with the cached copy on the other routes.
+    """
+    ats = fetch_ats(url, timeout=timeout)
+    if ats is not None:
+        text, known = ats
+        text = clean_text(text)
+        return Page(url, '', text, unchanged=_unchanged(url, text), route='ats', known=known)
+
+    routes  = get_routes()
+    browser = USE_DYNAMIC
+    if browser and routes.choose(url) == 'dynamic':
+        rendered = _render(url, render_timeout)
+        if rendered is not None:
+            return Page(url, rendered[0], rendered[1], unchanged=_unchanged(url, rendered[1]),
+                        route='dynamic')
+        browser = False                         # just failed; don't render twice
+
+    html, text, unchanged = static_scraper.scrape_page(url, timeout=timeout)
+    thin = not unchanged and len(text) < MIN_TEXT_CHARS
+    if not unchanged:
+        routes.record(url, not thin)
+    if thin:
+        metrics.inc('thin_pages_total', domain=metrics.domain(url))
+    if thin and browser:
+        rendered = _render(url, render_timeout)
+        if rendered is not None and len(rendered[1]) > len(text):
+            return Page(url, rendered[0], rendered[1], unchanged=_unchanged(url, rendered[1]),
+                        route='dynamic')
+    return Page(url, html, text, unchanged=unchanged)
@@ -0,0 +1,267 @@
+import re
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+from bs4 import BeautifulSoup
+from scraper.html_backend import make_soup
+
+from gemini.parser import FIELDS
+from utils.validators import ALLOWED
+
+logger = logging.getLogger(__name__)
+
+# Fields Gemini is allowed to leave blank or default; a record is complete
+# without them.
+OPTIONAL_FIELDS = {'officeType', 'visa', 'benefits', 'currency', 'salaryLow', 'salaryHigh'}
+DEFAULTS        = {'officeType': 'Hybrid', 'visa': 'No'}
+
+EMPLOYMENT_TYPES = {
+    'FULL_TIME':  'Full-Time',
+    'PART_TIME':  'Part-Time',
+    'CONTRACTOR': 'Contract',
+    'TEMPORARY':  'Temporary',
+    'PER_DIEM':   'Temporary',
+    'INTERN':     'Full-Time',
+}
+
+CURRENCY_SYMBOLS = {
+    'USD': '$', 'CAD': '$', 'AUD': '$', 'SGD': '$', 'NZD': '$', 'HKD': '$',
+    'EUR': '€', 'GBP': '£', 'INR': '₹', 'JPY': '¥', 'CNY': '¥',
+    'KRW': '₩', 'PHP': '₱', 'PLN': 'zł', 'CHF': 'CHF', 'BRL': 'R$',
+}
+
+COUNTRY_CODES = {
+    'US': 'United States', 'USA': 'United States', 'GB': 'United Kingdom',
+    'UK': 'United Kingdom', 'IN': 'India', 'CA': 'Canada', 'AU': 'Australia',
+    'DE': 'Germany', 'FR': 'France', 'ES': 'Spain', 'IT': 'Italy',
+    'NL': 'Netherlands', 'IE': 'Ireland', 'SG': 'Singapore', 'JP': 'Japan',
+    'CN': 'China', 'BR': 'Brazil', 'MX': 'Mexico', 'AR': 'Argentina',
+    'PL': 'Poland', 'HU': 'Hungary', 'PH': 'Philippines', 'LK': 'Sri Lanka',
+    'AE': 'United Arab Emirates', 'CH': 'Switzerland', 'SE': 'Sweden',
+}
+
+
+# ---------------------------------------------------------------- extraction
+
+def _is_jobposting(obj: Dict) -> bool:
+    t = obj.get('@type') or obj.get('type') or ''
+    types = t if isinstance(t, list) else [t]
+    return any(str(x).rsplit('/', 1)[-1] == 'JobPosting' for x in types)
+
+
+def _walk_jsonld(node: Any, found: List[Dict]) -> None:
+    if isinstance(node, list):
+        for n in node:
+            _walk_jsonld(n, found)
+    elif isinstance(node, dict):
+        if _is_jobposting(node):
+            found.append(node)
+        elif '@graph' in node:
+            _walk_jsonld(node['@graph'], found)
+
+
+def _jsonld_postings(soup: BeautifulSoup) -> List[Dict]:
+    found: List[Dict] = []
+    for script in soup.find_all('script', type=re.compile(r'ld\+json', re.I)):
+        raw = script.string or script.get_text() or ''
+        try:
+            data = json.loads(raw.strip(), strict=False)
+        except ValueError:
+            logger.debug("Skipping unparsable JSON-LD block")
+            continue
+        _walk_jsonld(data, found)
+    return found
+
+
+def _microdata_value(tag) -> Any:
+    if tag.has_attr('itemscope'):
+        return _microdata_item(tag)
+    for attr in ('content', 'datetime', 'href', 'src', 'value'):
+        if tag.has_attr(attr):
+            return tag[attr]
+    return tag.get_text(' ', strip=True)
+
+
+def _microdata_item(scope) -> Dict:
+    """Turn one itemscope element into a JSON-LD-shaped dict."""
+    item: Dict[str, Any] = {'@type': scope.get('itemtype', '')}
+    for tag in scope.find_all(attrs={'itemprop': True}):
+        # only direct properties: skip those owned by a nested itemscope
+        owner = tag.find_parent(attrs={'itemscope': True})
+        if owner is not scope:
+            continue
+        for prop in tag['itemprop'].split():
+            item.setdefault(prop, _microdata_value(tag))
+    return item
+
+
+def _microdata_postings(soup: BeautifulSoup) -> List[Dict]:
+    return [
+        _microdata_item(scope)
+        for scope in soup.find_all(attrs={'itemscope': True, 'itemtype': True})
+        if _is_jobposting({'@type': scope['itemtype']})
+    ]
+
+
+# ------------------------------------------------------------------- mapping
+
+def _first(val: Any) -> Any:
+    return val[0] if isinstance(val, list) and val else val
+
+
+def _text(val: Any) -> str:
+    val = _first(val)
+    if isinstance(val, dict):
+        val = val.get('name') or val.get('@value') or ''
+    return re.sub(r'\s+', ' ', str(val or '')).strip()
+
+
+def _number(val: Any) -> str:
+    try:
+        f = float(str(val).replace(',', ''))
+    except (TypeError, ValueError):
+        return ''
+    return str(int(f)) if f.is_integer() else str(f)
+
+
+def _country(val: Any) -> str:
+    name = _text(val)
+    if len(name) <= 3 and name.isalpha():
+        return COUNTRY_CODES.get(name.upper(), '')   # unknown code → let Gemini decide
+    return name
+
+
+def _experience_level(posting: Dict, is_intern: bool) -> str:
+    if is_intern:
+        return 'Intern'
+    req = _first(posting.get('experienceRequirements'))
+    months = None
+    if isinstance(req, dict) and req.get('monthsOfExperience') is not None:
+        try:
+            months = float(req['monthsOfExperience'])
+        except (TypeError, ValueError):
+            pass
+    elif isinstance(req, str):
+        m = re.search(r'(\d+)\s*\+?\s*(?:-\s*\d+\s*)?years?', req, re.I)
+        if m:
+            months = int(m.group(1)) * 12
+    if months is None:
+        return ''
+    if months <= 24:
+        return 'Entry-Level'
+    if months <= 60:
+        return 'Associate/Mid-Level'
+    return 'Senior-Level'
+
+
+def _list_field(val: Any) -> str:
+    items = val if isinstance(val, list) else re.split(r'[,;\n]', str(val or ''))
+    return ', '.join(_text(i) for i in items if _text(i))
+
+
+_INDUSTRIES = {i.lower(): i for i in ALLOWED['industries']}
+
+
+def _industries(val: Any) -> str:
+    items = [i.strip() for i in _list_field(val).split(',') if i.strip()]
+    # anything outside ALLOWED is left to Gemini; validate_record would
+    # otherwise fuzzy-match it to whatever choice comes first
+    if items and all(i.lower() in _INDUSTRIES for i in items):
+        return ', '.join(_INDUSTRIES[i.lower()] for i in items)
+    return ''
+
+
+def _benefits(val: Any) -> str:
+    items = [i.strip() for i in _list_field(val).split(',') if i.strip()]
+    # only accept the short "Health Insurance, Paid Leave" shape the prompt asks for
+    if 0 < len(items) <= 4 and all(len(i.split()) <= 3 for i in items):
+        return ', '.join(items)
+    return ''
+
+
+def _map_posting(posting: Dict, url: str) -> Dict[str, str]:
+    rec: Dict[str, str] = {}
+    rec['title']   = _text(posting.get('title') or posting.get('name'))
+    rec['company'] = _text(posting.get('hiringOrganization'))
+
+    loc     = _first(posting.get('jobLocation')) or {}
+    address = loc.get('address', loc) if isinstance(loc, dict) else {}
+    if isinstance(address, dict):
+        rec['city']    = _text(address.get('addressLocality'))
+        rec['country'] = _country(address.get('addressCountry'))
+
+    if 'TELECOMMUTE' in str(posting.get('jobLocationType', '')).upper():
+        rec['officeType'] = 'Remote-Anywhere' if not posting.get('jobLocation') else 'Remote'
+
+    emp_types = posting.get('employmentType') or []
+    emp_types = [str(e).upper().replace('-', '_').replace(' ', '_')
+                 for e in (emp_types if isinstance(emp_types, list) else [emp_types])]
+    is_intern = 'INTERN' in emp_types or bool(re.search(r'\bintern(ship)?\b', rec['title'], re.I))
+    for e in emp_types:
+        if e in EMPLOYMENT_TYPES:
+            rec['employmentType'] = EMPLOYMENT_TYPES[e]
+            break
+
+    rec['experienceLevel'] = _experience_level(posting, is_intern)
+    rec['industries']      = _industries(posting.get('industry'))
+    rec['skills']          = _list_field(posting.get('skills'))
+    rec['benefits']        = _benefits(posting.get('jobBenefits'))
+
+    salary = posting.get('baseSalary') or posting.get('estimatedSalary')
+    salary = _first(salary)
+    if isinstance(salary, dict):
+        code  = _text(salary.get('currency')).upper()
+        rec['currency'] = CURRENCY_SYMBOLS.get(code, '')
+        value = salary.get('value')
+        if isinstance(value, dict):
+            rec['salaryLow']  = _number(value.get('minValue') or value.get('value'))
+            rec['salaryHigh'] = _number(value.get('maxValue') or value.get('value'))
+        elif value is not None:
+            rec['salaryLow'] = rec['salaryHigh'] = _number(value)
+
+    rec = {k: v for k, v in rec.items() if k in FIELDS and v}
+    if rec:
+        rec['url'] = url
+        rec['j/i'] = 'i' if is_intern else 'j'
+    return rec
+
+
+# -------------------------------------------------------------------- public
+
+def extract_jobposting_schema(url: str, html: str) -> Dict[str, str]:
+    """
+    Reads schema.org JobPosting data (JSON-LD first, then microdata) from a page
+    and maps it onto `gemini.parser.FIELDS`.
+
+    Returns only the fields the page actually provides (plus `url` and `j/i`),
+    or {} when there is no usable JobPosting.
+    """
+    if not html or 'JobPosting' not in html:
+        return {}
+    postings = _jsonld_postings(make_soup(html, only='script'))
+    if not postings and 'itemtype' in html:
+        postings = _microdata_postings(make_soup(html))
+    for posting in postings:
+        rec = _map_posting(posting, url)
+        if rec:
+            return rec
+    return {}
+
+
+def missing_fields(rec: Dict[str, str]) -> List[str]:
+    """FIELDS that Gemini still has to fill for `rec`."""
+    return [f for f in FIELDS if not rec.get(f) and f not in OPTIONAL_FIELDS]
+
+
+def complete_record(rec: Dict[str, str]) -> Optional[Dict[str, str]]:
+    """
+    If `rec` has every required field, return a full record (defaults and
+    blanks filled in, ready for validate_record); otherwise None.
+    """
+    if missing_fields(rec):
+        return None
+    full = {f: rec.get(f) or DEFAULTS.get(f, '') for f in FIELDS}
+    full['url'] = rec['url']
+    full['j/i'] = rec.get('j/i', 'j')
+    return full
@@ -1,17 +1,46 @@
-import requests
-from bs4 import BeautifulSoup
+from scraper.fetcher import fetch
+from scraper.http_cache import get_http_cache
+from scraper.content import extract_content, extract_main_text, clean_text
+from scraper.html_backend import run_parse
+from utils.metrics import metrics
 
-def scrape(url, timeout=10):
+def html_to_text(html):
     """
-    Fetches a URL and returns the main text content.
+    Returns the main text content of an HTML document.
     """
-    resp = requests.get(url, timeout=timeout)
-    resp.raise_for_status()
-    soup = BeautifulSoup(resp.text, 'html.parser')
+    return extract_main_text(html)
 
-    for tag in soup.find_all(['nav', 'footer']):
-        tag.decompose()
+def scrape_page(url, timeout=10):
+    """
+    Fetches a URL and returns (raw_html, main_text, unchanged).
+
+    `unchanged` is True when the server answered 304 Not Modified; the cached
+    text is reused then, so the HTML is not parsed again.
+    """
+    domain = metrics.domain(url)
+    with metrics.timer('fetch_seconds', route='static', domain=domain):
+        try:
+            resp = fetch(url, timeout=timeout)
+            resp.raise_for_status()
+        except Exception:
+            metrics.inc('pages_total', route='static', outcome='error', domain=domain)
+            raise
+    cache = get_http_cache()
+    if resp.from_cache:
+        entry = cache.get(url)
+        if entry and entry['text'] is not None:
+            metrics.inc('pages_total', route='static', outcome='unchanged', domain=domain)
+            return resp.text, entry['text'], True
+    with metrics.timer('extract_seconds', route='static'):
+        main, template = run_parse(extract_content, resp.text)
+        text = clean_text(main, template=template)
+    metrics.inc('pages_total', route='static', outcome='ok', domain=domain)
+    if cache is not None:
+        cache.store_text(url, text)
+    return resp.text, text, resp.from_cache
 
-    container = soup.find(['main', 'article'])
-    text = container.get_text(separator='\n', strip=True) if container else soup.get_text(separator='\n', strip=True)
-    return text
+def scrape(url, timeout=10):
+    """
+    Fetches a URL and returns the main text content.
+    """
+    return scrape_page(url, timeout=timeout)[1]
@@ -0,0 +1,38 @@
+from scraper.content import clean_text, extract_content
+
+NAV = '<nav><a href="/">Home</a><a href="/jobs">Search jobs</a></nav>'
+FOOTER = '<footer><p>© EY 2025. All rights reserved.</p><p>Privacy notice</p></footer>'
+
+
+def _page(body: str) -> str:
+    return f'<html><body>{NAV}<main>{body}</main>{FOOTER}</body></html>'
+
+
+def test_repeated_postings_keep_title_and_requirements():
+    with open('sample_job.txt', encoding='utf-8') as f:
+        sample = f.read()
+    body = ''.join(f'<p>{line}</p>' for line in sample.splitlines() if line.strip())
+    # the footer copy rendered again inside <main> is chrome and goes
+    body += '<p>© EY 2025. All rights reserved.</p>'
+    html = _page(body)
+
+    outputs = []
+    for _ in range(12):                           # one employer's pages, one after another
+        main, template = extract_content(html)
+        outputs.append(clean_text(main, max_tokens=10**6, template=template))
+
+    assert len(set(outputs)) == 1                 # same page, same text, in any order
+    text = outputs[-1]
+    for line in ('Supervising Associate – Global Delivery Services (GDS) Data Protection Compliance Specialist',
+                 'Job Rank : Supervising Associate',
+                 'Sub Function : Data Protection',
+                 'What we look for',
+                 'Basic knowledge of project management tools and methodologies'):
+        assert line in text
+    assert 'All rights reserved' not in text
+    assert 'Search jobs' not in text
+
+
+if __name__ == '__main__':
+    test_repeated_postings_keep_title_and_requirements()
+    print('✅ ok')
@@ -0,0 +1,21 @@
+from scraper.http_cache import HttpCache
+
+
+def test_extracted_text_is_unchanged_only_when_identical(tmp_path):
+    cache = HttpCache(str(tmp_path / 'http.sqlite'))
+    url = 'https://boards.greenhouse.io/acme/jobs/1'
+    assert not cache.store_extracted(url, 'Engineer\nLondon')
+    cache.store_record(url, {'url': url, 'title': 'Engineer'})
+    assert cache.store_extracted(url, 'Engineer\nLondon')
+    assert cache.get(url)['record'] == {'url': url, 'title': 'Engineer'}
+    assert not cache.store_extracted(url, 'Engineer\nParis')
+    assert cache.get(url)['record'] is None         # the old record belonged to the old text
+
+
+def test_extracted_text_replaces_a_static_entry(tmp_path):
+    cache = HttpCache(str(tmp_path / 'http.sqlite'))
+    url = 'https://acme.test/jobs/1'
+    cache.store_response(url, '<html>thin</html>', '"v1"', None)
+    cache.store_text(url, 'thin')
+    assert not cache.store_extracted(url, 'rendered text')
+    assert cache.validators(url) == {}                # no stale 304 for the rendered copy
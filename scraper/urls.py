@@ -0,0 +1,54 @@
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track where a click came from; the page is the
+# same with or without them.
+TRACKING_PARAMS = {
+    'gclid', 'fbclid', 'msclkid', 'dclid', 'yclid', 'mc_cid', 'mc_eid',
+    '_hsenc', '_hsmi', '_ga', '_gl', 'ref', 'referrer', 'source', 'src',
+    'trk', 'trackingid', 'gh_src', 'lever-source', 'lever-origin',
+}
+TRACKING_PREFIXES = ('utm_',)
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+SESSION_ID    = re.compile(r';jsessionid=[^/?#]*', re.I)
+
+
+def _is_tracking(key: str) -> bool:
+    key = key.lower()
+    return key in TRACKING_PARAMS or key.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize(url: str) -> str:
+    """
+    One spelling per page, so the crawler and the pipeline see duplicates:
+
+    • scheme and host lower-cased, default port dropped
+    • fragment, session ids and tracking parameters (utm_*, gclid, …) dropped
+    • remaining query parameters sorted
+    • trailing slash removed (except for the bare root)
+    """
+    parts  = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host   = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    if parts.username:
+        host = f"{parts.username}@{host}"
+
+    path = SESSION_ID.sub('', parts.path) or '/'
+    path = re.sub(r'/{2,}', '/', path)
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if not _is_tracking(k))
+    return urlunsplit((scheme, host, path, urlencode(query), ''))
+
+
+def same_site(url: str, other: str) -> bool:
+    """True when both URLs are on the same host (ignoring a leading `www.`)."""
+    def host(u: str) -> str:
+        h = (urlsplit(u).hostname or '').lower()
+        return h[4:] if h.startswith('www.') else h
+    return host(url) == host(other)
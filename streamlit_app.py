@@ -4,21 +4,109 @@ if sys.platform.startswith("win"):
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
 import os
-import csv
 import tempfile
-from concurrent.futures import ThreadPoolExecutor, as_completed  # ➜ added
+import threading
 
-import pandas as pd
 import streamlit as st
 
-from scraper.static_scraper import scrape as static_scrape
-from scraper.dynamic_scraper import scrape as dynamic_scrape
-from scraper.link_extractor import extract_links
-from gemini.parser import parse_batch
-from utils.validators import validate_record
+# Streamlit re-runs this script on every widget interaction: the scraping
+# and Gemini stacks (and pandas) are imported where they are first needed,
+# and the scrape itself runs on a background thread owned by the session.
+
+REFRESH_SECONDS = 1.0            # how often the live results are redrawn during a run
+LINKS_TTL       = 3600           # seconds discovered links are reused for a careers page
+
+
+@st.cache_resource
+def gemini():
+    """gemini.parser with its key pool and clients built, once per server process."""
+    from gemini import parser
+    parser.get_keys()
+    return parser
+
+
+@st.cache_data(ttl=LINKS_TTL, show_spinner="Discovering job links…")
+def discover(careers_page: str):
+    """Job links on a careers page and the links rejected, cached per URL."""
+    from scraper.link_extractor import extract_links
+    rejected = []
+    urls = extract_links(careers_page, report=rejected)
+    return urls, [{'url': r.url, 'text': r.text, 'score': r.score, 'reasons': ', '.join(r.reasons)}
+                  for r in rejected]
+
+
+class ScrapeRun:
+    """
+    One scrape of `urls` through app.run_pipeline on a background thread.
+
+    • Records are collected as the writer lands them, in a compact
+      utils.records.RecordTable, so the page can show them while the run
+      continues without re-reading the output file.
+    • `cancel` stops scraping new URLs; batches in flight still finish.
+    • `start(resume=True)` continues a cancelled run from the job store
+      checkpoint, skipping URLs already written.
+    """
+
+    def __init__(self, urls):
+        from utils.records import RecordTable
+        self.urls    = urls
+        workdir      = tempfile.mkdtemp(prefix="jobscraper-ui-")
+        self.output  = os.path.join(workdir, "jobs_output.csv")
+        self.raw     = os.path.join(workdir, "raw_batches.txt")
+        self.records = RecordTable()
+        self._wanted = set(urls)
+        self._done   = set()                 # URLs finished, with or without a record
+        self.stats   = {}
+        self.error   = None
+        self._stop   = threading.Event()
+        self._lock   = threading.Lock()
+        self._thread = None
+        self._frame  = None                  # last to_frame() result, reused until rows arrive
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def done(self) -> int:
+        """URLs finished so far; a resumed run finishing one again does not count twice."""
+        with self._lock:
+            return len(self._done)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._stop.is_set()
+
+    def start(self, resume: bool = False) -> None:
+        self._stop.clear()
+        self.error   = None
+        self._thread = threading.Thread(target=self._run, args=(resume,), name="ui-run", daemon=True)
+        self._thread.start()
+
+    def cancel(self) -> None:
+        self._stop.set()
+
+    def _run(self, resume: bool) -> None:
+        import app
+        try:
+            self.stats = app.run_pipeline(self.urls, self.output, resume=resume, stop=self._stop,
+                                          on_progress=self._progress, raw_path=self.raw)
+        except Exception as e:
+            self.error = e
+
+    def _progress(self, records, skipped) -> None:
+        with self._lock:
+            self.records.extend(records)
+            self._done.update(u for u in [*(r.get('url') for r in records), *skipped]
+                              if u in self._wanted)
+
+    def snapshot(self):
+        """(DataFrame of the records so far, URLs finished)."""
+        with self._lock:
+            if self._frame is None or len(self._frame) != len(self.records):
+                self._frame = self.records.to_frame()
+            return self._frame, len(self._done)
 
-BATCH_SIZE   = 10  
-MAX_WORKERS  = 10    
 
 st.set_page_config(page_title="Job Scraper", layout="wide")
 st.title("🧾 Career Page Job Scraper")
@@ -30,117 +118,91 @@ careers_page = st.text_input(
 
 urls = None
 if careers_page:
+    import pandas as pd
     try:
-        urls = extract_links(careers_page)
-        st.success(f"✅ Discovered {len(urls)} job posting URLs from `{careers_page}`")
+        urls, rejected = discover(careers_page)
     except Exception as e:
         st.error(f"Failed to extract job links from `{careers_page}`: {e}")
         st.stop()
+    st.success(f"✅ Discovered {len(urls)} job posting URLs from `{careers_page}`")
+    if rejected:
+        with st.expander(f"Skipped {len(rejected)} non-job links"):
+            st.dataframe(pd.DataFrame(rejected))
 else:
     uploaded = st.file_uploader("Upload your CSV (must have a column 'url')", type="csv")
     if not uploaded:
         st.info("Please upload a CSV or enter a careers page URL above.")
         st.stop()
+    import pandas as pd
     df_in = pd.read_csv(uploaded)
     if 'url' not in df_in.columns:
         st.error("Input CSV must contain a column named `url`.")
         st.stop()
     urls = df_in['url'].dropna().unique().tolist()
     st.success(f"✅ Loaded {len(urls)} unique URLs from CSV")
-
-total = len(urls)
-
-if st.button("Run Scraper"):
-    tmp_txt = tempfile.NamedTemporaryFile(delete=False, suffix=".txt")
-    tmp_csv = tempfile.NamedTemporaryFile(delete=False, suffix=".csv")
-    tmp_txt.close()
-    tmp_csv.close()
-
-    fieldnames = [
-        'title', 'company', 'city', 'country', 'officeType', 'experienceLevel',
-        'employmentType', 'industries', 'visa', 'benefits', 'skills', 'url', 'j/i',
-        'currency', 'salaryLow', 'salaryHigh'
-    ]
-    out_f = open(tmp_csv.name, 'w', newline='', encoding='utf-8')
-    writer = csv.DictWriter(out_f, fieldnames=fieldnames)
-    writer.writeheader()
-
-    progress = st.progress(0.0)
-    batch, futures = [], []
-
-    executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
-
-    for idx, url in enumerate(urls, start=1):
-        st.write(f"🔍 [{idx}/{total}] Processing {url}")
-
-        if st.checkbox(f"▶️ Expand links on {url}", key=f"expand_{idx}"):
+    if st.checkbox("▶️ These are careers pages: discover the job links on each"):
+        expanded = []
+        for url in urls:
             try:
-                sub_urls = extract_links(url)
-                st.write(f"    • Found {len(sub_urls)} sub-URLs")
+                expanded += discover(url)[0]
             except Exception as e:
                 st.warning(f"    • Link extraction failed for {url}: {e}")
-                sub_urls = []
-        else:
-            sub_urls = [url]
+        urls = list(dict.fromkeys(expanded))
+        st.write(f"    • Found {len(urls)} job posting URLs")
 
-        for u in sub_urls:
-            try:
-                text = static_scrape(u)
-                if not text or len(text) < 200:
-                    text = dynamic_scrape(u)
-            except Exception as e:
-                st.warning(f"    ⚠️ Scrape failed for {u}: {e}")
-                text = ""
-            batch.append({'text': text, 'url': u, 'j/i': idx})
-
-            if len(batch) == BATCH_SIZE:
-                fut = executor.submit(
-                    parse_batch,
-                    [b['text'] for b in batch],
-                    [b['url']  for b in batch],
-                    [b['j/i']  for b in batch],
-                )
-                futures.append(fut)
-                batch = []
-                progress.progress(min(1.0, idx / total))
-
-    if batch:
-        fut = executor.submit(
-            parse_batch,
-            [b['text'] for b in batch],
-            [b['url']  for b in batch],
-            [b['j/i']  for b in batch],
-        )
-        futures.append(fut)
-
-    completed = 0
-    for fut in as_completed(futures):
-        recs = fut.result()
-        cleaned = [validate_record(r) for r in recs]
-        for r in cleaned:
-            writer.writerow(r)
-        completed += 1
-        progress.progress(min(1.0, completed / len(futures)))
-
-    out_f.close()
-    executor.shutdown(wait=True)
-
-    st.success("✅ Scraping & parsing complete!")
-    df_out = pd.read_csv(tmp_csv.name)
-    st.dataframe(df_out, use_container_width=True)
-
-    st.download_button(
-        label="📥 Download Results CSV",
-        data=open(tmp_csv.name, 'rb').read(),
-        file_name="jobs_output.csv",
-        mime="text/csv"
-    )
-
-    st.write("---")
-
-    st.download_button(
-        label="📥 Download Raw Batches (txt)",
-        data=open(tmp_txt.name, 'rb').read(),
-        file_name="raw_batches.txt",
-        mime="text/plain"
-    )
+run = st.session_state.get("run")
+
+col_run, col_cancel, col_resume = st.columns(3)
+if col_run.button("Run Scraper", disabled=run is not None and run.running):
+    try:
+        gemini()
+    except RuntimeError as e:
+        st.error(f"Gemini is not configured: {e}")
+        st.stop()
+    run = st.session_state["run"] = ScrapeRun(urls)
+    run.start()
+if run is not None:
+    if col_cancel.button("⏹️ Cancel", disabled=not run.running or run.cancelled):
+        run.cancel()
+    if col_resume.button("⏯️ Resume", disabled=run.running or run.done >= len(run.urls)):
+        run.start(resume=True)
+
+
+@st.fragment(run_every=REFRESH_SECONDS if run is not None and run.running else None)
+def live_results():
+    """Redraws progress and the results so far without re-running the page."""
+    run = st.session_state.get("run")
+    if run is None:
+        return
+    if not run.running and st.session_state.get("live"):
+        st.session_state["live"] = False
+        st.rerun()                           # stop the timer and refresh the buttons
+    st.session_state["live"] = run.running
+
+    frame, done = run.snapshot()
+    total = len(run.urls)
+    if run.running:
+        state = "⏹️ Stopping after the batches in flight…" if run.cancelled else "🔄 Scraping…"
+    elif run.error is not None:
+        state = f"❌ Run failed: {run.error}"
+    elif done < total:
+        state = "⏸️ Cancelled — press Resume to continue"
+    else:
+        state = "✅ Scraping & parsing complete!"
+    st.progress(min(1.0, done / total) if total else 1.0,
+                text=f"{state}  {done}/{total} URLs, {len(frame)} records")
+    if len(frame):
+        st.dataframe(frame, width="stretch")
+
+    if not run.running and os.path.exists(run.output):
+        with open(run.output, 'rb') as f:
+            st.download_button(label="📥 Download Results CSV", data=f.read(),
+                               file_name="jobs_output.csv", mime="text/csv")
+        st.write("---")
+        if os.path.exists(run.raw):
+            with open(run.raw, 'rb') as f:
+                st.download_button(label="📥 Download Raw Batches (txt)", data=f.read(),
+                                   file_name="raw_batches.txt", mime="text/plain")
+
+
+live_results()
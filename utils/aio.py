@@ -0,0 +1,41 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Optional
+
+
+class BackgroundLoop:
+    """
+    An asyncio event loop running forever in a daemon thread.
+
+    Lets synchronous code (scrapers, worker threads, Streamlit callbacks) share
+    one loop and everything bound to it — connection pools, browsers — by
+    submitting coroutines with `run()`.
+    """
+
+    def __init__(self, name: str = "aio-loop"):
+        self._name   = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock   = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                ready = threading.Event()
+
+                def _run():
+                    self._loop = asyncio.new_event_loop()
+                    asyncio.set_event_loop(self._loop)
+                    ready.set()
+                    self._loop.run_forever()
+
+                self._thread = threading.Thread(target=_run, name=self._name, daemon=True)
+                self._thread.start()
+                ready.wait()
+        return self._loop
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """Run `coro` on the background loop and block until it finishes."""
+        fut = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        return fut.result(timeout)
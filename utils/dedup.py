@@ -0,0 +1,258 @@
+import re
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict, defaultdict
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    import numpy as np           # imported on use, like pandas in utils.validators
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM     = 128               # MinHash signature length
+BANDS        = 32                # LSH bands of NUM_PERM // BANDS rows each
+SHINGLE      = 3                 # words per shingle
+SIMILARITY   = float(os.getenv("DEDUP_SIMILARITY", "0.85"))   # estimated Jaccard to count as a duplicate
+MIN_WORDS    = 50                # shorter texts are too small to fingerprint reliably
+MAX_CHANGED  = 40                # tokens that may differ between a member and its representative
+MAX_GROUPS   = int(os.getenv("DEDUP_MAX_GROUPS", "10000"))    # representatives kept in memory
+
+# Fields a near-duplicate may differ in; anything else sends it to Gemini.
+LOCATION_FIELDS = ('city', 'country')
+# Fields a location can also appear inside ("Consultant - London").
+CARRIER_FIELDS  = ('title',)
+# Labels whose following number is an id ("Requisition ID: 1617432", "Ref 88").
+ID_LABEL  = re.compile(r'^(?:id|req|requisition|reference|ref)$', re.I)
+ID_WINDOW = 4                    # tokens after a label that may still hold its id
+
+_PRIME = (1 << 61) - 1
+
+
+@lru_cache(maxsize=1)
+def _permutations() -> Tuple['np.ndarray', 'np.ndarray']:
+    import numpy as np
+    rng = np.random.RandomState(20240601)
+    return (rng.randint(1, 1 << 31, size=NUM_PERM).astype(np.uint64),
+            rng.randint(0, 1 << 31, size=NUM_PERM).astype(np.uint64))
+
+
+def _tokens(text: str) -> List[str]:
+    return re.findall(r'\w+|[^\w\s]', text)
+
+
+def minhash(text: str) -> Optional['np.ndarray']:
+    """MinHash signature of the text's word 3-shingles; None for short texts."""
+    words = re.findall(r'\w+', text.lower())
+    if len(words) < MIN_WORDS:
+        return None
+    import numpy as np
+    a, b = _permutations()
+    shingles = {' '.join(words[i:i + SHINGLE]) for i in range(len(words) - SHINGLE + 1)}
+    h = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=4).digest(), 'little')
+         for s in shingles),
+        dtype=np.uint64, count=len(shingles),
+    )
+    # (a·h + b) mod p for every permutation at once; h < 2³², a < 2³¹ keeps it in uint64
+    return ((np.outer(h, a) + b) % _PRIME).min(axis=0)
+
+
+class MinHashIndex:
+    """LSH over MinHash signatures: `query` finds a stored key whose estimated
+    Jaccard similarity to the signature is at least `threshold`."""
+
+    def __init__(self, threshold: float = SIMILARITY):
+        self.threshold = threshold
+        self._sigs: Dict[str, 'np.ndarray'] = {}
+        self._bands: Dict[tuple, List[str]] = defaultdict(list)
+        self._rows = NUM_PERM // BANDS
+
+    def _band_keys(self, sig: 'np.ndarray'):
+        for b in range(BANDS):
+            yield (b, sig[b * self._rows:(b + 1) * self._rows].tobytes())
+
+    def query(self, sig: 'np.ndarray') -> Optional[str]:
+        best, best_sim = None, self.threshold
+        seen = set()
+        for bk in self._band_keys(sig):
+            for key in self._bands.get(bk, ()):
+                if key in seen or key not in self._sigs:
+                    continue
+                seen.add(key)
+                sim = float((self._sigs[key] == sig).mean())
+                if sim >= best_sim:
+                    best, best_sim = key, sim
+        return best
+
+    def add(self, key: str, sig: 'np.ndarray') -> None:
+        self._sigs[key] = sig
+        for bk in self._band_keys(sig):
+            self._bands[bk].append(key)
+
+    def remove(self, key: str) -> None:
+        sig = self._sigs.pop(key, None)
+        if sig is not None:
+            for bk in self._band_keys(sig):
+                bucket = self._bands.get(bk)
+                if bucket and key in bucket:
+                    bucket.remove(key)
+                    if not bucket:
+                        del self._bands[bk]
+
+
+def _id_positions(tokens: List[str], url: str = '') -> Set[int]:
+    """
+    Positions of tokens that are provably ids: numbers that also appear in
+    the page's URL path, or that follow an id label within ID_WINDOW tokens.
+    """
+    in_url = set(re.findall(r'\d+', urlsplit(url).path)) if url else set()
+    ids, label_at = set(), -ID_WINDOW - 1
+    for i, t in enumerate(tokens):
+        if ID_LABEL.match(t):
+            label_at = i
+        elif t.isdigit() and (t in in_url or i - label_at <= ID_WINDOW):
+            ids.add(i)
+    return ids
+
+
+def _ignorable(tokens: List[str], start: int, ids: Set[int]) -> bool:
+    """Punctuation and known ids only: nothing an output field holds."""
+    return all(not t.isalnum() or start + k in ids for k, t in enumerate(tokens))
+
+
+def derive_record(rep_text: str, rep_rec: Dict, text: str,
+                  rep_url: str = '', url: str = '') -> Optional[Dict]:
+    """
+    The representative's record adapted to a near-duplicate `text`, or None
+    when the two differ in anything other than location and ids.
+
+    Differences are found with a token diff; each changed span must either
+    be punctuation or an id (see `_id_positions`; `rep_url` and `url` are the
+    pages' URLs) or be the representative's city/country, which is then
+    replaced by the member's span (also where the title carries it). Any
+    other number or short code (a salary, "UK" → "USA") sends the member
+    back to Gemini.
+    """
+    a, b = _tokens(rep_text), _tokens(text)
+    ids_a, ids_b = _id_positions(a, rep_url), _id_positions(b, url)
+    rec, changed = dict(rep_rec), 0
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if tag == 'equal':
+            continue
+        changed += max(i2 - i1, j2 - j1)
+        if changed > MAX_CHANGED:
+            return None
+        old, new = a[i1:i2], b[j1:j2]
+        if _ignorable(old, i1, ids_a) and _ignorable(new, j1, ids_b):
+            continue
+        old_s, new_s = ' '.join(old), ' '.join(new)
+        hits = [f for f in LOCATION_FIELDS if old_s and str(rep_rec.get(f, '')).lower() == old_s.lower()]
+        if not hits or not new_s or _ignorable(new, j1, ids_b):
+            return None
+        for f in hits:
+            if rec[f] != rep_rec[f] and rec[f] != new_s:       # same city replaced two ways
+                return None
+            rec[f] = new_s
+        for f in CARRIER_FIELDS:
+            rec[f] = re.sub(rf'\b{re.escape(old_s)}\b', new_s, str(rec.get(f, '')))
+    return rec
+
+
+class DedupStage:
+    """
+    Groups near-duplicate postings so only one per group reaches Gemini.
+
+    `offer(item)` either lets the item through (returns False: parse it) or
+    absorbs it as a member of an earlier item's group (returns True). Once a
+    representative's record is known (`resolve`), each member gets a copy
+    with its own URL and location via `derive_record` and is handed to
+    `on_record`; members that cannot be derived, or whose representative
+    failed to parse, are handed to `on_fallback` to be parsed normally.
+    Items are dicts with 'text', 'url' and optionally 'known'. At most
+    `max_groups` resolved representatives are remembered (oldest dropped).
+    Thread-safe.
+    """
+
+    def __init__(self, on_record: Optional[Callable[[Dict], None]] = None,
+                 on_fallback: Optional[Callable[[Dict], None]] = None,
+                 threshold: float = SIMILARITY, max_groups: int = MAX_GROUPS):
+        self.on_record   = on_record
+        self.on_fallback = on_fallback
+        self.max_groups  = max_groups
+        self.index       = MinHashIndex(threshold)
+        self._texts:   Dict[str, str] = OrderedDict()
+        self._records: Dict[str, Optional[Dict]] = {}     # rep url → record (None = failed)
+        self._members: Dict[str, List[Dict]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self.absorbed = self.derived = self.fallbacks = 0
+
+    def offer(self, item: Dict) -> bool:
+        if item.get('no_dedup'):
+            return False
+        sig = minhash(item.get('text') or '')
+        if sig is None:
+            return False
+        with self._lock:
+            rep = self.index.query(sig)
+            if rep is None:
+                self.index.add(item['url'], sig)
+                self._texts[item['url']] = item['text']
+                self._evict()
+                return False
+            self.absorbed += 1
+            if rep not in self._records:
+                self._members[rep].append(item)
+                return True
+            record = self._records[rep]
+        self._settle(rep, record, [item])
+        return True
+
+    def _evict(self) -> None:
+        # drop the oldest representatives that have nobody waiting on them
+        for url in list(self._texts):
+            if len(self._texts) <= self.max_groups:
+                return
+            if url in self._records and not self._members.get(url):
+                del self._texts[url], self._records[url]
+                self.index.remove(url)
+
+    def resolve(self, sent: List[Dict], records: List[Dict]) -> None:
+        """Feed back one parsed batch: `records` for the `sent` items (by url)."""
+        by_url = {r.get('url'): r for r in records}
+        for item in sent:
+            url = item['url']
+            with self._lock:
+                if url not in self._texts or url in self._records:
+                    continue
+                self._records[url] = by_url.get(url)
+                members = self._members.pop(url, [])
+            if members:
+                self._settle(url, self._records[url], members)
+
+    def _settle(self, rep: str, record: Optional[Dict], members: List[Dict]) -> None:
+        for item in members:
+            rep_text = self._texts.get(rep)
+            rec = (derive_record(rep_text, record, item['text'], rep, item['url'])
+                   if record and rep_text else None)
+            if rec is None:
+                with self._lock:
+                    self.fallbacks += 1
+                self.on_fallback({**item, 'no_dedup': True})
+                continue
+            rec['url'] = item['url']
+            rec.update({f: v for f, v in (item.get('known') or {}).items() if v and f in rec})
+            with self._lock:
+                self.derived += 1
+            self.on_record(rec)
+
+    def pending(self) -> List[Dict]:
+        """Members still waiting on a representative that was never resolved."""
+        with self._lock:
+            members = [m for ms in self._members.values() for m in ms]
+            self._members.clear()
+        return members
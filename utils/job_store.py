@@ -0,0 +1,215 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.writers import written_urls
+
+STORE_PATH = os.getenv("JOB_STORE_PATH", "data/jobs.sqlite")
+USE_STORE  = os.getenv("JOB_STORE", "1") != "0"
+
+# Progress of one URL towards one output file, in order.
+PENDING, FETCHED, PARSED, VALIDATED, WRITTEN = 'pending', 'fetched', 'parsed', 'validated', 'written'
+FAILED = 'failed'
+
+
+def content_hash(value) -> str:
+    """Stable short hash of a text or a record dict."""
+    if not isinstance(value, str):
+        value = json.dumps(value, sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(value.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class JobStore:
+    """
+    Per-output checkpoint of every URL's progress:
+    pending → fetched → parsed → validated → written (or failed).
+
+    Rows are keyed by (output file, url) and carry the scraped text's hash,
+    the latest record and the hash of the record last written, so
+
+    • a resumed run skips written URLs and writes stored records without
+      fetching or parsing them again, and
+    • the writer writes each URL to a file at most once, even when a re-run
+      parses it slightly differently (a new LLM answer, a prompt change).
+      The first row stays; to collect updated postings, write to a new
+      output file.
+
+    Thread-safe; one connection in WAL mode shared by all stages.
+    """
+
+    def __init__(self, path: str = STORE_PATH):
+        self.path  = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                output       TEXT NOT NULL,
+                url          TEXT NOT NULL,
+                state        TEXT NOT NULL,
+                text_hash    TEXT,
+                record       TEXT,
+                written_hash TEXT,
+                error        TEXT,
+                updated      REAL NOT NULL,
+                PRIMARY KEY (output, url)
+            )""")
+        self._db.commit()
+
+    @staticmethod
+    def _key(output: str) -> str:
+        return os.path.abspath(output)
+
+    def _upsert(self, output: str, rows: Iterable[Tuple[str, str, Optional[str], Optional[str], Optional[str]]]
+                ) -> None:
+        """rows of (url, state, text_hash, record_json, error); None keeps the old value."""
+        now = time.time()
+        with self._lock:
+            self._db.executemany("""
+                INSERT INTO jobs (output, url, state, text_hash, record, error, updated)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (output, url) DO UPDATE SET
+                    state     = excluded.state,
+                    text_hash = COALESCE(excluded.text_hash, text_hash),
+                    record    = COALESCE(excluded.record, record),
+                    error     = excluded.error,
+                    updated   = excluded.updated
+            """, [(self._key(output), url, state, th, rec, err, now) for url, state, th, rec, err in rows])
+            self._db.commit()
+
+    # ---------------------------------------------------------------- stages
+
+    def begin(self, output: str, urls: List[str], resume: bool = False
+              ) -> Tuple[List[str], List[Dict]]:
+        """
+        Registers `urls` for `output` and returns (urls still to scrape,
+        records ready to write). Without `resume` everything is scraped
+        again (writes stay idempotent); with it, written URLs are skipped
+        and parsed/validated records are handed back as ready.
+        """
+        out = self._key(output)
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO jobs (output, url, state, updated) VALUES (?, ?, ?, ?)",
+                [(out, u, PENDING, time.time()) for u in urls],
+            )
+            self._db.commit()
+            rows = dict(
+                (url, (state, record)) for url, state, record in self._db.execute(
+                    "SELECT url, state, record FROM jobs WHERE output = ?", (out,))
+            )
+        if not resume:
+            return list(urls), []
+        todo, ready = [], []
+        for url in urls:
+            state, record = rows.get(url, (PENDING, None))
+            if state == WRITTEN:
+                continue
+            if state in (PARSED, VALIDATED) and record:
+                ready.append(json.loads(record))
+            else:
+                todo.append(url)
+        return todo, ready
+
+    def fetched(self, output: str, url: str, text: str) -> None:
+        self._upsert(output, [(url, FETCHED, content_hash(text), None, None)])
+
+    def failed(self, output: str, url: str, error: str) -> None:
+        self._upsert(output, [(url, FAILED, None, None, str(error)[:500])])
+
+    def records(self, output: str, records: List[Dict], state: str) -> None:
+        """Store parsed or validated records (keyed by their 'url')."""
+        self._upsert(output, [
+            (r['url'], state, None, json.dumps(r, ensure_ascii=False), None)
+            for r in records if r.get('url')
+        ])
+
+    def unwritten(self, output: str, records: List[Dict]) -> List[Dict]:
+        """The records whose URL has no row in `output` yet (first one per URL wins)."""
+        if not records:
+            return []
+        out = self._key(output)
+        with self._lock:
+            written = dict(self._db.execute(
+                f"SELECT url, written_hash FROM jobs WHERE output = ? AND url IN "
+                f"({','.join('?' * len(records))})",
+                [out, *(r['url'] for r in records)],
+            ).fetchall())
+        fresh, seen = [], set()
+        for r in records:
+            if written.get(r['url']) is None and r['url'] not in seen:
+                seen.add(r['url'])
+                fresh.append(r)
+        return fresh
+
+    def written(self, output: str, records: List[Dict]) -> None:
+        """Mark records' URLs written; the hash of the row actually in the file is kept."""
+        out, now = self._key(output), time.time()
+        with self._lock:
+            self._db.executemany(
+                "UPDATE jobs SET state = ?, written_hash = COALESCE(written_hash, ?), error = NULL, "
+                "updated = ? "
+                "WHERE output = ? AND url = ?",
+                [(WRITTEN, content_hash(r), now, out, r['url']) for r in records],
+            )
+            self._db.commit()
+
+    def reconcile(self, output: str, fmt: Optional[str] = None) -> int:
+        """
+        Makes the store agree with what `output` (any utils.writers format)
+        really holds: URLs present in it are marked written (a crash between
+        writing a row and recording it would otherwise repeat it), and
+        written URLs missing from it (rows still buffered at a crash) go
+        back to validated so they are written again. Returns how many
+        rows changed.
+        """
+        urls = written_urls(output, fmt)
+        out  = self._key(output)
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT url, state, record FROM jobs WHERE output = ? AND state IN (?, ?, ?) "
+                "AND record IS NOT NULL",
+                (out, PARSED, VALIDATED, WRITTEN),
+            ).fetchall()
+            lost = [url for url, state, _ in rows if state == WRITTEN and url not in urls]
+            self._db.executemany(
+                "UPDATE jobs SET state = ?, written_hash = NULL WHERE output = ? AND url = ?",
+                [(VALIDATED, out, url) for url in lost],
+            )
+            self._db.commit()
+        done = [json.loads(record) for url, state, record in rows if state != WRITTEN and url in urls]
+        self.written(output, done)
+        return len(done) + len(lost)
+
+    def summary(self, output: str) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._db.execute(
+                "SELECT state, COUNT(*) FROM jobs WHERE output = ? GROUP BY state",
+                (self._key(output),),
+            ).fetchall())
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_store: Optional[JobStore] = None
+_store_lock = threading.Lock()
+
+
+def get_job_store() -> Optional[JobStore]:
+    """Process-wide job store, or None when JOB_STORE=0."""
+    global _store
+    if not USE_STORE:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = JobStore()
+        return _store
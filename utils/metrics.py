@@ -0,0 +1,346 @@
+import os
+import sys
+import time
+import atexit
+import bisect
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+METRICS_FILE = os.getenv("METRICS_FILE", "")                  # Prometheus text written at exit
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))            # serve /metrics while running (0 = off)
+PROFILE      = os.getenv("PROFILE", "").lower()               # "cprofile" or "pyinstrument"
+PROFILE_DIR  = os.getenv("PROFILE_DIR", "data/profiles")
+MAX_DOMAINS  = 200               # distinct domain labels before the rest become "other"
+
+# seconds; from a cached fetch to a throttled Gemini call
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _Histogram:
+    __slots__ = ('counts', 'sum', 'n')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum    = 0.0
+        self.n      = 0
+
+    def add(self, value: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.n   += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (inf past the last bucket)."""
+        rank, seen = q * self.n, 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank and c:
+                return BUCKETS[i] if i < len(BUCKETS) else float('inf')
+        return 0.0
+
+
+class Registry:
+    """
+    Counters and latency histograms, each keyed by name and labels
+    (stage, domain, route, ...). Thread-safe; the cost per update is a
+    lock and a dict lookup, so it can sit on every page and every call.
+    """
+
+    def __init__(self):
+        self._lock     = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = defaultdict(lambda: defaultdict(float))
+        self._hists:    Dict[str, Dict[Labels, _Histogram]] = defaultdict(dict)
+        self._help:     Dict[str, str] = {}
+        self._domains:  set = set()
+
+    @staticmethod
+    def _labels(labels: Dict[str, str]) -> Labels:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = self._labels(labels)
+        with self._lock:
+            self._counters[name][key] += value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        key = self._labels(labels)
+        with self._lock:
+            h = self._hists[name].get(key)
+            if h is None:
+                h = self._hists[name][key] = _Histogram()
+            h.add(seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Observes the block's duration in `name` (also when it raises)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def describe(self, name: str, text: str) -> None:
+        self._help[name] = text
+
+    def domain(self, url: str) -> str:
+        """The URL's host as a label value, capped at MAX_DOMAINS distinct values."""
+        host = (urlsplit(url).hostname or '').lower()
+        with self._lock:
+            if host in self._domains:
+                return host
+            if len(self._domains) < MAX_DOMAINS:
+                self._domains.add(host)
+                return host
+        return 'other'
+
+    # ------------------------------------------------------------- export
+
+    def prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        def fmt(labels: Labels, extra: Tuple = ()) -> str:
+            pairs = [*labels, *extra]
+            if not pairs:
+                return ''
+            return '{' + ','.join(f'{k}="{v}"'.replace('\n', ' ') for k, v in pairs) + '}'
+
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(self._counters):
+                if name in self._help:
+                    lines.append(f"# HELP jobscraper_{name} {self._help[name]}")
+                lines.append(f"# TYPE jobscraper_{name} counter")
+                for labels, v in sorted(self._counters[name].items()):
+                    lines.append(f"jobscraper_{name}{fmt(labels)} {v:g}")
+            for name in sorted(self._hists):
+                if name in self._help:
+                    lines.append(f"# HELP jobscraper_{name} {self._help[name]}")
+                lines.append(f"# TYPE jobscraper_{name} histogram")
+                for labels, h in sorted(self._hists[name].items()):
+                    acc = 0
+                    for bound, c in zip((*BUCKETS, '+Inf'), h.counts):
+                        acc += c
+                        lines.append(f"jobscraper_{name}_bucket{fmt(labels, (('le', bound),))} {acc}")
+                    lines.append(f"jobscraper_{name}_sum{fmt(labels)} {h.sum:.6f}")
+                    lines.append(f"jobscraper_{name}_count{fmt(labels)} {h.n}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus())
+        os.replace(tmp, path)
+
+    def summary(self) -> List[str]:
+        """
+        End-of-run report: one line per histogram series (count, total,
+        p50/p99 bucket bounds) without the per-domain detail, then the
+        counters summed over their labels except the first.
+        """
+        lines = []
+        with self._lock:
+            for name in sorted(self._hists):
+                merged: Dict[Labels, _Histogram] = {}
+                for labels, h in self._hists[name].items():
+                    key = tuple(kv for kv in labels if kv[0] != 'domain')
+                    m = merged.setdefault(key, _Histogram())
+                    m.counts = [a + b for a, b in zip(m.counts, h.counts)]
+                    m.sum += h.sum
+                    m.n   += h.n
+                for labels, h in sorted(merged.items()):
+                    tag = ','.join(v for _, v in labels)
+                    lines.append(f"{name}{f'[{tag}]' if tag else ''}: {h.n} observed, {h.sum:.1f}s total, "
+                                 f"p50 ≤ {h.quantile(0.5):g}s, p99 ≤ {h.quantile(0.99):g}s")
+            for name in sorted(self._counters):
+                merged_c: Dict[Labels, float] = defaultdict(float)
+                for labels, v in self._counters[name].items():
+                    merged_c[tuple(kv for kv in labels if kv[0] != 'domain')] += v
+                parts = [f"{','.join(v for _, v in k) or 'total'}={v:g}" for k, v in sorted(merged_c.items())]
+                lines.append(f"{name}: {' '.join(parts)}")
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._hists.clear()
+            self._domains.clear()
+
+
+metrics = Registry()
+
+metrics.describe("fetch_seconds", "Page fetch/render latency by route (static, dynamic, ats) and domain")
+metrics.describe("pages_total", "Pages fetched by route, outcome and domain")
+metrics.describe("llm_call_seconds", "Latency of one Gemini request")
+metrics.describe("llm_tokens_total", "Gemini tokens by direction (in, out)")
+metrics.describe("llm_retries_total", "Gemini attempts after the first, by reason")
+metrics.describe("llm_malformed_total", "Items/rows Gemini returned that failed validation")
+metrics.describe("throttle_wait_seconds", "Time spent waiting on the Gemini rate budget")
+metrics.describe("write_seconds", "Time to hand one batch of records to an output sink")
+
+
+# ------------------------------------------------------------------ endpoint
+
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def serve(port: int = METRICS_PORT) -> Optional[ThreadingHTTPServer]:
+    """Serves GET /metrics on localhost:`port` from a daemon thread (once per process)."""
+    global _server
+    if not port or _server is not None:
+        return _server
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = metrics.prometheus().encode('utf-8')
+            self.send_response(200 if self.path.startswith('/metrics') else 404)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    _server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    logger.info(f"Metrics on http://127.0.0.1:{port}/metrics")
+    return _server
+
+
+if METRICS_FILE:
+    atexit.register(lambda: metrics.write(METRICS_FILE))
+
+
+# ------------------------------------------------------------------ profiling
+
+_profiles: Dict[str, object] = {}       # pyinstrument sessions per hot path
+_profiles_lock = threading.Lock()
+_profiling     = threading.local()       # one profiler per thread; nested hot paths run plain
+_cprofile      = None                    # the process-wide cProfile (None: not started, False: unavailable)
+
+# From 3.12 cProfile sits on sys.monitoring: one profiler sees every thread,
+# and a second one in the process raises ValueError.
+PROCESS_WIDE = sys.version_info >= (3, 12)
+
+
+def _save_profiles() -> None:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    if PROFILE == 'cprofile':
+        prof = _cprofile
+        if not prof:
+            return
+        if PROCESS_WIDE:
+            prof.disable()
+        path = os.path.join(PROFILE_DIR, "cprofile.prof")
+        prof.dump_stats(path)
+        logger.info(f"Profile → {path}")
+        return
+    from pyinstrument.renderers import HTMLRenderer
+    for name, session in _profiles.items():
+        path = os.path.join(PROFILE_DIR, f"{name}.html")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(HTMLRenderer().render(session))
+        logger.info(f"Profile of {name} → {path}")
+
+
+def start_profiling() -> None:
+    """
+    With PROFILE=cprofile on Python 3.12+, enable the one process-wide
+    profiler (idempotent; `profiled` calls it on first use). If another
+    profiling tool already holds sys.monitoring, profiling is switched off
+    with a warning instead of failing the profiled code.
+    """
+    global _cprofile
+    if PROFILE != 'cprofile' or not PROCESS_WIDE or _cprofile is not None:
+        return
+    import cProfile
+    with _profiles_lock:
+        if _cprofile is not None:
+            return
+        prof = cProfile.Profile()
+        try:
+            prof.enable()
+        except ValueError as e:
+            logger.warning(f"Profiling disabled: {e}")
+            _cprofile = False
+            return
+        _cprofile = prof
+
+
+def profiled(name: str) -> Callable:
+    """
+    Decorator for hot paths, saved under PROFILE_DIR at exit.
+
+    • PROFILE=cprofile: one profile of the whole process (`cprofile.prof`,
+      for pstats/snakeviz). On Python 3.12+ a single profiler covering every
+      thread is started on the first call; before 3.12 each call is profiled
+      in its own thread and merged.
+    • PROFILE=pyinstrument: each call is profiled in its own thread and the
+      calls are merged per `name` into `<name>.html`.
+
+    A call made while its thread is already being profiled is counted in
+    the outer profile. Without PROFILE the function is returned untouched.
+    """
+    def wrap(fn: Callable) -> Callable:
+        if PROFILE not in ('cprofile', 'pyinstrument'):
+            return fn
+
+        if PROFILE == 'cprofile' and PROCESS_WIDE:
+            @wraps(fn)
+            def run_global(*args, **kwargs):
+                if _cprofile is None:
+                    start_profiling()
+                return fn(*args, **kwargs)
+            return run_global
+
+        @wraps(fn)
+        def run(*args, **kwargs):
+            if getattr(_profiling, 'active', False):
+                return fn(*args, **kwargs)
+            _profiling.active = True
+            try:
+                return _profile_call(name, fn, args, kwargs)
+            finally:
+                _profiling.active = False
+        return run
+    return wrap
+
+
+def _profile_call(name: str, fn: Callable, args, kwargs):
+    global _cprofile
+    if PROFILE == 'pyinstrument':
+        from pyinstrument import Profiler
+        from pyinstrument.session import Session
+        prof = Profiler()
+        prof.start()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            session = prof.stop()
+            with _profiles_lock:
+                old = _profiles.get(name)
+                _profiles[name] = Session.combine(old, session) if old else session
+    import cProfile, pstats
+    prof = cProfile.Profile()
+    try:
+        return prof.runcall(fn, *args, **kwargs)
+    finally:
+        with _profiles_lock:
+            if _cprofile is None:
+                _cprofile = pstats.Stats(prof)
+            else:
+                _cprofile.add(prof)
+
+
+if PROFILE:
+    atexit.register(_save_profiles)
@@ -0,0 +1,154 @@
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from utils.validators import ALLOWED
+
+# Output columns, in file order.
+FIELDNAMES = [
+    'title', 'company', 'city', 'country', 'officeType', 'experienceLevel',
+    'employmentType', 'industries', 'visa', 'benefits', 'skills', 'url', 'j/i',
+    'currency', 'salaryLow', 'salaryHigh'
+]
+
+# Fields with few distinct values across a run: interned in a Record,
+# dictionary-encoded in a RecordTable.
+CATEGORICAL = ('company', 'city', 'country', *ALLOWED, 'currency', 'j/i')
+
+_SLOTS = tuple(f.replace('/', '') for f in FIELDNAMES)      # 'j/i' is not an identifier
+_SLOT  = dict(zip(FIELDNAMES, _SLOTS))
+_CAT   = frozenset(CATEGORICAL)
+
+
+def _text(value) -> str:
+    return '' if value is None else value if isinstance(value, str) else str(value)
+
+
+class Record:
+    """
+    One output row in 16 slots instead of a 16-key dict, with categorical
+    values interned so thousands of rows share one copy of each company,
+    country and enumerated value.
+
+    It reads like a mapping of the output fields (rec['j/i'], rec.get('url'),
+    dict(rec)), so the writers and the UI take it wherever they take a dict.
+    Use `to_dict` for JSON or code that adds keys.
+    """
+
+    __slots__ = _SLOTS
+
+    def __init__(self, **fields):
+        for field, slot in _SLOT.items():
+            value = _text(fields.get(field, ''))
+            setattr(self, slot, sys.intern(value) if field in _CAT else value)
+
+    @classmethod
+    def from_dict(cls, rec: Dict) -> 'Record':
+        return rec if isinstance(rec, Record) else cls(**{f: rec.get(f, '') for f in FIELDNAMES})
+
+    def __getitem__(self, field: str) -> str:
+        try:
+            return getattr(self, _SLOT[field])
+        except KeyError:
+            raise KeyError(field) from None
+
+    def get(self, field: str, default=None):
+        slot = _SLOT.get(field)
+        return default if slot is None else getattr(self, slot)
+
+    def __contains__(self, field) -> bool:
+        return field in _SLOT
+
+    def keys(self) -> List[str]:
+        return list(FIELDNAMES)
+
+    def values(self) -> List[str]:
+        return [getattr(self, s) for s in _SLOTS]
+
+    def items(self):
+        return zip(FIELDNAMES, self.values())
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(FIELDNAMES)
+
+    def __len__(self) -> int:
+        return len(FIELDNAMES)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Record):
+            return self.values() == other.values()
+        return NotImplemented
+
+    def to_dict(self) -> Dict[str, str]:
+        return dict(self.items())
+
+    def __repr__(self) -> str:
+        return f"Record(title={self.title!r}, company={self.company!r}, url={self.url!r})"
+
+
+class RecordTable:
+    """
+    Append-only column store for a whole run's records (the UI keeps every
+    row of a run in memory).
+
+    • Categorical fields are dictionary-encoded: one array('I') of codes
+      per column plus its distinct values.
+    • Other fields are one list of strings per column.
+    • `to_frame` builds a pandas DataFrame straight from the columns
+      (categoricals as pandas Categoricals), with no CSV round trip.
+    """
+
+    def __init__(self, records: Optional[Iterable[Dict]] = None):
+        self._codes: Dict[str, array]     = {f: array('I') for f in CATEGORICAL}
+        self._cats:  Dict[str, List[str]] = {f: [] for f in CATEGORICAL}
+        self._index: Dict[str, Dict[str, int]] = {f: {} for f in CATEGORICAL}
+        self._plain: Dict[str, List[str]] = {f: [] for f in FIELDNAMES if f not in _CAT}
+        self._n = 0
+        if records is not None:
+            self.extend(records)
+
+    def append(self, rec: Dict) -> None:
+        for field, codes in self._codes.items():
+            value = _text(rec.get(field, ''))
+            index = self._index[field]
+            code  = index.get(value)
+            if code is None:
+                code = index[value] = len(self._cats[field])
+                self._cats[field].append(value)
+            codes.append(code)
+        for field, col in self._plain.items():
+            col.append(_text(rec.get(field, '')))
+        self._n += 1
+
+    def extend(self, records: Iterable[Dict]) -> None:
+        for rec in records:
+            self.append(rec)
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __getitem__(self, i: int) -> Record:
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError(i)
+        fields = {f: self._cats[f][c[i]] for f, c in self._codes.items()}
+        fields.update({f: col[i] for f, col in self._plain.items()})
+        return Record(**fields)
+
+    def __iter__(self) -> Iterator[Record]:
+        return (self[i] for i in range(self._n))
+
+    def to_frame(self):
+        """The records as a DataFrame with FIELDNAMES columns."""
+        import numpy as np
+        import pandas as pd
+        cols = {}
+        for f in FIELDNAMES:
+            if f in _CAT:
+                codes = np.frombuffer(self._codes[f], dtype=np.uint32).astype(np.int32) \
+                    if self._n else np.empty(0, dtype=np.int32)
+                cols[f] = pd.Categorical.from_codes(codes, categories=pd.Index(self._cats[f], dtype=object))
+            else:
+                cols[f] = self._plain[f]
+        return pd.DataFrame(cols, columns=FIELDNAMES)
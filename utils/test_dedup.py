@@ -0,0 +1,75 @@
+from utils.dedup import DedupStage, derive_record
+
+BODY = (
+    "We are hiring a Senior Data Engineer to build and run our streaming platform. "
+    "You will design pipelines, review code, mentor engineers and work with analysts "
+    "across the business to make data reliable, discoverable and fast. "
+    "You have five years of experience with Python, SQL, Spark and Kafka, and you "
+    "care about testing, observability and clear documentation. "
+)
+
+
+def _text(place: str, salary: str = "50000 - 60000", req: str = "1617432") -> str:
+    return f"Requisition ID: {req}\nSenior Data Engineer - {place}\nLocation: {place}\n{BODY}Salary: {salary}"
+
+
+REP_REC = {
+    'title': 'Senior Data Engineer - London', 'company': 'Acme', 'city': 'London',
+    'country': 'United Kingdom', 'salaryLow': '50000', 'salaryHigh': '60000', 'url': 'https://acme.test/jobs/1',
+}
+
+
+def test_location_and_id_changes_are_derived():
+    rec = derive_record(_text("London"), REP_REC, _text("Manchester", req="1617499"),
+                        'https://acme.test/jobs/1617432', 'https://acme.test/jobs/1617499')
+    assert rec is not None
+    assert rec['city'] == 'Manchester'
+    assert rec['title'] == 'Senior Data Engineer - Manchester'
+    assert (rec['salaryLow'], rec['salaryHigh']) == ('50000', '60000')
+
+
+def test_salary_change_goes_back_to_gemini():
+    assert derive_record(_text("London"), REP_REC, _text("London", salary="90000 - 120000")) is None
+
+
+def test_country_code_change_goes_back_to_gemini():
+    rep  = _text("London, UK")
+    text = _text("Austin, USA", salary="90000 - 120000")
+    assert derive_record(rep, REP_REC, text) is None
+    # the code alone differs: still not something the representative's record holds
+    assert derive_record(_text("London, UK"), REP_REC, _text("London, IE")) is None
+
+
+def test_number_outside_id_label_or_url_is_not_an_id():
+    rep  = _text("London") + "\nTeam size: 8"
+    text = _text("London") + "\nTeam size: 12"
+    assert derive_record(rep, REP_REC, text) is None
+
+
+def test_stage_derives_members_and_falls_back_on_real_differences():
+    records, fallbacks = [], []
+    stage = DedupStage(on_record=records.append, on_fallback=fallbacks.append)
+    rep = {'url': 'https://acme.test/jobs/1', 'text': _text("London")}
+    same_role = {'url': 'https://acme.test/jobs/2', 'text': _text("Manchester")}
+    other_pay = {'url': 'https://acme.test/jobs/3', 'text': _text("London", salary="90000 - 120000")}
+
+    assert stage.offer(rep) is False
+    assert stage.offer(same_role) is True
+    assert stage.offer(other_pay) is True
+    stage.resolve([rep], [dict(REP_REC)])
+
+    assert [r['url'] for r in records] == ['https://acme.test/jobs/2']
+    assert records[0]['city'] == 'Manchester'
+    assert [f['url'] for f in fallbacks] == ['https://acme.test/jobs/3']
+    assert fallbacks[0]['no_dedup'] is True
+
+
+def test_failed_representative_sends_members_to_gemini():
+    records, fallbacks = [], []
+    stage = DedupStage(on_record=records.append, on_fallback=fallbacks.append)
+    rep    = {'url': 'https://acme.test/jobs/1', 'text': _text("London")}
+    member = {'url': 'https://acme.test/jobs/2', 'text': _text("Manchester")}
+    stage.offer(rep)
+    stage.offer(member)
+    stage.resolve([rep], [])                     # representative came back without a record
+    assert records == [] and [f['url'] for f in fallbacks] == ['https://acme.test/jobs/2']
@@ -0,0 +1,55 @@
+from utils.job_store import JobStore, VALIDATED, WRITTEN
+
+
+def _rec(url, title):
+    return {'url': url, 'title': title, 'company': 'Acme'}
+
+
+def _store(tmp_path):
+    return JobStore(str(tmp_path / 'jobs.sqlite')), str(tmp_path / 'out.csv')
+
+
+def test_rerun_that_parses_differently_does_not_append_a_second_row(tmp_path):
+    store, out = _store(tmp_path)
+    first = _rec('https://acme.test/jobs/1', 'Data Engineer')
+    store.begin(out, [first['url']])
+    assert store.unwritten(out, [first]) == [first]
+    store.written(out, [first])
+
+    # a later run without --resume gets a slightly different answer for the same URL
+    store.begin(out, [first['url']])
+    again = _rec(first['url'], 'Senior Data Engineer')
+    assert store.unwritten(out, [again]) == []
+    store.written(out, [again])
+    assert store.unwritten(out, [first]) == []
+    assert store.summary(out) == {WRITTEN: 1}
+
+
+def test_one_row_per_url_within_a_batch_and_new_urls_pass(tmp_path):
+    store, out = _store(tmp_path)
+    a1, a2 = _rec('https://acme.test/jobs/1', 'A'), _rec('https://acme.test/jobs/1', 'A2')
+    b = _rec('https://acme.test/jobs/2', 'B')
+    store.begin(out, [a1['url'], b['url']])
+    assert store.unwritten(out, [a1, a2, b]) == [a1, b]
+
+
+def test_resume_skips_written_and_returns_stored_records(tmp_path):
+    store, out = _store(tmp_path)
+    urls = ['https://acme.test/jobs/1', 'https://acme.test/jobs/2', 'https://acme.test/jobs/3']
+    store.begin(out, urls)
+    done, ready = _rec(urls[0], 'A'), _rec(urls[1], 'B')
+    store.records(out, [done, ready], VALIDATED)
+    store.written(out, [done])
+
+    todo, records = store.begin(out, urls, resume=True)
+    assert todo == [urls[2]]
+    assert records == [ready]
+
+
+def test_outputs_are_tracked_separately(tmp_path):
+    store, out = _store(tmp_path)
+    other = str(tmp_path / 'other.csv')
+    rec = _rec('https://acme.test/jobs/1', 'A')
+    store.begin(out, [rec['url']])
+    store.written(out, [rec])
+    assert store.unwritten(other, [rec]) == [rec]
@@ -0,0 +1,102 @@
+import time
+
+import pytest
+
+from utils.work_queue import PARSE, URL, RedisWorkQueue, SqliteWorkQueue
+
+
+@pytest.fixture(params=['sqlite', 'redis'])
+def work(request, tmp_path, monkeypatch):
+    if request.param == 'sqlite':
+        return SqliteWorkQueue(str(tmp_path / 'queue.sqlite'), max_attempts=2)
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('lupa')                 # fakeredis runs the Lua scripts with lupa
+    import redis
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis.Redis, 'from_url',
+                        staticmethod(lambda url, **kw: fakeredis.FakeRedis(server=server, **kw)))
+    return RedisWorkQueue('redis://test', name=f"t{time.monotonic_ns()}", max_attempts=2)
+
+
+def _urls(n):
+    return [(f'https://acme.test/jobs/{i}', {'url': f'https://acme.test/jobs/{i}'}) for i in range(n)]
+
+
+def test_put_ignores_keys_already_queued(work):
+    assert work.put(URL, _urls(3)) == 3
+    assert work.put(URL, _urls(4)) == 1
+    assert work.open_tasks(URL) == 4
+
+
+def test_leased_tasks_are_not_handed_out_twice(work):
+    work.put(URL, _urls(3))
+    first  = work.lease(URL, 2, 'w1')
+    second = work.lease(URL, 2, 'w2')
+    assert len(first) == 2 and len(second) == 1
+    assert not {t.id for t in first} & {t.id for t in second}
+    assert work.lease(URL, 1, 'w3') == []
+
+
+def test_complete_acks_once_and_collect_sorts_results(work):
+    work.put(URL, _urls(3))
+    rec, empty, handed = work.lease(URL, 3, 'w')
+    assert work.complete(rec, [{'url': rec.payload['url'], 'title': 'A'}]) is True
+    assert work.complete(rec, [{'url': rec.payload['url'], 'title': 'again'}]) is False
+    work.complete(empty, [])                   # ended without a record
+    work.complete(handed)                      # handed on to a parse task
+    records, failed, skipped = work.collect()
+    assert records == [{'url': rec.payload['url'], 'title': 'A'}]
+    assert failed == []
+    assert skipped == [empty.payload]
+    assert work.collect() == ([], [], [])
+
+
+def test_expired_lease_goes_back_then_fails_for_good(work):
+    work.put(URL, _urls(1))
+    assert len(work.lease(URL, 1, 'w1', seconds=0.05)) == 1
+    time.sleep(0.1)
+    again = work.lease(URL, 1, 'w2', seconds=0.05)
+    assert len(again) == 1 and again[0].attempts == 1
+    time.sleep(0.1)
+    assert work.lease(URL, 1, 'w3') == []      # second expiry reaches max_attempts
+    _, failed, _ = work.collect()
+    assert [p['url'] for p, _ in failed] == ['https://acme.test/jobs/0']
+
+
+def test_extend_keeps_a_live_lease(work):
+    work.put(URL, _urls(1))
+    held = work.lease(URL, 1, 'w1', seconds=0.2)
+    time.sleep(0.1)
+    work.extend(held, seconds=5)
+    time.sleep(0.15)
+    assert work.lease(URL, 1, 'w2') == []
+
+
+def test_fail_retries_then_gives_up(work):
+    work.put(PARSE, _urls(1))
+    task = work.lease(PARSE, 1, 'w')[0]
+    work.fail(task, 'boom')
+    task = work.lease(PARSE, 1, 'w')[0]
+    work.fail(task, 'boom again')
+    assert work.lease(PARSE, 1, 'w') == []
+    _, failed, _ = work.collect()
+    assert failed == [({'url': 'https://acme.test/jobs/0'}, 'boom again')]
+
+
+def test_drained_needs_closed_input_and_nothing_open(work):
+    assert not work.input_closed()
+    work.put(URL, _urls(1))
+    work.close_input()
+    assert work.input_closed() and not work.drained()
+    task = work.lease(URL, 1, 'w')[0]
+    work.complete(task, [{'url': task.payload['url']}])
+    assert not work.drained()                  # result not collected yet
+    work.collect()
+    assert work.drained()
+
+
+def test_shared_budget_allows_a_burst_then_waits(work):
+    rpm, tpm = 60, 60000                       # 1 call/s, 1000 tokens/s, burst of 60 s
+    waits = [work.reserve('key', rpm, tpm, 100) for _ in range(60)]
+    assert max(waits) == 0
+    assert work.reserve('key', rpm, tpm, 100) > 0.5
@@ -0,0 +1,70 @@
+from utils.writers import OrderedSink
+
+URLS = [f'https://acme.test/jobs/{i}' for i in range(6)]
+
+
+class ListSink:
+    path = 'memory'
+
+    def __init__(self):
+        self.rows, self.closed = [], False
+
+    def write(self, records):
+        self.rows.extend(r['url'] for r in records)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def _rec(i):
+    return {'url': URLS[i], 'title': f'Job {i}'}
+
+
+def test_records_come_out_in_input_order():
+    inner = ListSink()
+    sink = OrderedSink(inner, URLS)
+    sink.write([_rec(2), _rec(1)])
+    assert inner.rows == []                    # still waiting on 0
+    sink.write([_rec(0)])
+    assert inner.rows == URLS[:3]
+    sink.write([_rec(4), _rec(3)])
+    assert inner.rows == URLS[:5]
+
+
+def test_skipped_urls_release_what_waits_behind_them():
+    inner = ListSink()
+    sink = OrderedSink(inner, URLS)
+    sink.write([_rec(1), _rec(3)])
+    sink.skip([URLS[0]])
+    assert inner.rows == [URLS[1]]
+    sink.skip([URLS[2]])
+    assert inner.rows == [URLS[1], URLS[3]]
+
+
+def test_gap_is_given_up_once_too_much_is_held():
+    inner = ListSink()
+    sink = OrderedSink(inner, URLS, max_pending=2)
+    sink.write([_rec(1), _rec(2)])
+    assert inner.rows == []
+    sink.write([_rec(3)])                      # three held > max_pending: stop waiting for 0
+    assert inner.rows == URLS[1:4]
+    sink.write([_rec(0)])                      # late arrival is still written
+    assert inner.rows == URLS[1:4] + [URLS[0]]
+
+
+def test_close_writes_whatever_is_still_held():
+    inner = ListSink()
+    with OrderedSink(inner, URLS) as sink:
+        sink.write([_rec(5), _rec(2)])
+    assert inner.rows == [URLS[2], URLS[5]]
+    assert inner.closed
+
+
+def test_unknown_urls_pass_straight_through():
+    inner = ListSink()
+    sink = OrderedSink(inner, URLS)
+    sink.write([{'url': 'https://elsewhere.test/x'}])
+    assert inner.rows == ['https://elsewhere.test/x']
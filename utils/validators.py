@@ -1,6 +1,13 @@
 # utils/validators.py
 
+import sys
+import argparse
 from difflib import get_close_matches
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd          # imported on use: validate_record runs in every pipeline, pandas ~0.2 s
 
 ALLOWED = {
     'officeType': [
@@ -38,24 +45,40 @@ ALLOWED = {
     ]
 }
 
+# field → {allowed value: itself}; exact hits never reach the fuzzy matcher
+LOOKUP = {field: {c: c for c in choices} for field, choices in ALLOWED.items()}
+
+CHOICE_FIELDS = {'officeType': '', 'experienceLevel': '', 'employmentType': '', 'visa': 'No'}
+LIST_FIELDS   = ('industries',)
+CHUNK_ROWS    = 50000
+
+@lru_cache(maxsize=65536)
+def _closest(v: str, choices: tuple, default: str) -> str:
+    # the inputs repeat endlessly ('Full time', 'remote', ...), so each is matched once
+    matches = get_close_matches(v, choices, n=1, cutoff=0.6)
+    return matches[0] if matches else (default or choices[0])
+
 def normalize_choice(val: str, choices: list[str], default: str = None) -> str:
     v = val.strip()
     if v in choices:
         return v
-    matches = get_close_matches(v, choices, n=1, cutoff=0.6)
-    return matches[0] if matches else (default or choices[0])
+    return _closest(v, tuple(choices), default)
 
 def normalize_list(val: str, choices: list[str], max_items: int = None) -> str:
-    items = [v.strip() for v in val.split(',') if v.strip()]
-    normalized = []
-    for item in items:
-        nc = normalize_choice(item, choices)
-        if nc not in normalized:
-            normalized.append(nc)
+    normalized = {}
+    for item in val.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        normalized.setdefault(normalize_choice(item, choices), None)
         if max_items and len(normalized) >= max_items:
             break
     return ','.join(normalized)
 
+def _dedupe_csv(val: str) -> str:
+    """Comma-separated items, stripped, first occurrence kept."""
+    return ','.join(dict.fromkeys(s.strip() for s in val.split(',') if s.strip()))
+
 def validate_record(rec: dict) -> dict:
     rec['officeType'] = normalize_choice(
         rec.get('officeType', ''), ALLOWED['officeType'], default=''
@@ -75,10 +98,61 @@ def validate_record(rec: dict) -> dict:
     cur = rec.get('currency', '').strip()
     rec['currency'] = cur[0] if cur else ''
     rec['benefits'] = rec.get('benefits', '').strip()
-    skills = [s.strip() for s in rec.get('skills', '').split(',') if s.strip()]
-    seen = []
-    for s in skills:
-        if s not in seen:
-            seen.append(s)
-    rec['skills'] = ','.join(seen)
+    rec['skills'] = _dedupe_csv(rec.get('skills', ''))
     return rec
+
+def _map_unique(col: 'pd.Series', fn) -> 'pd.Series':
+    """Applies `fn` once per distinct value of `col` instead of once per row."""
+    uniques = col.unique()
+    return col.map(dict(zip(uniques, map(fn, uniques))))
+
+def validate_frame(df: 'pd.DataFrame') -> 'pd.DataFrame':
+    """
+    validate_record for a whole DataFrame at once (same results, row for row):
+
+    • missing columns are added empty, NaN becomes ''
+    • choice and list fields go through lookup tables and the memoized
+      fuzzy matcher once per distinct value
+    • currency, benefits and skills use vectorized string operations
+    """
+    df = df.copy()
+    for field in (*CHOICE_FIELDS, *LIST_FIELDS, 'currency', 'benefits', 'skills'):
+        df[field] = df[field].fillna('').astype(str) if field in df else ''
+    for field, default in CHOICE_FIELDS.items():
+        choices, table = ALLOWED[field], LOOKUP[field]
+        stripped = df[field].str.strip()
+        mapped   = stripped.map(table)
+        miss     = mapped.isna()
+        if miss.any():
+            mapped[miss] = _map_unique(stripped[miss], lambda v: _closest(v, tuple(choices), default))
+        df[field] = mapped
+    for field in LIST_FIELDS:
+        df[field] = _map_unique(df[field], lambda v: normalize_list(v, ALLOWED[field]))
+    df['currency'] = df['currency'].str.strip().str[:1]
+    df['benefits'] = df['benefits'].str.strip()
+    df['skills']   = _map_unique(df['skills'], _dedupe_csv)
+    return df
+
+def main():
+    ap = argparse.ArgumentParser(
+        description="Re-validate an output CSV in chunks (python -m utils.validators in.csv out.csv).")
+    ap.add_argument("input_csv")
+    ap.add_argument("output_csv", help="'-' for stdout")
+    ap.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS,
+                    help=f"rows read and written at a time (default {CHUNK_ROWS})")
+    args = ap.parse_args()
+
+    import pandas as pd
+    out = sys.stdout if args.output_csv == '-' else open(args.output_csv, 'w', newline='', encoding='utf-8')
+    rows = 0
+    chunks = pd.read_csv(args.input_csv, dtype=str, keep_default_na=False, chunksize=args.chunk_rows)
+    for n, chunk in enumerate(chunks):
+        validate_frame(chunk).to_csv(out, header=n == 0, index=False)
+        rows += len(chunk)
+        print(f"  • {rows} rows validated", file=sys.stderr)
+    if out is not sys.stdout:
+        out.close()
+    print(f"✅ Done. {_closest.cache_info().currsize} distinct values fuzzy-matched", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,453 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from gemini.rate_limiter import BURST_SECONDS, capacity, debit
+
+try:
+    import redis
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
+
+logger = logging.getLogger(__name__)
+
+QUEUE_URL     = os.getenv("WORK_QUEUE", "sqlite:///data/queue.sqlite")
+LEASE_SECONDS = float(os.getenv("WORK_LEASE_SECONDS", "300"))
+MAX_ATTEMPTS  = int(os.getenv("WORK_MAX_ATTEMPTS", "3"))
+
+URL, PARSE = 'url', 'parse'                 # task kinds
+
+
+@dataclass
+class Task:
+    id: str
+    kind: str
+    payload: Dict
+    attempts: int = 0
+
+
+class WorkQueue:
+    """
+    Shared task queue for coordinator/worker runs.
+
+    Tasks are leased, not popped: a worker that dies simply lets its lease
+    run out, after which the task is handed to someone else (up to
+    `max_attempts` times, then it is failed). Completed tasks carry a result
+    the coordinator collects exactly once. `put` ignores tasks whose key is
+    already queued, so re-enqueueing an input is harmless.
+
+    The same backend also holds the global Gemini budget (`reserve`), so
+    every worker's calls count against one quota per API key.
+    """
+
+    def put(self, kind: str, items: List[Tuple[str, Dict]]) -> int:
+        """Queue (key, payload) pairs; returns how many were new."""
+        raise NotImplementedError
+
+    def lease(self, kind: str, n: int, worker: str, seconds: float = LEASE_SECONDS) -> List[Task]:
+        raise NotImplementedError
+
+    def extend(self, tasks: List[Task], seconds: float = LEASE_SECONDS) -> None:
+        raise NotImplementedError
+
+    def complete(self, task: Task, result: Optional[List[Dict]] = None) -> bool:
+        """
+        Finish a leased task; False if it was already finished elsewhere.
+        `result` None means the task handed its work on (a URL task that
+        queued a parse task); [] means it ended without a record.
+        """
+        raise NotImplementedError
+
+    def fail(self, task: Task, error: str) -> None:
+        """Give a task back for another attempt (or fail it for good)."""
+        raise NotImplementedError
+
+    def collect(self, limit: int = 500) -> Tuple[List[Dict], List[Tuple[Dict, str]], List[Dict]]:
+        """
+        Results of completed tasks not collected yet, tasks that failed for
+        good (payload, error), and payloads of tasks completed with no record.
+        """
+        raise NotImplementedError
+
+    def counts(self) -> Dict[str, int]:
+        """Open work: ready/leased tasks per kind, plus results not yet collected."""
+        raise NotImplementedError
+
+    def close_input(self) -> None:
+        """Mark that the coordinator has queued everything."""
+        raise NotImplementedError
+
+    def input_closed(self) -> bool:
+        raise NotImplementedError
+
+    def reserve(self, budget_id: str, rpm: float, tpm: float, tokens: int) -> float:
+        """Debit one call of `tokens` from a shared budget; returns the wait in seconds."""
+        raise NotImplementedError
+
+    def open_tasks(self, kind: str) -> int:
+        """Tasks of `kind` still ready or leased (expired leases count as ready)."""
+        c = self.counts()
+        return c.get(f"{kind}:ready", 0) + c.get(f"{kind}:leased", 0)
+
+    def drained(self) -> bool:
+        """Input closed and nothing left to do or collect."""
+        return self.input_closed() and not any(self.counts().values())
+
+
+class SqliteWorkQueue(WorkQueue):
+    """
+    WorkQueue in one SQLite file: for several worker processes on one
+    machine (or a shared filesystem with working locks). Every operation
+    is a short IMMEDIATE transaction.
+    """
+
+    def __init__(self, path: str, max_attempts: int = MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id        INTEGER PRIMARY KEY,
+                key       TEXT NOT NULL UNIQUE,
+                kind      TEXT NOT NULL,
+                payload   TEXT NOT NULL,
+                state     TEXT NOT NULL DEFAULT 'ready',
+                worker    TEXT,
+                lease_until REAL,
+                attempts  INTEGER NOT NULL DEFAULT 0,
+                result    TEXT,
+                error     TEXT
+            );
+            CREATE INDEX IF NOT EXISTS tasks_state ON tasks (kind, state);
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS budget (
+                id TEXT PRIMARY KEY, reqs REAL, toks REAL, stamp REAL
+            );
+        """)
+
+    def _conn(self) -> sqlite3.Connection:
+        # one connection per thread; SQLite serializes writers across processes
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    class _Tx:
+        def __init__(self, db):
+            self.db = db
+
+        def __enter__(self):
+            self.db.execute("BEGIN IMMEDIATE")
+            return self.db
+
+        def __exit__(self, exc_type, *_):
+            self.db.execute("ROLLBACK" if exc_type else "COMMIT")
+
+    def _tx(self) -> '_Tx':
+        return self._Tx(self._conn())
+
+    def _requeue_expired(self, db, now: float) -> None:
+        db.execute("UPDATE tasks SET state = 'failed', error = 'lease expired too often' "
+                   "WHERE state = 'leased' AND lease_until < ? AND attempts + 1 >= ?",
+                   (now, self.max_attempts))
+        db.execute("UPDATE tasks SET state = 'ready', worker = NULL, attempts = attempts + 1 "
+                   "WHERE state = 'leased' AND lease_until < ?", (now,))
+
+    def put(self, kind, items):
+        with self._tx() as db:
+            before = db.total_changes
+            db.executemany("INSERT OR IGNORE INTO tasks (key, kind, payload) VALUES (?, ?, ?)",
+                       [(f"{kind}:{key}", kind, json.dumps(p, ensure_ascii=False)) for key, p in items])
+            return db.total_changes - before
+
+    def lease(self, kind, n, worker, seconds=LEASE_SECONDS):
+        now = time.time()
+        with self._tx() as db:
+            self._requeue_expired(db, now)
+            rows = db.execute("SELECT id, payload, attempts FROM tasks WHERE kind = ? AND state = 'ready' "
+                          "ORDER BY id LIMIT ?", (kind, n)).fetchall()
+            db.executemany("UPDATE tasks SET state = 'leased', worker = ?, lease_until = ? WHERE id = ?",
+                       [(worker, now + seconds, r[0]) for r in rows])
+        return [Task(str(i), kind, json.loads(p), a) for i, p, a in rows]
+
+    def extend(self, tasks, seconds=LEASE_SECONDS):
+        with self._tx() as db:
+            db.executemany("UPDATE tasks SET lease_until = ? WHERE id = ? AND state = 'leased'",
+                       [(time.time() + seconds, int(t.id)) for t in tasks])
+
+    def complete(self, task, result=None):
+        with self._tx() as db:
+            cur = db.execute("UPDATE tasks SET state = 'done', result = ?, lease_until = NULL "
+                         "WHERE id = ? AND state IN ('leased', 'ready')",
+                         (json.dumps(result, ensure_ascii=False), int(task.id)))
+            return cur.rowcount == 1
+
+    def fail(self, task, error):
+        with self._tx() as db:
+            db.execute("UPDATE tasks SET state = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'ready' END, "
+                   "attempts = attempts + 1, worker = NULL, error = ? "
+                   "WHERE id = ? AND state = 'leased'",
+                   (self.max_attempts, str(error)[:500], int(task.id)))
+
+    def collect(self, limit=500):
+        with self._tx() as db:
+            done = db.execute("SELECT id, result, payload FROM tasks WHERE state = 'done' LIMIT ?",
+                          (limit,)).fetchall()
+            failed = db.execute("SELECT id, payload, error FROM tasks WHERE state = 'failed' LIMIT ?",
+                            (limit,)).fetchall()
+            db.executemany("UPDATE tasks SET state = 'collected', result = NULL WHERE id = ?",
+                       [(i,) for i, _, _ in done])
+            db.executemany("UPDATE tasks SET state = 'dead' WHERE id = ?", [(i,) for i, _, _ in failed])
+        records, empty = [], []
+        for _, result, payload in done:
+            result = json.loads(result or 'null')
+            records.extend(result or [])
+            if result == []:
+                empty.append(json.loads(payload))
+        return records, [(json.loads(p), e or '') for _, p, e in failed], empty
+
+    def counts(self):
+        with self._tx() as db:
+            self._requeue_expired(db, time.time())
+            rows = db.execute("SELECT kind, state, COUNT(*) FROM tasks "
+                          "WHERE state IN ('ready', 'leased', 'done', 'failed') GROUP BY kind, state").fetchall()
+        return {f"{kind}:{state}": n for kind, state, n in rows}
+
+    def close_input(self):
+        with self._tx() as db:
+            db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('input_closed', '1')")
+
+    def input_closed(self):
+        row = self._conn().execute("SELECT value FROM meta WHERE name = 'input_closed'").fetchone()
+        return bool(row and row[0] == '1')
+
+    def reserve(self, budget_id, rpm, tpm, tokens):
+        now = time.time()
+        with self._tx() as db:
+            row = db.execute("SELECT reqs, toks, stamp FROM budget WHERE id = ?", (budget_id,)).fetchone()
+            reqs, toks, stamp = row if row else (*capacity(rpm, tpm), now)
+            reqs, toks, wait = debit(reqs, toks, max(0.0, now - stamp), rpm, tpm, tokens)
+            db.execute("INSERT OR REPLACE INTO budget (id, reqs, toks, stamp) VALUES (?, ?, ?, ?)",
+                   (budget_id, reqs, toks, now))
+        return wait
+
+
+# Redis scripts run atomically on the server, so leases and budgets stay
+# consistent however many workers hit them at once. Lease times come from
+# the server's TIME, never from a worker's clock.
+_PUT_LUA = """
+local p, kind = KEYS[1], ARGV[1]
+local new = 0
+for i = 2, #ARGV, 2 do
+    if redis.call('SADD', p..':keys', kind..':'..ARGV[i]) == 1 then
+        local id = redis.call('INCR', p..':seq')
+        redis.call('HSET', p..':task:'..id, 'kind', kind, 'payload', ARGV[i + 1], 'attempts', 0)
+        redis.call('RPUSH', p..':ready:'..kind, id)
+        new = new + 1
+    end
+end
+return new
+"""
+
+_LEASE_LUA = """
+local p, kind, seconds, n, max_attempts = KEYS[1], ARGV[1], tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1e6
+local lease_until = now + seconds
+local leased = p..':leased:'..kind
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', leased, '-inf', now)) do
+    redis.call('ZREM', leased, id)
+    local t = p..':task:'..id
+    local attempts = redis.call('HINCRBY', t, 'attempts', 1)
+    if attempts >= max_attempts then
+        redis.call('HSET', t, 'error', 'lease expired too often')
+        redis.call('RPUSH', p..':failed', id)
+    else
+        redis.call('RPUSH', p..':ready:'..kind, id)
+    end
+end
+local out = {}
+for i = 1, n do
+    local id = redis.call('LPOP', p..':ready:'..kind)
+    if not id then break end
+    redis.call('ZADD', leased, lease_until, id)
+    local t = p..':task:'..id
+    table.insert(out, id)
+    table.insert(out, redis.call('HGET', t, 'payload'))
+    table.insert(out, redis.call('HGET', t, 'attempts'))
+end
+return out
+"""
+
+_EXTEND_LUA = """
+local leased, seconds = KEYS[1], tonumber(ARGV[1])
+local t = redis.call('TIME')
+local until_ = tonumber(t[1]) + tonumber(t[2]) / 1e6 + seconds
+for i = 2, #ARGV do
+    redis.call('ZADD', leased, 'XX', until_, ARGV[i])
+end
+return 1
+"""
+
+_COMPLETE_LUA = """
+local p, id, result = KEYS[1], ARGV[1], ARGV[2]
+local kind = redis.call('HGET', p..':task:'..id, 'kind')
+if redis.call('ZREM', p..':leased:'..kind, id) == 0 and redis.call('LREM', p..':ready:'..kind, 0, id) == 0 then
+    return 0
+end
+redis.call('HSET', p..':task:'..id, 'result', result)
+redis.call('RPUSH', p..':done', id)
+return 1
+"""
+
+_FAIL_LUA = """
+local p, id, err, max_attempts = KEYS[1], ARGV[1], ARGV[2], tonumber(ARGV[3])
+local t = p..':task:'..id
+local kind = redis.call('HGET', t, 'kind')
+if redis.call('ZREM', p..':leased:'..kind, id) == 0 then return 0 end
+local attempts = redis.call('HINCRBY', t, 'attempts', 1)
+redis.call('HSET', t, 'error', err)
+if attempts >= max_attempts then
+    redis.call('RPUSH', p..':failed', id)
+else
+    redis.call('RPUSH', p..':ready:'..kind, id)
+end
+return 1
+"""
+
+_BUDGET_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1e6
+local rpm, tpm, tokens, burst = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+local req_rate, tok_rate = rpm / 60, tpm / 60
+local max_reqs, max_toks = math.max(1, req_rate * burst), tok_rate * burst
+local b = redis.call('HMGET', KEYS[1], 'reqs', 'toks', 'stamp')
+local reqs  = tonumber(b[1]) or max_reqs
+local toks  = tonumber(b[2]) or max_toks
+local stamp = tonumber(b[3]) or now
+local elapsed = math.max(0, now - stamp)
+reqs = math.min(max_reqs, reqs + elapsed * req_rate)
+toks = math.min(max_toks, toks + elapsed * tok_rate)
+local wait = 0
+if reqs < 1 then wait = (1 - reqs) / req_rate end
+if toks - tokens < 0 then wait = math.max(wait, (tokens - toks) / tok_rate) end
+redis.call('HSET', KEYS[1], 'reqs', reqs - 1, 'toks', toks - tokens, 'stamp', now)
+redis.call('EXPIRE', KEYS[1], 3600)
+return tostring(wait)
+"""
+
+
+class RedisWorkQueue(WorkQueue):
+    """
+    WorkQueue on a Redis server, for workers spread over several machines.
+    Enqueueing, leases, completion and budget updates are Lua scripts
+    (atomic on the server); leases and the budget use the server clock, so
+    worker clocks may differ.
+    """
+
+    PUT_CHUNK = 500                 # tasks per enqueue script, so none blocks the server for long
+
+    def __init__(self, url: str, name: str = "jobscraper", max_attempts: int = MAX_ATTEMPTS):
+        if not HAS_REDIS:
+            raise RuntimeError("The redis work queue needs the 'redis' package (pip install redis)")
+        self.r = redis.Redis.from_url(url, decode_responses=True)
+        self.p = name
+        self.max_attempts = max_attempts
+        self._put      = self.r.register_script(_PUT_LUA)
+        self._lease    = self.r.register_script(_LEASE_LUA)
+        self._extend   = self.r.register_script(_EXTEND_LUA)
+        self._complete = self.r.register_script(_COMPLETE_LUA)
+        self._fail     = self.r.register_script(_FAIL_LUA)
+        self._budget   = self.r.register_script(_BUDGET_LUA)
+
+    def put(self, kind, items):
+        # dedup check, id and enqueue in one script: a crash can't mark a key
+        # seen without its task being queued
+        new = 0
+        for i in range(0, len(items), self.PUT_CHUNK):
+            args = [kind]
+            for key, payload in items[i:i + self.PUT_CHUNK]:
+                args += [key, json.dumps(payload, ensure_ascii=False)]
+            new += int(self._put(keys=[self.p], args=args))
+        return new
+
+    def lease(self, kind, n, worker, seconds=LEASE_SECONDS):
+        flat = self._lease(keys=[self.p], args=[kind, seconds, n, self.max_attempts])
+        return [Task(flat[i], kind, json.loads(flat[i + 1]), int(flat[i + 2] or 0))
+                for i in range(0, len(flat), 3)]
+
+    def extend(self, tasks, seconds=LEASE_SECONDS):
+        by_kind: Dict[str, List[str]] = {}
+        for t in tasks:
+            by_kind.setdefault(t.kind, []).append(t.id)
+        for kind, ids in by_kind.items():
+            self._extend(keys=[f"{self.p}:leased:{kind}"], args=[seconds, *ids])
+
+    def complete(self, task, result=None):
+        return bool(self._complete(keys=[self.p], args=[task.id, json.dumps(result, ensure_ascii=False)]))
+
+    def fail(self, task, error):
+        self._fail(keys=[self.p], args=[task.id, str(error)[:500], self.max_attempts])
+
+    def collect(self, limit=500):
+        records, failed, empty = [], [], []
+        for _ in range(limit):
+            tid = self.r.lpop(f"{self.p}:done")
+            if tid is None:
+                break
+            result, payload = self.r.hmget(f"{self.p}:task:{tid}", 'result', 'payload')
+            self.r.hdel(f"{self.p}:task:{tid}", 'result', 'payload')
+            result = json.loads(result or 'null')
+            records.extend(result or [])
+            if result == []:
+                empty.append(json.loads(payload or '{}'))
+        for _ in range(limit):
+            tid = self.r.lpop(f"{self.p}:failed")
+            if tid is None:
+                break
+            payload, error = self.r.hmget(f"{self.p}:task:{tid}", 'payload', 'error')
+            failed.append((json.loads(payload or '{}'), error or ''))
+        return records, failed, empty
+
+    def counts(self):
+        out = {}
+        for kind in (URL, PARSE):
+            out[f"{kind}:ready"]  = self.r.llen(f"{self.p}:ready:{kind}")
+            out[f"{kind}:leased"] = self.r.zcard(f"{self.p}:leased:{kind}")
+        out['done']   = self.r.llen(f"{self.p}:done")
+        out['failed'] = self.r.llen(f"{self.p}:failed")
+        return out
+
+    def close_input(self):
+        self.r.hset(f"{self.p}:meta", 'input_closed', 1)
+
+    def input_closed(self):
+        return self.r.hget(f"{self.p}:meta", 'input_closed') == '1'
+
+    def reserve(self, budget_id, rpm, tpm, tokens):
+        return float(self._budget(keys=[f"{self.p}:budget:{budget_id}"], args=[rpm, tpm, tokens, BURST_SECONDS]))
+
+
+def open_queue(url: str = QUEUE_URL) -> WorkQueue:
+    """
+    `sqlite:///path/to/queue.sqlite` (relative) or `sqlite:////abs/path`,
+    or `redis://host:6379/0` (optionally `#name` to pick a key prefix).
+    """
+    parts = urlsplit(url)
+    if parts.scheme == 'sqlite':
+        return SqliteWorkQueue(url[len('sqlite:///'):])
+    if parts.scheme in ('redis', 'rediss', 'unix'):
+        return RedisWorkQueue(url.split('#', 1)[0], name=parts.fragment or "jobscraper")
+    raise ValueError(f"Unknown work queue backend: {url}")
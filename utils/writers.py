@@ -0,0 +1,309 @@
+import os
+import csv
+import json
+import time
+import logging
+from importlib.util import find_spec
+from typing import Dict, Iterable, List, Optional
+
+from utils.metrics import metrics
+from utils.records import FIELDNAMES, Record
+
+HAS_PYARROW = find_spec("pyarrow") is not None     # imported only when Parquet is written or read
+
+logger = logging.getLogger(__name__)
+
+FLUSH_ROWS     = 200             # rows buffered before a flush to the OS...
+FLUSH_SECONDS  = 1.0             # ...or seconds, whichever comes first
+FSYNC_SECONDS  = float(os.getenv("OUTPUT_FSYNC_SECONDS", "5"))   # max seconds between fsyncs (0 = every flush)
+ROW_GROUP_ROWS = int(os.getenv("PARQUET_ROW_GROUP", "5000"))     # rows per Parquet row group
+MAX_REORDER    = 10000           # records held back waiting for an earlier one in input order
+
+FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.parquet': 'parquet', '.txt': 'txt'}
+
+
+def format_for(path: str, fmt: Optional[str] = None) -> str:
+    """The output format: `fmt` if given, else from the file extension (CSV by default)."""
+    return fmt or FORMATS.get(os.path.splitext(path)[1].lower(), 'csv')
+
+
+class Sink:
+    """
+    One long-lived output file. `write` buffers records and flushes them
+    every FLUSH_ROWS rows or FLUSH_SECONDS; the file is fsynced at most
+    every FSYNC_SECONDS, so a crash loses a few seconds of output at most
+    (a resumed run finds those via `written_urls` and writes them again).
+    Use as a context manager or call `close`.
+    """
+
+    fmt = ''
+
+    def __init__(self, path: str, fieldnames: List[str] = FIELDNAMES,
+                 flush_rows: int = FLUSH_ROWS, fsync_seconds: float = FSYNC_SECONDS):
+        self.path          = path
+        self.fieldnames    = fieldnames
+        self.flush_rows    = flush_rows
+        self.fsync_seconds = fsync_seconds
+        self.rows          = 0
+        self._pending      = 0
+        self._synced       = self._flushed = time.monotonic()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def write(self, records: Iterable[Dict]) -> None:
+        before = self.rows
+        with metrics.timer('write_seconds', format=self.fmt):
+            for rec in records:
+                self._write_one({f: rec.get(f, '') for f in self.fieldnames})
+                self.rows += 1
+                self._pending += 1
+            if self._pending >= self.flush_rows or time.monotonic() - self._flushed >= FLUSH_SECONDS:
+                self.flush()
+        metrics.inc('rows_written_total', self.rows - before, format=self.fmt)
+
+    def skip(self, urls: Iterable[str]) -> None:
+        """URLs that end without a record; only OrderedSink has to know."""
+
+    def flush(self) -> None:
+        self._pending, self._flushed = 0, time.monotonic()
+        self._flush(time.monotonic() - self._synced >= self.fsync_seconds)
+
+    def close(self) -> None:
+        self._flush(True)
+        self._close()
+
+    def _sync(self, f) -> None:
+        with metrics.timer('fsync_seconds', format=self.fmt):
+            f.flush()
+            os.fsync(f.fileno())
+        self._synced = time.monotonic()
+
+    def _write_one(self, row: Dict) -> None:
+        raise NotImplementedError
+
+    def _flush(self, sync: bool) -> None:
+        raise NotImplementedError
+
+    def _close(self) -> None:
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CsvSink(Sink):
+    """Appends to a CSV file; the header is written only when the file is new or empty."""
+
+    fmt = 'csv'
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(path, **kwargs)
+        self._f = open(path, 'a', newline='', encoding='utf-8')
+        self._w = csv.DictWriter(self._f, fieldnames=self.fieldnames)
+        if self._f.tell() == 0:
+            self._w.writeheader()
+
+    def _write_one(self, row):
+        self._w.writerow(row)
+
+    def _flush(self, sync):
+        if sync:
+            self._sync(self._f)
+        else:
+            self._f.flush()
+
+    def _close(self):
+        self._f.close()
+
+
+class TxtSink(CsvSink):
+    """The raw comma-joined lines of data/temp_output.txt (no header, no quoting)."""
+
+    fmt = 'txt'
+
+    def __init__(self, path: str, **kwargs):
+        Sink.__init__(self, path, **kwargs)
+        self._f = open(path, 'a', encoding='utf-8')
+
+    def _write_one(self, row):
+        self._f.write(','.join(str(v) for v in row.values()).strip() + '\n')
+
+
+class JsonlSink(CsvSink):
+    """Appends one JSON object per line."""
+
+    fmt = 'jsonl'
+
+    def __init__(self, path: str, **kwargs):
+        Sink.__init__(self, path, **kwargs)
+        self._f = open(path, 'a', encoding='utf-8')
+
+    def _write_one(self, row):
+        self._f.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+
+class ParquetSink(Sink):
+    """
+    Writes Parquet in row groups of ROW_GROUP_ROWS (all columns as strings,
+    like the CSV). Parquet files cannot be appended to, so when `path`
+    exists the run goes to the next free `name.N.parquet` beside it; readers
+    such as pandas/pyarrow load the whole set with a glob.
+    """
+
+    fmt = 'parquet'
+
+    def __init__(self, path: str, row_group_rows: int = ROW_GROUP_ROWS, **kwargs):
+        if not HAS_PYARROW:
+            raise RuntimeError("Parquet output needs the 'pyarrow' package (pip install pyarrow)")
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._pa = pa
+        super().__init__(path, **kwargs)
+        stem, n = path[:-len('.parquet')] if path.endswith('.parquet') else path, 0
+        while os.path.exists(path):
+            n += 1
+            path = f"{stem}.{n}.parquet"
+        if path != self.path:
+            logger.info(f"{self.path} exists; writing this run to {path}")
+            self.path = path
+        self.row_group_rows = row_group_rows
+        self._schema = pa.schema([(f, pa.string()) for f in self.fieldnames])
+        self._w      = pq.ParquetWriter(path, self._schema)
+        self._cols: Dict[str, List[str]] = {f: [] for f in self.fieldnames}
+
+    def _write_one(self, row):
+        for f, v in row.items():
+            self._cols[f].append('' if v is None else str(v))
+        if len(self._cols[self.fieldnames[0]]) >= self.row_group_rows:
+            self._write_group()
+
+    def _write_group(self):
+        if self._cols[self.fieldnames[0]]:
+            self._w.write_table(self._pa.table(self._cols, schema=self._schema))
+            self._cols = {f: [] for f in self.fieldnames}
+
+    def _flush(self, sync):
+        # row groups are only cut at ROW_GROUP_ROWS (or close) to keep them large
+        pass
+
+    def _close(self):
+        self._write_group()
+        self._w.close()
+
+
+SINKS = {'csv': CsvSink, 'jsonl': JsonlSink, 'parquet': ParquetSink, 'txt': TxtSink}
+
+
+def open_sink(path: str, fmt: Optional[str] = None, **kwargs) -> Sink:
+    """A sink for `path` in `fmt` ('csv', 'jsonl', 'parquet', 'txt'; default from the extension)."""
+    return SINKS[format_for(path, fmt)](path, **kwargs)
+
+
+def written_urls(path: str, fmt: Optional[str] = None) -> set:
+    """The 'url' values already in an output file of any format (empty if it doesn't exist)."""
+    fmt = format_for(path, fmt)
+    if fmt == 'parquet':
+        stem = path[:-len('.parquet')] if path.endswith('.parquet') else path
+        parts, n = [], 0
+        while os.path.exists(path if n == 0 else f"{stem}.{n}.parquet"):
+            parts.append(path if n == 0 else f"{stem}.{n}.parquet")
+            n += 1
+        if not HAS_PYARROW:
+            return set()
+        import pyarrow.parquet as pq
+        urls = set()
+        for p in parts:
+            try:
+                urls.update(u for u in pq.read_table(p, columns=['url']).column('url').to_pylist() if u)
+            except Exception as e:              # no footer: the run writing it crashed
+                logger.warning(f"Ignoring unreadable {p}: {e}")
+        return urls
+    if not os.path.exists(path) or fmt == 'txt':
+        return set()
+    with open(path, newline='', encoding='utf-8') as f:
+        if fmt == 'jsonl':
+            urls = set()
+            for line in f:
+                try:
+                    urls.add(json.loads(line).get('url'))
+                except ValueError:
+                    continue                    # torn last line after a crash
+            return urls - {None, ''}
+        return {row.get('url') for row in csv.DictReader(f) if row.get('url')}
+
+
+class OrderedSink:
+    """
+    Wraps a sink so records come out in input order instead of completion
+    order. `order` lists the URLs in input order; a record is held back
+    until every earlier URL has been written or `skip`ped (URLs that end
+    without a record). At most `max_pending` records are held: past that,
+    the oldest missing URLs are given up on and output moves on. Held
+    records are kept as compact utils.records.Record rows.
+    """
+
+    def __init__(self, sink: Sink, order: List[str], max_pending: int = MAX_REORDER):
+        self.sink        = sink
+        self.max_pending = max_pending
+        self._pos        = {url: i for i, url in reversed(list(enumerate(order)))}
+        self._next       = 0
+        self._held: Dict[int, List[Dict]] = {}
+        self._gone       = set()
+        self._count      = 0
+
+    @property
+    def path(self) -> str:
+        return self.sink.path
+
+    def write(self, records: Iterable[Dict]) -> None:
+        for rec in records:
+            pos = self._pos.get(rec.get('url'))
+            if pos is None or pos < self._next:
+                self.sink.write([rec])          # unknown or late: no slot to wait for
+                continue
+            self._held.setdefault(pos, []).append(Record.from_dict(rec))
+            self._count += 1
+        self._release()
+
+    def skip(self, urls: Iterable[str]) -> None:
+        for url in urls:
+            pos = self._pos.get(url)
+            if pos is not None and pos >= self._next:
+                self._gone.add(pos)
+        self._release()
+
+    def _release(self) -> None:
+        out = []
+        while True:
+            if self._next in self._held:
+                recs = self._held.pop(self._next)
+                self._count -= len(recs)
+                out.extend(recs)
+            elif self._next in self._gone:
+                self._gone.discard(self._next)
+            elif self._count > self.max_pending:
+                self._next = min(self._held)    # give up on the gap
+                continue
+            else:
+                break
+            self._next += 1
+        if out:
+            self.sink.write(out)
+
+    def flush(self) -> None:
+        self.sink.flush()
+
+    def close(self) -> None:
+        for pos in sorted(self._held):
+            self.sink.write(self._held[pos])
+        self._held.clear()
+        self.sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()